@@ -0,0 +1,163 @@
+# benchmarks/bench_hot_paths.py
+"""
+Microbenchmarks for the pure functions on every request's path (response
+formatting, button payloads, fuzzy project matching, cache serialization,
+...) at realistic sizes, compared against stored baselines.
+
+Each case is timed with timeit: loops are auto-ranged to ~0.2 s, repeated
+--repeat times, and the best per-call time is kept (the least noisy
+estimate). A case regresses when it is more than --threshold slower than its
+baseline. Baselines are machine-specific: record them on the machine (or CI
+runner class) that runs --check.
+
+Run from the repository root:
+    python -m benchmarks.bench_hot_paths                      # print timings
+    python -m benchmarks.bench_hot_paths --save               # record baselines
+    python -m benchmarks.bench_hot_paths --check              # exit 1 on regressions
+    python -m benchmarks.bench_hot_paths --check -k format_issues --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.bench_codecs import make_issues, make_projects, make_session
+from benchmarks.standins import STANDIN_ENVIRONMENT
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "hot_paths.json"
+
+
+def build_cases() -> List[Tuple[str, Callable[[], object]]]:
+    """Returns (name, zero-argument callable) pairs; inputs are built once, outside the timing."""
+    for name, value in STANDIN_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+
+    from src.core.codecs import Serializer
+    from src.handlers.message_handler import add_prefix
+    from src.integrations.acc_filters import compile_issue_filters
+    from src.services.fast_intent import classify
+    from src.services.project_service import fuzzy_match_projects
+    from src.utils.aggregation import ISSUE_COLUMNS, GroupedCounter
+    from src.utils.buttons import create_project_buttons, create_user_buttons
+    from src.utils.transformations import build_filter_description, format_aggregate_response, format_issues_response
+
+    rng = random.Random(42)
+    issues = make_issues(rng, 5000)
+    projects = make_projects(rng, 10_000)
+    acc_projects = [{"id": p["project_id"], "name": p["project_name"]} for p in projects]
+    users = [{"name": f"User {i}", "email": f"user.number{i}@example.com", "user_id": f"U{i:06d}"} for i in range(500)]
+    session = make_session(rng)
+    filters = {
+        "assignee_name": "Ashrik", "project_name": "Sample Residential Tower A",
+        "issue_status": ["open", "in_review"], "due_date": "next_week", "issue_type": ["Safety"],
+    }
+    serializer = Serializer(codec="auto", compression_threshold=4096)
+    encoded_session = serializer.dumps(session)
+    encoded_projects = serializer.dumps(projects)
+    today = date(2026, 1, 15)
+
+    cases = []
+    for size in (1, 50, 500, 5000):
+        data = {"status": "success", "data": issues[:size], "total": size}
+        cases.append((f"format_issues_response[{size}]", lambda data=data: format_issues_response(data, filters, False, "b.project")))
+    cases += [
+        ("build_filter_description", lambda: build_filter_description(filters)),
+        ("create_user_buttons[500]", lambda: create_user_buttons(users, "Please select the correct user:")),
+        ("create_project_buttons[10k]", lambda: create_project_buttons(projects, "Please select the correct project:")),
+        # add_prefix mutates in place, so each call gets fresh copies (included in the time)
+        ("add_prefix[10k]", lambda: add_prefix([dict(p) for p in projects], "project_id", "project::")),
+        ("fuzzy_match_projects[10k]", lambda: fuzzy_match_projects("tower a phase 3", acc_projects)),
+        ("serializer.dumps[session]", lambda: serializer.dumps(session)),
+        ("serializer.loads[session]", lambda: serializer.loads(encoded_session)),
+        ("serializer.dumps[projects_10k]", lambda: serializer.dumps(projects)),
+        ("serializer.loads[projects_10k]", lambda: serializer.loads(encoded_projects)),
+        ("compile_issue_filters", lambda: compile_issue_filters(filters, "ADSK1", [{"id": "t1", "title": "Safety", "subtypes": []}], today)),
+        ("fast_intent.classify", lambda: classify("namaste ji, thank you so much")),
+    ]
+
+    def aggregate():
+        counter = GroupedCounter(["status", "issue_type", "assignee", "due"], ISSUE_COLUMNS, today)
+        for start in range(0, len(issues), 100):
+            counter.add_page(issues[start:start + 100])
+        return format_aggregate_response({"aggregate": counter.result(), "truncated": False}, filters)
+
+    cases.append(("aggregate_issues[5000]", aggregate))
+    return cases
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    loops = max(1, loops)
+    # autorange stops at >= 0.2 s; time ~0.2 s per repeat
+    runs = [t / loops * 1e6 for t in timer.repeat(repeat=repeat, number=loops)]
+    return {"best_us": round(min(runs), 3), "median_us": round(statistics.median(runs), 3), "loops": loops}
+
+
+def load_baselines(path: Path) -> Dict[str, float]:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baselines(path: Path, results: Dict[str, Dict[str, float]]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor()},
+        "results": {name: result["best_us"] for name, result in results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Hot-path microbenchmarks with regression thresholds.")
+    parser.add_argument("-k", dest="pattern", help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="write the measured times as the new baselines")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any case regressed beyond --threshold")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction of the baseline")
+    args = parser.parse_args()
+
+    cases = [(name, fn) for name, fn in build_cases() if not args.pattern or args.pattern in name]
+    baselines = load_baselines(args.baseline)
+    results: Dict[str, Dict[str, float]] = {}
+    regressions = []
+
+    print(f"{'case':<34}{'best us':>12}{'median us':>12}{'baseline':>12}{'change':>9}")
+    for name, fn in cases:
+        result = measure(fn, args.repeat)
+        results[name] = result
+        baseline = baselines.get(name)
+        change = ""
+        if baseline:
+            ratio = result["best_us"] / baseline - 1
+            change = f"{ratio:+.0%}"
+            if ratio > args.threshold:
+                regressions.append(name)
+                change += " !"
+        shown = f"{baseline:.1f}" if baseline else "-"
+        print(f"{name:<34}{result['best_us']:>12.1f}{result['median_us']:>12.1f}{shown:>12}{change:>9}")
+
+    if args.save:
+        merged = {**{name: {"best_us": us} for name, us in baselines.items()}, **results}
+        save_baselines(args.baseline, merged)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+    if args.check and regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# benchmarks/bench_intent_classifier.py
+"""
+Evaluates the nearest-neighbour intent classifier on a held-out split of
+past parses: intent accuracy, full-parameter accuracy, and coverage/precision
+at several confidence thresholds, plus training time and per-message latency.
+
+Run from the repository root:
+    python -m benchmarks.bench_intent_classifier --data intent_history.jsonl
+    python -m benchmarks.bench_intent_classifier            # synthetic parses
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from src.services.intent_cache import SLOT_FIELDS, apply_known_values, fill_template, normalize
+from src.services.intent_classifier import NearestNeighbourIntentModel, placeholders, read_jsonl, to_example
+
+PROJECTS = ["Tower A", "Tower B", "Sample Residential", "Metro Line 3", "Airport T2", "Green Valley Villas"]
+PEOPLE = ["Ashrik", "Priya", "Rahul Mehta", "Anita", "Vikram"]
+ISSUE_TYPES = ["Safety", "Quality", "Design"]
+WORKFLOWS = ["S1.S3-Architecture", "WP.S1-Structure"]
+TEMPLATES = [
+    ("show open issues in {project}", "get_issues", {"project_name": "{project}", "issue_status": ["open"]}),
+    ("open issues for {person} in {project}", "get_issues", {"project_name": "{project}", "assignee_name": "{person}", "issue_status": ["open"]}),
+    ("how many {type} issues in {project}", "get_issues", {"project_name": "{project}", "issue_type": ["{type}"], "count_only": True}),
+    ("mujhe kitne issues assigned hai in {project}", "get_issues", {"project_name": "{project}", "assignee_name": "current_user", "count_only": True}),
+    ("my issues due today in {project}", "get_issues", {"project_name": "{project}", "assignee_name": "current_user", "due_date": "today"}),
+    ("pending reviews for {person} in {project}", "get_reviews", {"project_name": "{project}", "assignee_name": "{person}", "review_status": ["open"]}),
+    ("{workflow} reviews in {project}", "get_reviews", {"project_name": "{project}", "review_workflow": ["{workflow}"]}),
+    ("count closed reviews in {project}", "get_reviews", {"project_name": "{project}", "review_status": ["closed"], "count_only": True}),
+    ("WIR forms in review for {project}", "get_forms", {"project_name": "{project}", "form_template": ["WIR"], "form_status": ["in_review"]}),
+    ("forms created today in {project}", "get_forms", {"project_name": "{project}", "created_on": "today"}),
+]
+NOISE = ["", "please", "pls", "?", "!", "bro", "can you"]
+
+
+def _format(value, slots):
+    if isinstance(value, list):
+        return [_format(v, slots) for v in value]
+    return value.format(**slots) if isinstance(value, str) else value
+
+
+def synthetic_records(count: int, rng: random.Random) -> list:
+    records = []
+    for _ in range(count):
+        text, intent, parameters = rng.choice(TEMPLATES)
+        slots = {"project": rng.choice(PROJECTS), "person": rng.choice(PEOPLE),
+                 "type": rng.choice(ISSUE_TYPES), "workflow": rng.choice(WORKFLOWS)}
+        message = text.format(**slots)
+        if rng.random() < 0.5:
+            message = message.upper() if rng.random() < 0.2 else message.capitalize()
+        message = f"{message} {rng.choice(NOISE)}".strip()
+        records.append({"text": message, "intent": intent,
+                        "parameters": {k: _format(v, slots) for k, v in parameters.items()}})
+    return records
+
+
+def _comparable(parameters: dict) -> dict:
+    return {k: v for k, v in parameters.items() if v not in (None, [], "", False) and k != "intent"}
+
+
+def _known_values(records: list) -> dict:
+    known = defaultdict(set)
+    for record in records:
+        for field in SLOT_FIELDS:
+            value = (record.get("parameters") or {}).get(field)
+            for v in value if isinstance(value, list) else [value]:
+                if isinstance(v, str) and v and v != "current_user":
+                    known[field].add(v)
+    return {field: list(values) for field, values in known.items()}
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def evaluate(records: list, test_fraction: float, thresholds: list, seed: int):
+    rng = random.Random(seed)
+    records = list(records)
+    rng.shuffle(records)
+    cut = int(len(records) * (1 - test_fraction))
+    train, test = records[:cut], records[cut:]
+
+    started = time.perf_counter()
+    model = NearestNeighbourIntentModel.train(e for e in map(to_example, train) if e)
+    train_seconds = time.perf_counter() - started
+    known = _known_values(train)
+
+    outcomes = []  # (confidence, intent_correct, exact_correct)
+    latencies = []
+    for record in test:
+        started = time.perf_counter()
+        template = apply_known_values(record["text"], known)
+        template_text, fills = template if template else (normalize(record["text"]), {})
+        label, confidence = model.predict(template_text)
+        parameters = fill_template(label["parameters"], fills) if label else None
+        if parameters is None or placeholders(label["parameters"]) != set(fills):
+            confidence = 0.0
+        latencies.append((time.perf_counter() - started) * 1e6)
+        intent_ok = bool(label) and label["intent"] == record["intent"]
+        exact_ok = intent_ok and parameters is not None and _comparable(parameters) == _comparable(record["parameters"])
+        outcomes.append((confidence, intent_ok, exact_ok))
+
+    print(f"train={len(train)} test={len(test)} examples={model.num_examples} labels={len(model.labels)} "
+          f"features={len(model.vocabulary)} train_time={train_seconds:.2f}s")
+    print(f"top-1 intent accuracy: {sum(o[1] for o in outcomes) / len(outcomes):.3f}")
+    print(f"top-1 exact accuracy:  {sum(o[2] for o in outcomes) / len(outcomes):.3f}")
+    print(f"latency/message: p50={_percentile(latencies, 0.5):.0f}us p99={_percentile(latencies, 0.99):.0f}us "
+          f"mean={statistics.mean(latencies):.0f}us")
+    print(f"{'threshold':>9} {'coverage':>9} {'intent_prec':>11} {'exact_prec':>10}")
+    for threshold in thresholds:
+        accepted = [o for o in outcomes if o[0] >= threshold]
+        if not accepted:
+            print(f"{threshold:>9.2f} {0:>9.3f} {'-':>11} {'-':>10}")
+            continue
+        print(f"{threshold:>9.2f} {len(accepted) / len(outcomes):>9.3f} "
+              f"{sum(o[1] for o in accepted) / len(accepted):>11.3f} {sum(o[2] for o in accepted) / len(accepted):>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", help="JSONL of {text, intent, parameters}; synthetic parses if omitted")
+    parser.add_argument("--synthetic", type=int, default=5000, help="number of synthetic parses")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    records = read_jsonl(args.data) if args.data else synthetic_records(args.synthetic, random.Random(args.seed))
+    evaluate(records, args.test_fraction, args.thresholds, args.seed)
+
+
+if __name__ == "__main__":
+    main()
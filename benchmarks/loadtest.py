@@ -0,0 +1,236 @@
+# benchmarks/loadtest.py
+"""
+End-to-end load test of the webhook pipeline with every external service
+replaced by a local stand-in (see benchmarks/standins.py): synthetic WhatsApp
+webhooks are posted to the FastAPI `app` in-process at a fixed arrival rate
+(open loop, so a slow bot builds a backlog instead of slowing the sender),
+and each scenario reports p50/p95/p99/max latency and messages per second.
+
+Run from the repository root (needs fakeredis):
+    python -m benchmarks.loadtest                                   # all scenarios
+    python -m benchmarks.loadtest --scenario issues --rate 100 --duration 30
+    python -m benchmarks.loadtest --llm-ms 800 --aps-ms 150 --json results.json
+
+Latencies include the simulated service times, so compare runs made with the
+same stand-in settings. All stand-in users belong to one hub, so the per-hub
+quotas (TENANT_LLM_CONCURRENCY, TENANT_ACC_CONCURRENCY) bound its concurrency. The driver shares the event loop with the app; keep
+the rate below what one core can generate, or run several processes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from benchmarks.standins import (
+    STANDIN_ENVIRONMENT,
+    ExternalAPIs,
+    Latency,
+    MongoStandin,
+    PostgresStandin,
+    Tenant,
+    redis_standin,
+)
+
+# Scenario -> weighted message templates; {person} and {project} are filled per message
+SCENARIOS: Dict[str, List[tuple]] = {
+    "greetings": [(3, "hi"), (1, "hello bot"), (2, "thanks"), (1, "namaste ji")],
+    "issues": [
+        (3, "show open issues for {person} in {project}"),
+        (2, "issues assigned to {person} in {project} due this week"),
+        (1, "closed issues for {person} in {project}"),
+    ],
+    "counts": [(1, "how many open issues for {person} in {project}")],
+    "breakdowns": [(1, "open issues for {person} in {project} by status")],
+    # A handful of fixed questions: after the first of each, parses come from the intent cache
+    "repeat": [(1, "show open issues for {person} in {project}")],
+    "mixed": [
+        (4, "show open issues for {person} in {project}"),
+        (2, "how many open issues for {person} in {project}"),
+        (2, "hi"),
+        (1, "thanks"),
+        (1, "open issues for {person} in {project} by type"),
+    ],
+}
+
+
+def webhook_body(phone: str, text: str, message_id: str) -> Dict[str, Any]:
+    message = {"from": phone, "id": message_id, "timestamp": str(int(time.time())), "type": "text", "text": {"body": text}}
+    value = {"messaging_product": "whatsapp", "metadata": {"phone_number_id": "standin"}, "messages": [message]}
+    return {"object": "whatsapp_business_account", "entry": [{"id": "standin", "changes": [{"field": "messages", "value": value}]}]}
+
+
+def message_factory(scenario: str, tenant: Tenant, rng: random.Random) -> Callable[[int], Dict[str, Any]]:
+    templates = SCENARIOS[scenario]
+    weights = [w for w, _ in templates]
+    users = tenant.users[:5] if scenario == "repeat" else tenant.users
+    projects = tenant.projects[:3] if scenario == "repeat" else tenant.projects
+
+    def make(n: int) -> Dict[str, Any]:
+        _, template = rng.choices(templates, weights)[0]
+        sender = rng.choice(tenant.users)
+        text = template.format(person=rng.choice(users)["first_name"], project=rng.choice(projects)["name"])
+        return webhook_body(sender["phone_number"], text, f"wamid.{scenario}.{n}")
+
+    return make
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def drive(client, make: Callable[[int], Dict[str, Any]], rate: float, duration: float) -> Dict[str, Any]:
+    """Posts rate*duration webhooks on a fixed schedule and measures each response."""
+    loop = asyncio.get_running_loop()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def send(body):
+        started = loop.time()
+        try:
+            response = await client.post("/webhook/", json=body)
+            statuses[response.status_code] += 1
+        except Exception as e:
+            statuses[type(e).__name__] += 1
+        latencies.append(loop.time() - started)
+
+    total = int(rate * duration)
+    start = loop.time()
+    tasks = []
+    for n in range(total):
+        delay = start + n / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(make(n))))
+    send_lag = loop.time() - (start + (total - 1) / rate) if total else 0.0
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+
+    ordered = sorted(latencies)
+    return {
+        "messages": total,
+        "ok": statuses.get(200, 0),
+        "errors": total - statuses.get(200, 0),
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "messages_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 1) if ordered else 0.0,
+        # How far the generator fell behind its schedule; large values mean the rate was not reached
+        "send_lag_ms": round(max(0.0, send_lag) * 1000, 1),
+    }
+
+
+def configure_environment(args):
+    """Settings are read at import time, so this runs before any src module is imported."""
+    for name, value in STANDIN_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_FAKE_LATENCY_MS"] = str(args.llm_ms)
+    os.environ["LLM_FAKE_JITTER_MS"] = str(args.llm_jitter_ms)
+    os.environ["LLM_FAKE_ERROR_RATE"] = str(args.llm_error_rate)
+
+
+def install_standins(args, tenant: Tenant) -> Dict[str, Any]:
+    from src.core import http
+    from src.core.cache import cache
+    from src.repositories import mongodb_repo, postgres_repo
+
+    jitter = args.jitter
+    apis = ExternalAPIs(tenant, Latency(args.aps_ms, args.aps_ms * jitter), Latency(args.graph_ms, args.graph_ms * jitter))
+    postgres = PostgresStandin(tenant, Latency(args.postgres_ms, args.postgres_ms * jitter))
+    mongo = MongoStandin(tenant, Latency(args.mongo_ms, args.mongo_ms * jitter))
+
+    http.use_transport(apis.transport)
+    postgres_repo.AsyncSessionLocal = postgres.session
+    mongodb_repo.get_aps_collection = mongo.collection
+    cache.redis = redis_standin(Latency(args.redis_ms, args.redis_ms * jitter))
+    return {"apis": apis, "postgres": postgres, "mongo": mongo}
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    import httpx
+
+    from main import app
+    from src.integrations.llm_governor import llm_governor
+
+    tenant = Tenant.generate(users=args.users, projects=args.projects, issues_per_project=args.issues_per_project)
+    standins = install_standins(args, tenant)
+    rng = random.Random(args.seed)
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bot", timeout=None) as client:
+        for scenario in scenarios:
+            make = message_factory(scenario, tenant, rng)
+            if args.warmup:
+                await drive(client, make, args.rate, args.warmup)
+            calls_before = Counter(standins["apis"].calls)
+            llm_before = llm_governor.get_stats()["calls"]
+            result = await drive(client, make, args.rate, args.duration)
+            calls = standins["apis"].calls - calls_before
+            result.update({
+                "scenario": scenario,
+                "rate": args.rate,
+                "llm_calls": llm_governor.get_stats()["calls"] - llm_before,
+                "external_calls": dict(calls),
+            })
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def print_result(result: Dict[str, Any]):
+    print(
+        f"{result['scenario']:<11} {result['messages']:>6} msgs  {result['messages_per_second']:>7.1f} msg/s  "
+        f"p50 {result['p50_ms']:>7.1f}  p95 {result['p95_ms']:>7.1f}  p99 {result['p99_ms']:>7.1f}  "
+        f"max {result['max_ms']:>7.1f} ms  errors {result['errors']}  llm {result['llm_calls']}  "
+        f"lag {result['send_lag_ms']:.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end webhook load test against local stand-ins.")
+    parser.add_argument("--scenario", default="all", choices=["all", *SCENARIOS])
+    parser.add_argument("--rate", type=float, default=50.0, help="messages per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--issues-per-project", type=int, default=120)
+    parser.add_argument("--llm-ms", type=float, default=400.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--aps-ms", type=float, default=120.0)
+    parser.add_argument("--graph-ms", type=float, default=80.0)
+    parser.add_argument("--postgres-ms", type=float, default=2.0)
+    parser.add_argument("--mongo-ms", type=float, default=2.0)
+    parser.add_argument("--redis-ms", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.25, help="stand-in jitter as a fraction of each mean")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's INFO logging")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    if not args.verbose:
+        import logging
+        logging.disable(logging.WARNING)
+
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# benchmarks/standins.py
+"""
+In-process stand-ins for every external service the bot talks to, each with
+configurable latency, used by benchmarks/loadtest.py:
+
+- Meta Graph API (messages, media upload) and APS (OAuth, admin projects,
+  HQ user search, issues, issue types, project users) behind one
+  httpx.MockTransport, installed with src.core.http.use_transport();
+- Postgres: a session factory answering the queries in postgres_repo;
+- Mongo: an APS token collection with long-lived tokens (no refreshes);
+- Redis: fakeredis with per-command latency (pip install fakeredis).
+
+Gemini is replaced by the governor's own fake backend (LLM_BACKEND=fake).
+"""
+import asyncio
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+HUB_ID = "b.loadtest-hub"
+# Required settings; they are never used to reach a real service
+STANDIN_ENVIRONMENT = {
+    "POSTGRES_DSN": "postgresql+asyncpg://standin/standin",
+    "REDIS_URL": "redis://standin:6379/0",
+    "GEMINI_API_KEY": "standin",
+    "WHATSAPP_ACCESS_TOKEN": "standin",
+    "PHONE_NUMBER_ID": "standin",
+    "WHATSAPP_VERIFY_TOKEN": "standin",
+    "LLM_BACKEND": "fake",
+}
+FIRST_NAMES = ["Ashrik", "Priya", "Rahul", "Anita", "Vikram", "Meera", "Arjun", "Kavya", "Rohan", "Sneha",
+               "Ishaan", "Divya", "Karan", "Pooja", "Nikhil", "Asha", "Varun", "Neha", "Siddharth", "Tara"]
+LAST_NAMES = ["Mehta", "Sharma", "Iyer", "Nair", "Patel", "Reddy", "Gupta", "Rao", "Das", "Joshi",
+              "Kapoor", "Menon", "Bose", "Pillai", "Shah", "Kulkarni", "Verma", "Singh", "Chopra", "Naidu"]
+PROJECT_WORDS = ["Tower", "Metro", "Airport", "Villas", "Plaza", "Bridge", "Campus", "Harbour"]
+STATUSES = ["open", "closed", "draft", "pending", "in_review", "completed"]
+
+
+@dataclass
+class Latency:
+    """Simulated service time: mean ± uniform jitter, in milliseconds."""
+    mean_ms: float = 0.0
+    jitter_ms: float = 0.0
+
+    async def wait(self):
+        delay = self.mean_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+
+@dataclass
+class Tenant:
+    """Synthetic hub: users with phone numbers, projects and per-project issues."""
+    users: List[Dict[str, str]]
+    projects: List[Dict[str, str]]
+    issues_per_project: int
+    client_id: str = "loadtest-client"
+    client_secret: str = "loadtest-secret"
+    mongodb_uri: str = "mongodb://standin"
+    _issues: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+
+    @classmethod
+    def generate(cls, users: int = 200, projects: int = 50, issues_per_project: int = 120, seed: int = 7) -> "Tenant":
+        rng = random.Random(seed)
+        # Unique letters-only names, so every assignee resolves to exactly one user
+        names = [f"{first} {last}" for last in LAST_NAMES for first in FIRST_NAMES]
+        people = [
+            {"autodesk_id": f"ADSK{i:05d}", "first_name": names[i % len(names)] + ("" if i < len(names) else f" {chr(65 + i // len(names))}"),
+             "phone_number": f"9190000{i:05d}"}
+            for i in range(users)
+        ]
+        sites = [
+            {"id": f"b.project-{i:04d}", "name": f"{PROJECT_WORDS[i % len(PROJECT_WORDS)]} {chr(65 + i % 26)}{i}"}
+            for i in range(projects)
+        ]
+        tenant = cls(people, sites, issues_per_project)
+        for project in sites:
+            tenant._issues[project["id"]] = [
+                {
+                    "id": f"{project['id']}-{n}",
+                    "displayId": n + 1,
+                    "title": f"Issue {n + 1} at {project['name']}",
+                    "status": rng.choice(STATUSES),
+                    "dueDate": (datetime(2026, 1, 1) + timedelta(days=rng.randrange(365))).date().isoformat(),
+                    "assignedTo": rng.choice(people)["autodesk_id"],
+                    "issueTypeId": rng.choice(["type-safety", "type-quality", "type-design"]),
+                }
+                for n in range(issues_per_project)
+            ]
+        return tenant
+
+    def issues(self, project_id: str) -> List[Dict[str, Any]]:
+        return self._issues.get(project_id, [])
+
+
+class ExternalAPIs:
+    """Routes Graph API and APS requests to canned responses after simulated latency."""
+
+    def __init__(self, tenant: Tenant, aps_latency: Latency, graph_latency: Latency):
+        self.tenant = tenant
+        self.aps_latency = aps_latency
+        self.graph_latency = graph_latency
+        self.calls: Counter = Counter()
+        self.transport = httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        host, path = request.url.host, request.url.path
+        params = {k: v[0] for k, v in parse_qs(urlparse(str(request.url)).query).items()}
+        if host == "graph.facebook.com":
+            await self.graph_latency.wait()
+            if path.endswith("/media"):
+                self.calls["graph media"] += 1
+                return httpx.Response(200, json={"id": "media-standin"})
+            self.calls["graph messages"] += 1
+            return httpx.Response(200, json={"messages": [{"id": "wamid.standin"}]})
+
+        await self.aps_latency.wait()
+        if path == "/authentication/v2/token":
+            self.calls["aps token"] += 1
+            return httpx.Response(200, json={"access_token": "two-legged-standin", "expires_in": 3600})
+        if re.fullmatch(r"/construction/admin/v1/accounts/[^/]+/projects", path):
+            self.calls["aps projects"] += 1
+            wanted = params.get("filter[name]", "").casefold()
+            results = [p for p in self.tenant.projects if wanted in p["name"].casefold()]
+            return httpx.Response(200, json={"results": results, "pagination": {"totalResults": len(results)}})
+        if re.fullmatch(r"/hq/v1/accounts/[^/]+/users/search", path):
+            self.calls["aps user search"] += 1
+            wanted = params.get("name", "").casefold()
+            users = [
+                {"uid": u["autodesk_id"], "name": u["first_name"], "email": f"{u['first_name'].lower()}@example.com"}
+                for u in self.tenant.users if u["first_name"].casefold() == wanted
+            ]
+            return httpx.Response(200, json=users)
+        if match := re.fullmatch(r"/construction/issues/v1/projects/([^/]+)/issues", path):
+            self.calls["aps issues"] += 1
+            return self._issues(match.group(1), params)
+        if path.endswith("/issue-types"):
+            self.calls["aps issue types"] += 1
+            types = [{"id": f"type-{t}", "title": t.title(), "subtypes": []} for t in ("safety", "quality", "design")]
+            return httpx.Response(200, json={"results": types, "pagination": {"totalResults": len(types)}})
+        if re.fullmatch(r"/construction/admin/v1/projects/[^/]+/users", path):
+            self.calls["aps project users"] += 1
+            users = [{"autodeskId": u["autodesk_id"], "name": u["first_name"]} for u in self.tenant.users]
+            return httpx.Response(200, json={"results": users, "pagination": {"totalResults": len(users)}})
+        self.calls["unrouted"] += 1
+        return httpx.Response(404, json={"error": f"No stand-in for {request.method} {path}"})
+
+    def _issues(self, project_id: str, params: Dict[str, str]) -> httpx.Response:
+        rows = self.tenant.issues(project_id)
+        if assignee := params.get("filter[assignedTo]"):
+            rows = [r for r in rows if r["assignedTo"] == assignee]
+        if statuses := params.get("filter[status]"):
+            wanted = set(statuses.split(","))
+            rows = [r for r in rows if r["status"] in wanted]
+        offset, limit = int(params.get("offset", 0)), int(params.get("limit", 100))
+        return httpx.Response(200, json={"results": rows[offset:offset + limit], "pagination": {"totalResults": len(rows)}})
+
+
+class _Result:
+    def __init__(self, rows: List[tuple]):
+        self.rows = rows
+
+    def fetchone(self) -> Optional[tuple]:
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self) -> List[tuple]:
+        return self.rows
+
+    def scalar(self) -> Any:
+        return self.rows[0][0] if self.rows else None
+
+    def __aiter__(self):
+        async def rows():
+            for row in self.rows:
+                yield row
+        return rows()
+
+
+class PostgresStandin:
+    """Answers postgres_repo's queries from the tenant; use `session` as AsyncSessionLocal."""
+
+    def __init__(self, tenant: Tenant, latency: Latency):
+        self.latency = latency
+        self.queries = 0
+        config = (tenant.mongodb_uri, tenant.client_id, tenant.client_secret)
+        self.by_phone = {u["phone_number"]: (u["autodesk_id"], u["first_name"], HUB_ID, u["phone_number"], *config)
+                         for u in tenant.users}
+        self.config = config
+
+    def session(self) -> "PostgresStandin":
+        return self
+
+    async def __aenter__(self) -> "PostgresStandin":
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def _rows(self, statement: Any, params: Optional[Dict[str, Any]]) -> List[tuple]:
+        sql = str(getattr(statement, "text", statement)).lower()
+        params = params or {}
+        if "phones" in params:
+            return [self.by_phone[p] for p in params["phones"] if p in self.by_phone]
+        if "phone" in params:
+            row = self.by_phone.get(params["phone"])
+            return [row[:3] if "company_configs" not in sql else row] if row else []
+        if "hub_id" in params:
+            return [self.config]
+        if "company_configs" in sql and "limit" in params:
+            return [(HUB_ID, *self.config)]
+        if "count(" in sql:
+            return [(len(self.by_phone),)]
+        return [(phone,) for phone in self.by_phone]
+
+    async def execute(self, statement: Any, params: Optional[Dict[str, Any]] = None) -> _Result:
+        self.queries += 1
+        await self.latency.wait()
+        return _Result(self._rows(statement, params))
+
+    async def stream(self, statement: Any, params: Optional[Dict[str, Any]] = None) -> _Result:
+        return await self.execute(statement, params)
+
+
+class MongoStandin:
+    """APS token collection; every user has a token valid for another day."""
+
+    def __init__(self, tenant: Tenant, latency: Latency):
+        self.latency = latency
+        expires_at = (datetime.now(timezone.utc) + timedelta(days=1)).replace(tzinfo=None).isoformat()
+        self.docs = {
+            u["autodesk_id"]: {"autodesk_id": u["autodesk_id"], "access_token": f"three-legged-{u['autodesk_id']}",
+                               "refresh_token": "refresh", "expires_at": expires_at, "status": "active"}
+            for u in tenant.users
+        }
+
+    async def collection(self, mongo_uri: str) -> "MongoStandin":
+        return self
+
+    async def find_one(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> Optional[Dict]:
+        await self.latency.wait()
+        doc = self.docs.get(query.get("autodesk_id"))
+        return dict(doc) if doc else None
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        await self.latency.wait()
+        self.docs.setdefault(query["autodesk_id"], {}).update(update.get("$set", {}))
+
+
+def redis_standin(latency: Latency):
+    """fakeredis client adding `latency` to every command and pipeline."""
+    from fakeredis import aioredis
+
+    class LatencyRedis(aioredis.FakeRedis):
+        async def execute_command(self, *args, **options):
+            await latency.wait()
+            return await super().execute_command(*args, **options)
+
+        def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None):
+            pipe = super().pipeline(transaction, shard_hint)
+            execute = pipe.execute
+
+            async def delayed_execute(*args, **kwargs):
+                await latency.wait()
+                return await execute(*args, **kwargs)
+
+            pipe.execute = delayed_execute
+            return pipe
+
+    return LatencyRedis()
@@ -1,21 +1,70 @@
 # src/main.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from src.api.webhook_router import webhook_router
+from src.api.metrics_router import metrics_router
+from src.api.admin_router import admin_router
+from src.api.health_router import health_router
+from src.core.config import settings
+from src.core.lifecycle import READY, lifecycle
+from src.services import digest_service, warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Readiness flips to 503 on SIGTERM, before the server stops accepting connections
+    lifecycle.install_signal_handlers()
+    # Warm-up runs in the background so /health/live answers at once; /health/ready waits for it
+    warming = None
+    if settings.WARMUP_ENABLED:
+        warming = asyncio.create_task(lifecycle.warm(warmup.warm_up, settings.WARMUP_TIMEOUT_SECONDS,
+                                                     ready_on_failure=settings.WARMUP_READY_ON_FAILURE))
+    else:
+        lifecycle.state = READY
+    digest = asyncio.create_task(digest_service.run_scheduler()) if settings.DIGEST_ENABLED else None
+    try:
+        yield
+    finally:
+        if warming and not warming.done():
+            warming.cancel()
+        if digest:
+            # A digest already being sent is a lifecycle job, so the drain below waits for it
+            digest.cancel()
+        # The server has already waited for in-flight requests; this spends what is left of the budget
+        await lifecycle.drain(settings.SHUTDOWN_DRAIN_SECONDS)
+        try:
+            await warmup.shutdown()
+        except Exception as e:
+            logging.error(f"Error closing pools on shutdown: {e}")
+
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Autodesk WhatsApp Integration",
         description="FastAPI backend for WhatsApp + Autodesk chatbot",
         version="1.0.0",
+        lifespan=lifespan,
     )
 
     # Register webhook route
     app.include_router(webhook_router, prefix="/webhook")
+    # Prometheus scrape endpoint
+    app.include_router(metrics_router)
+    # Liveness / readiness probes
+    app.include_router(health_router, prefix="/health")
+    # Token-protected diagnostics (request profiles) and digest management
+    app.include_router(admin_router, prefix="/admin")
 
     return app
 
 app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True)
+    # In-flight webhooks get the drain budget before connections are closed; the lifespan
+    # drain then only uses what is left of it (both count from the signal)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True,
+                timeout_graceful_shutdown=int(settings.SHUTDOWN_DRAIN_SECONDS))
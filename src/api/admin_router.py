@@ -0,0 +1,72 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from src.core.config import settings
+from src.core.lifecycle import lifecycle
+from src.core.profiler import get_profile, list_profiles
+from src.core.schemas import DigestSubscription
+from src.repositories import postgres_repo
+from src.services import digest_service
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """True when ADMIN_TOKEN is configured and `token` matches it."""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+admin_router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@admin_router.get("/profiles")
+async def profiles(limit: int = Query(50, ge=1, le=1000)):
+    """Most recent request profiles, newest first."""
+    return {"profiles": await list_profiles(limit)}
+
+
+@admin_router.get("/profiles/{profile_id}")
+async def profile_detail(profile_id: str):
+    """Full profile: summary, spans and collapsed stacks."""
+    document = await get_profile(profile_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return document
+
+
+@admin_router.get("/profiles/{profile_id}/collapsed")
+async def profile_collapsed(profile_id: str):
+    """Collapsed stacks only, ready for flamegraph.pl, inferno or speedscope."""
+    document = await get_profile(profile_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(document["collapsed"])
+
+
+@admin_router.post("/digest/subscriptions")
+async def digest_subscribe(subscription: DigestSubscription):
+    """Subscribes a user to the daily digest of a project."""
+    await postgres_repo.ensure_digest_subscriptions_table()
+    created = await postgres_repo.subscribe_digest(subscription.phone_number, subscription.project_id, subscription.project_name)
+    return {"subscribed": True, "created": created}
+
+
+@admin_router.delete("/digest/subscriptions/{phone_number}")
+async def digest_unsubscribe(phone_number: str, project_id: Optional[str] = None):
+    """Removes one project subscription, or all of the user's without project_id."""
+    await postgres_repo.ensure_digest_subscriptions_table()
+    return {"removed": await postgres_repo.unsubscribe_digest(phone_number, project_id)}
+
+
+@admin_router.post("/digest/run")
+async def digest_run():
+    """Sends today's digest now, regardless of the schedule or the daily lock."""
+    await postgres_repo.ensure_digest_subscriptions_table()
+    return await lifecycle.spawn(digest_service.run_digest(), name="digest-manual")
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from src.core.lifecycle import lifecycle
+
+health_router = APIRouter()
+
+
+@health_router.get("/live")
+async def live():
+    """The process is up and serving HTTP (it may still be warming up)."""
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+async def ready():
+    """200 once warm-up has finished, 503 while starting (or after a failed warm-up that may not serve cold) or draining."""
+    return JSONResponse(content=lifecycle.status(), status_code=200 if lifecycle.ready else 503)
@@ -1,6 +1,12 @@
+import random
+from typing import Optional
 from fastapi import APIRouter, Request, Query, HTTPException
 from fastapi.responses import JSONResponse, PlainTextResponse
+from src.api.admin_router import is_admin_token
 from src.core.config import settings
+from src.core.lifecycle import lifecycle
+from src.core.metrics import track
+from src.core.profiler import profile
 from src.handlers.webhook_handler import handle_incoming_webhook
 
 webhook_router = APIRouter()
@@ -16,7 +22,34 @@ async def verify_webhook(
     raise HTTPException(status_code=403, detail="Forbidden")
 
 
+def _sender(body: dict) -> Optional[str]:
+    value = body.get("entry", [{}])[0].get("changes", [{}])[0].get("value", {})
+    messages = value.get("messages") or [{}]
+    return messages[0].get("from")
+
+
+def _profile_reason(request: Request) -> Optional[str]:
+    """
+    Why this webhook should be profiled, or None (the common case, decided
+    without I/O). Senders of PROFILE_HUB_IDS are picked after admission, in
+    handle_incoming_webhook.
+    """
+    if request.headers.get("x-profile") == "1" and is_admin_token(request.headers.get("x-admin-token")):
+        return "header"
+    if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
 @webhook_router.post("/")
 async def receive_message(request: Request):
-    body = await request.json()
-    return await handle_incoming_webhook(body)
\ No newline at end of file
+    if not lifecycle.accepting:
+        # Shutting down: Meta redelivers non-2xx webhooks, reaching a worker that is still up
+        return JSONResponse(content={"message": "Shutting down"}, status_code=503)
+    with lifecycle.work(), track("webhook"):
+        body = await request.json()
+        reason = _profile_reason(request)
+        if reason is None:
+            return await handle_incoming_webhook(body)
+        async with profile("webhook", reason, {"sender": _sender(body)}):
+            return await handle_incoming_webhook(body)
@@ -0,0 +1,57 @@
+# src/core/bloom.py
+import hashlib
+import math
+import struct
+from typing import Iterable, Optional
+
+_HEADER = struct.Struct(">QB")
+
+
+class BloomFilter:
+    """
+    A compact probabilistic set: `item in bloom` is never False for an added
+    item, and True for a non-member with probability ~fp_rate.
+    Uses double hashing over a single 128-bit BLAKE2b digest.
+    """
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None):
+        self.num_bits = max(num_bits, 8)
+        self.num_hashes = max(num_hashes, 1)
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float = 0.001) -> "BloomFilter":
+        """Sizes the filter for `capacity` items at the given false-positive rate."""
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def update(self, items: Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.num_bits, self.num_hashes) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        num_bits, num_hashes = _HEADER.unpack_from(data)
+        bits = bytearray(data[_HEADER.size:])
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError("Bloom filter payload does not match its header")
+        return cls(num_bits, num_hashes, bits)
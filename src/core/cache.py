@@ -1,13 +1,187 @@
-import pickle
+import asyncio
+import os
 import logging
-from typing import Any, Optional
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import redis.asyncio as redis
+from src.core.codecs import CodecError, Serializer
 from src.core.config import settings
+from src.core.metrics import observe_dependency, register_stats
+
+
+class InstrumentedRedis(redis.Redis):
+    """
+    redis.asyncio.Redis that records the latency of every command and pipeline.
+    A cancelled call is reported to `breaker`, so a cancelled half-open probe
+    does not keep the breaker waiting for an outcome that never comes.
+    """
+    breaker: Optional["CircuitBreaker"] = None
+
+    def _cancelled(self):
+        if self.breaker is not None:
+            self.breaker.release_probe()
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        except asyncio.CancelledError:
+            self._cancelled()
+            raise
+        finally:
+            observe_dependency("redis", str(args[0]).lower(), time.perf_counter() - started)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        async def timed_execute(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await execute(*args, **kwargs)
+            except asyncio.CancelledError:
+                self._cancelled()
+                raise
+            finally:
+                observe_dependency("redis", "pipeline", time.perf_counter() - started)
+
+        pipe.execute = timed_execute
+        return pipe
+
+
+class LocalCache:
+    """
+    A small in-process LRU cache with per-entry expiry.
+    Used as the L1 tier in front of Redis and as the fallback store while Redis is unavailable.
+    """
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Returns (found, value). Expired entries are dropped on access."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def items(self) -> Iterator[Tuple[str, Any, float]]:
+        """Yields (key, value, remaining_ttl) for live entries."""
+        now = time.monotonic()
+        for key, (expires_at, value) in list(self._entries.items()):
+            if expires_at > now:
+                yield key, value, expires_at - now
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive Redis failures. After `failure_threshold` of them the
+    breaker opens and calls are short-circuited for `reset_timeout` seconds;
+    then a single probe call is let through (half-open) and its outcome
+    closes or re-opens the breaker. A probe that is cancelled, or that has not
+    reported back within `reset_timeout`, is replaced by the next call.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.short_circuited = 0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and (not self._probe_in_flight or now - self._probe_started >= self.reset_timeout):
+            self._probe_in_flight = True
+            self._probe_started = now
+            return True
+        self.short_circuited += 1
+        return False
+
+    def release_probe(self):
+        """Forgets a probe that ended without an outcome (e.g. cancelled)."""
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self) -> bool:
+        """Returns True when this success closed a previously open breaker."""
+        recovered = self.state != self.CLOSED
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+        return recovered
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            if self.state == self.CLOSED:
+                self.trips += 1
+                logging.error(f"Redis circuit breaker OPEN after {self.failures} consecutive failures.")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+# Fallback store entry kinds
+_VALUE, _HASH, _RAW = "v", "h", "r"
+
+# Deletes KEYS[1] only while it still holds ARGV[1], atomically
+_DELETE_IF_EQUAL = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
 
 class CacheClient:
     """
     An asynchronous Redis cache client that handles connection pooling and data serialization.
+
+    When the L1 tier is enabled, keys in the configured namespaces are also kept
+    in an in-process LRU. Writes and deletes are broadcast over Redis pub/sub so
+    other workers drop their L1 copy. Values served from L1 are shared objects,
+    so callers must not mutate them in place.
+
+    Redis calls go through a circuit breaker. While it is open (or when a call
+    fails) reads and writes are served from a bounded in-process fallback store,
+    so requests do not each wait for a timeout and sessions survive the incident.
+    Writes made while degraded are replayed to Redis once it recovers.
     """
     def __init__(self, redis_url: str):
         """
@@ -16,19 +190,119 @@ class CacheClient:
         try:
             # Create a connection pool. This is more efficient than creating
             # a new connection for every request.
-            self.redis = redis.from_url(redis_url, encoding="utf-8", decode_responses=False)
+            self.redis = InstrumentedRedis.from_url(
+                redis_url,
+                encoding="utf-8",
+                decode_responses=False,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            )
             logging.info("Redis client initialized successfully.")
         except Exception as e:
             logging.error(f"Failed to initialize Redis client: {e}")
             self.redis = None
 
+        self.serializer = Serializer(
+            codec=settings.CACHE_CODEC,
+            compression_threshold=settings.CACHE_COMPRESSION_THRESHOLD,
+            schema_version=settings.CACHE_SCHEMA_VERSION,
+            allow_pickle=settings.CACHE_ALLOW_PICKLE,
+        )
+        self.l1 = LocalCache(settings.CACHE_L1_MAX_ITEMS) if settings.CACHE_L1_ENABLED else None
+        self.l1_ttls: Dict[str, int] = dict(settings.CACHE_L1_NAMESPACE_TTLS)
+        self.invalidation_channel = settings.CACHE_INVALIDATION_CHANNEL
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._listener_task: Optional[asyncio.Task] = None
+        self.stats = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0, "fallback_hits": 0, "fallback_misses": 0}
+
+        self.breaker = CircuitBreaker(settings.CACHE_BREAKER_FAILURE_THRESHOLD, settings.CACHE_BREAKER_RESET_SECONDS)
+        if self.redis is not None:
+            self.redis.breaker = self.breaker
+        self.fallback = LocalCache(settings.CACHE_FALLBACK_MAX_ITEMS)
+        self._replay_task: Optional[asyncio.Task] = None
+
+    def _l1_ttl(self, key: str, expiry_time: Optional[int] = None) -> int:
+        """Returns the L1 TTL for a key, or 0 if its namespace is not cached in L1."""
+        if self.l1 is None:
+            return 0
+        ttl = self.l1_ttls.get(key.split(":", 1)[0], 0)
+        if expiry_time:
+            ttl = min(ttl, expiry_time)
+        return ttl
+
+    # --- circuit breaker / fallback helpers ---------------------------------
+
+    def _redis_allowed(self) -> bool:
+        """True if a Redis call may be attempted right now."""
+        return self.redis is not None and self.breaker.allow()
+
+    def _on_success(self):
+        if self.breaker.record_success():
+            logging.info("Redis circuit breaker CLOSED, replaying degraded-mode writes.")
+            self._schedule_replay()
+
+    def _on_failure(self, operation: str, key: str, error: Exception):
+        self.breaker.record_failure()
+        logging.error(f"Redis {operation} failed for key '{key}': {error}")
+
+    def _fallback_ttl(self, expiry_time: Optional[int]) -> int:
+        return expiry_time or settings.CACHE_FALLBACK_DEFAULT_TTL
+
+    def _fallback_get(self, key: str, kind: str = _VALUE) -> Tuple[bool, Any]:
+        found, entry = self.fallback.get(key)
+        if found and entry[0] == kind:
+            self.stats["fallback_hits"] += 1
+            return True, entry[1]
+        self.stats["fallback_misses"] += 1
+        return False, None
+
+    def _fallback_set(self, key: str, value: Any, expiry_time: Optional[int], kind: str = _VALUE):
+        self.fallback.set(key, (kind, value), self._fallback_ttl(expiry_time))
+
+    def _schedule_replay(self):
+        if not len(self.fallback) or (self._replay_task and not self._replay_task.done()):
+            return
+        try:
+            self._replay_task = asyncio.get_running_loop().create_task(self._replay_fallback())
+        except RuntimeError:
+            pass
+
+    async def _replay_fallback(self):
+        """
+        Writes entries stored while Redis was unavailable back to Redis, without
+        overwriting keys that other workers wrote in the meantime.
+        """
+        entries = list(self.fallback.items())
+        self.fallback.clear()
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, (kind, value), remaining in entries:
+                ttl = max(int(remaining), 1)
+                if kind == _VALUE:
+                    pipe.set(key, self.serializer.dumps(value), ex=ttl, nx=True)
+                elif kind == _RAW:
+                    pipe.set(key, value, ex=ttl, nx=True)
+                elif kind == _HASH and value:
+                    for name, field_value in value.items():
+                        pipe.hsetnx(key, name, self.serializer.dumps(field_value))
+                    pipe.expire(key, ttl)
+            await pipe.execute()
+            logging.info(f"Replayed {len(entries)} degraded-mode cache entries to Redis.")
+        except Exception as e:
+            logging.error(f"Failed to replay degraded-mode cache entries: {e}")
+
+    # --- plain values --------------------------------------------------------
+
     async def ping(self) -> bool:
         """Checks if the connection to the Redis server is alive."""
         if not self.redis:
             return False
         try:
-            return await self.redis.ping()
+            result = await self.redis.ping()
+            self._on_success()
+            return result
         except Exception as e:
+            self.breaker.record_failure()
             logging.error(f"Redis ping failed: {e}")
             return False
 
@@ -38,53 +312,516 @@ class CacheClient:
 
         Args:
             key (str): The key to set.
-            value (Any): The value to store. It will be serialized using pickle.
+            value (Any): The value to store. It will be serialized with the configured codec.
+                Raises TypeError if it cannot be.
             expiry_time (int, optional): Expiry time in seconds. Defaults to 300 (5 minutes).
         """
-        if not self.redis:
-            return False
+        # Serialized up front: an unserializable value is the caller's bug (TypeError),
+        # not a Redis failure to count against the breaker and hide in the fallback store
+        serialized_value = self.serializer.dumps(value)
+        l1_ttl = self._l1_ttl(key, expiry_time)
+        if l1_ttl:
+            self.l1.set(key, value, l1_ttl)
+        if not self._redis_allowed():
+            self._fallback_set(key, value, expiry_time)
+            return True
         try:
-            # Serialize the Python object to bytes using pickle before storing
-            serialized_value = pickle.dumps(value)
             await self.redis.set(key, serialized_value, ex=expiry_time)
+            self._on_success()
+            if l1_ttl:
+                await self._publish_invalidation(key)
             return True
         except Exception as e:
-            logging.error(f"Redis SET failed for key '{key}': {e}")
-            return False
+            self._on_failure("SET", key, e)
+            self._fallback_set(key, value, expiry_time)
+            return True
 
-    async def get(self, key: str) -> Any:
+    async def set_if_absent(self, key: str, value: Any, expiry_time: Optional[int] = None, px: Optional[int] = None) -> Optional[bool]:
         """
-        Gets a value from the cache by key.
+        Sets a key only if it does not exist (SET NX), e.g. for short-lived locks.
+        Returns True if set, False if the key already existed, None if Redis is unavailable.
         """
-        if not self.redis:
+        if not self._redis_allowed():
             return None
         try:
-            # Retrieve the value as bytes
-            cached_value = await self.redis.get(key)
-            if cached_value:
-                # Deserialize the bytes back into a Python object
-                return pickle.loads(cached_value)
+            result = await self.redis.set(key, self.serializer.dumps(value), ex=expiry_time, px=px, nx=True)
+            self._on_success()
+            return bool(result)
+        except Exception as e:
+            self._on_failure("SET NX", key, e)
             return None
+
+    async def delete_if_equal(self, key: str, value: Any) -> Optional[bool]:
+        """
+        Deletes a key only if it still holds `value`, e.g. to release a lock
+        taken with set_if_absent only while it is still ours. Returns True if
+        deleted, False if the key held something else (or had expired), None if
+        Redis is unavailable.
+        """
+        if not self._redis_allowed():
+            return None
+        try:
+            result = await self.redis.eval(_DELETE_IF_EQUAL, 1, key, self.serializer.dumps(value))
+            self._on_success()
+            return bool(result)
         except Exception as e:
-            logging.error(f"Redis GET failed for key '{key}': {e}")
+            self._on_failure("DELETE IF EQUAL", key, e)
             return None
 
+    async def get(self, key: str) -> Any:
+        """
+        Gets a value from the cache by key, checking the L1 tier first.
+        """
+        l1_ttl = self._l1_ttl(key)
+        if l1_ttl:
+            self._ensure_invalidation_listener()
+            found, value = self.l1.get(key)
+            if found:
+                self.stats["l1_hits"] += 1
+                return value
+            self.stats["l1_misses"] += 1
+
+        if not self._redis_allowed():
+            return self._fallback_get(key)[1]
+        try:
+            # Retrieve the value as bytes
+            cached_value = await self.redis.get(key)
+            self._on_success()
+        except Exception as e:
+            self._on_failure("GET", key, e)
+            return self._fallback_get(key)[1]
+        found, value = self._decode(key, cached_value)
+        if not found and len(self.fallback):
+            # Degraded-mode writes may not have been replayed to Redis yet
+            return self._fallback_get(key)[1]
+        if found and l1_ttl:
+            self.l1.set(key, value, l1_ttl)
+        return value
+
+    def _decode(self, key: str, cached_value: Optional[bytes]) -> Tuple[bool, Any]:
+        """Deserializes a raw Redis value and updates the L2 counters. Returns (found, value)."""
+        if not cached_value:
+            self.stats["l2_misses"] += 1
+            return False, None
+        try:
+            value = self.serializer.loads(cached_value)
+        except CodecError as e:
+            # Legacy/stale/foreign entries are treated as a miss and rewritten by the caller.
+            logging.warning(f"Ignoring undecodable cache value for key '{key}': {e}")
+            self.stats["l2_misses"] += 1
+            return False, None
+        self.stats["l2_hits"] += 1
+        return True, value
+
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Gets raw bytes stored with set_raw, bypassing the codec layer and L1."""
+        if not self._redis_allowed():
+            return self._fallback_get(key, _RAW)[1]
+        try:
+            value = await self.redis.get(key)
+            self._on_success()
+            return value
+        except Exception as e:
+            self._on_failure("GET", key, e)
+            return self._fallback_get(key, _RAW)[1]
+
+    async def set_raw(self, key: str, value: bytes, expiry_time: Optional[int] = None) -> bool:
+        """Stores raw bytes (e.g. a serialized Bloom filter) without codec framing."""
+        if not self._redis_allowed():
+            self._fallback_set(key, value, expiry_time, _RAW)
+            return True
+        try:
+            await self.redis.set(key, value, ex=expiry_time)
+            self._on_success()
+            return True
+        except Exception as e:
+            self._on_failure("SET", key, e)
+            self._fallback_set(key, value, expiry_time, _RAW)
+            return True
+
+    async def get_and_touch(self, key: str, expiry_time: int = 300) -> Any:
+        """
+        Gets a value and resets its expiry in a single round trip (Redis GETEX).
+        Intended for sliding-expiry keys such as sessions; bypasses the L1 tier.
+        """
+        if self._redis_allowed():
+            try:
+                cached_value = await self.redis.getex(key, ex=expiry_time)
+                self._on_success()
+                found, value = self._decode(key, cached_value)
+                if found or not len(self.fallback):
+                    return value
+            except Exception as e:
+                self._on_failure("GETEX", key, e)
+        found, value = self._fallback_get(key)
+        if found:
+            self._fallback_set(key, value, expiry_time)
+        return value
+
+    # --- hashes --------------------------------------------------------------
+
+    async def hset_fields(self, key: str, fields: Dict[str, Any], expiry_time: Optional[int] = 300, replace: bool = False) -> bool:
+        """
+        Writes individual hash fields (each encoded separately) and resets the key's
+        expiry in one MULTI/EXEC. With replace=True the existing hash is dropped first.
+        """
+        if self._redis_allowed():
+            try:
+                pipe = self.redis.pipeline(transaction=True)
+                if replace:
+                    pipe.delete(key)
+                if fields:
+                    pipe.hset(key, mapping={name: self.serializer.dumps(value) for name, value in fields.items()})
+                if expiry_time:
+                    pipe.expire(key, expiry_time)
+                await pipe.execute()
+                self._on_success()
+                return True
+            except Exception as e:
+                self._on_failure("HSET", key, e)
+        found, current = self._fallback_get(key, _HASH)
+        merged = {} if replace or not found else dict(current)
+        merged.update(fields)
+        self._fallback_set(key, merged, expiry_time, _HASH)
+        return True
+
+    async def hget_fields(self, key: str, fields: Optional[List[str]] = None, expiry_time: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Reads selected hash fields (or all of them when fields is None), optionally
+        resetting the key's expiry in the same MULTI/EXEC. Missing fields are omitted.
+        """
+        if self._redis_allowed():
+            try:
+                pipe = self.redis.pipeline(transaction=True)
+                if fields is None:
+                    pipe.hgetall(key)
+                else:
+                    pipe.hmget(key, fields)
+                if expiry_time:
+                    pipe.expire(key, expiry_time)
+                raw = (await pipe.execute())[0]
+                self._on_success()
+                if fields is not None:
+                    raw = dict(zip(fields, raw))
+                result = {}
+                for name, value in raw.items():
+                    if isinstance(name, bytes):
+                        name = name.decode("utf-8")
+                    found, decoded = self._decode(f"{key}#{name}", value)
+                    if found:
+                        result[name] = decoded
+                if result or not len(self.fallback):
+                    return result
+            except Exception as e:
+                self._on_failure("HGET", key, e)
+        found, current = self._fallback_get(key, _HASH)
+        if not found:
+            return {}
+        if expiry_time:
+            self._fallback_set(key, current, expiry_time, _HASH)
+        return {k: v for k, v in current.items() if fields is None or k in fields}
+
+    async def hdel_fields(self, key: str, fields: List[str]) -> bool:
+        """Deletes individual hash fields."""
+        if not fields:
+            return False
+        found, current = self._fallback_get(key, _HASH)
+        if found:
+            for name in fields:
+                current.pop(name, None)
+        if not self._redis_allowed():
+            return found
+        try:
+            await self.redis.hdel(key, *fields)
+            self._on_success()
+            return True
+        except Exception as e:
+            self._on_failure("HDEL", key, e)
+            return found
+
+    # --- lists ---------------------------------------------------------------
+
+    async def push_capped(self, key: str, value: Any, max_length: int) -> bool:
+        """
+        Prepends a value to a list and trims it to the newest `max_length` entries
+        in one MULTI/EXEC. Best effort: nothing is buffered while Redis is unavailable.
+        """
+        if not self._redis_allowed():
+            return False
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.lpush(key, self.serializer.dumps(value))
+            pipe.ltrim(key, 0, max_length - 1)
+            await pipe.execute()
+            self._on_success()
+            return True
+        except Exception as e:
+            self._on_failure("LPUSH", key, e)
+            return False
+
+    async def list_range(self, key: str, start: int = 0, end: int = -1) -> List[Any]:
+        """Returns decoded list entries from `start` to `end` (inclusive), newest first."""
+        if not self._redis_allowed():
+            return []
+        try:
+            raw_values = await self.redis.lrange(key, start, end)
+            self._on_success()
+        except Exception as e:
+            self._on_failure("LRANGE", key, e)
+            return []
+        values = []
+        for raw in raw_values:
+            found, value = self._decode(key, raw)
+            if found:
+                values.append(value)
+        return values
+
+    # --- multi-key -----------------------------------------------------------
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """
+        Gets several values in one round trip. Returns a list aligned with `keys`,
+        with None for missing keys. L1 hits are served locally.
+        """
+        results: List[Any] = [None] * len(keys)
+        pending: List[int] = []
+        for index, key in enumerate(keys):
+            if self._l1_ttl(key):
+                self._ensure_invalidation_listener()
+                found, value = self.l1.get(key)
+                if found:
+                    self.stats["l1_hits"] += 1
+                    results[index] = value
+                    continue
+                self.stats["l1_misses"] += 1
+            pending.append(index)
+
+        if not pending:
+            return results
+        if self._redis_allowed():
+            try:
+                raw_values = await self.redis.mget([keys[i] for i in pending])
+                self._on_success()
+                for index, raw in zip(pending, raw_values):
+                    key = keys[index]
+                    found, value = self._decode(key, raw)
+                    if found:
+                        results[index] = value
+                        l1_ttl = self._l1_ttl(key)
+                        if l1_ttl:
+                            self.l1.set(key, value, l1_ttl)
+                    elif len(self.fallback):
+                        # Degraded-mode writes may not have been replayed to Redis yet
+                        results[index] = self._fallback_get(key)[1]
+                return results
+            except Exception as e:
+                self._on_failure("MGET", f"<{len(pending)} keys>", e)
+        for index in pending:
+            results[index] = self._fallback_get(keys[index])[1]
+        return results
+
+    async def mset(self, mapping: Dict[str, Any], expiry_time: Optional[int] = 300) -> bool:
+        """
+        Sets several key-value pairs, all with the same expiry, in one pipelined round trip.
+        """
+        if not mapping:
+            return True
+        async with self.batch() as batch:
+            for key, value in mapping.items():
+                batch.set(key, value, expiry_time)
+        return batch.succeeded
+
+    def batch(self) -> "CacheBatch":
+        """
+        Returns a context manager that queues writes and sends them to Redis as a
+        single pipeline when the block exits:
+
+            async with cache.batch() as batch:
+                batch.set("a", 1)
+                batch.delete("b")
+        """
+        return CacheBatch(self)
+
     async def delete(self, key: str) -> bool:
         """Deletes a key from the cache."""
-        if not self.redis:
-            return False
+        if self._l1_ttl(key):
+            self.l1.delete(key)
+        self.fallback.delete(key)
+        if not self._redis_allowed():
+            return True
         try:
             await self.redis.delete(key)
+            self._on_success()
+            if self._l1_ttl(key):
+                await self._publish_invalidation(key)
             return True
         except Exception as e:
-            logging.error(f"Redis DELETE failed for key '{key}': {e}")
+            self._on_failure("DELETE", key, e)
             return False
 
+    # --- L1 invalidation -----------------------------------------------------
+
+    async def _publish_invalidation(self, key: str):
+        """Tells the other workers to drop their L1 copy of a key."""
+        try:
+            await self.redis.publish(self.invalidation_channel, f"{self.worker_id}|{key}")
+        except Exception as e:
+            logging.warning(f"Failed to publish cache invalidation for '{key}': {e}")
+
+    def _ensure_invalidation_listener(self):
+        """Starts the pub/sub listener on first use from inside a running event loop."""
+        if self.redis is None or (self._listener_task and not self._listener_task.done()):
+            return
+        try:
+            self._listener_task = asyncio.get_running_loop().create_task(self._listen_for_invalidations())
+        except RuntimeError:
+            pass
+
+    async def start_invalidation_listener(self):
+        """Explicitly starts the L1 invalidation listener (no-op when L1 is disabled)."""
+        if self.l1 is not None:
+            self._ensure_invalidation_listener()
+
+    async def _listen_for_invalidations(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                # Anything published while we were disconnected is lost, so start clean.
+                self.l1.clear()
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    sender, _, key = data.partition("|")
+                    if sender != self.worker_id:
+                        self.l1.delete(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Cache invalidation listener failed, retrying: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters per tier, tier sizes and circuit breaker state."""
+        stats = dict(self.stats)
+        stats["l1_size"] = len(self.l1) if self.l1 is not None else 0
+        stats["fallback_size"] = len(self.fallback)
+        stats["breaker_state"] = self.breaker.state
+        stats["breaker_trips"] = self.breaker.trips
+        stats["breaker_short_circuited"] = self.breaker.short_circuited
+        return stats
+
     async def close(self):
-        """Closes the Redis connection pool."""
+        """Stops background tasks and closes the Redis connection pool."""
+        for task in (self._listener_task, self._replay_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._listener_task = None
+        self._replay_task = None
         if self.redis:
             await self.redis.close()
 
+class CacheBatch:
+    """
+    Queues cache writes and flushes them as one non-transactional Redis pipeline.
+    Created via CacheClient.batch(); `succeeded` reports the outcome after exit.
+    """
+    def __init__(self, client: CacheClient):
+        self.client = client
+        self.succeeded = False
+        self._ops: List[Tuple[str, str, Any, Optional[int]]] = []
+
+    def set(self, key: str, value: Any, expiry_time: Optional[int] = 300) -> "CacheBatch":
+        self._ops.append(("set", key, value, expiry_time))
+        return self
+
+    def delete(self, key: str) -> "CacheBatch":
+        self._ops.append(("delete", key, None, None))
+        return self
+
+    def expire(self, key: str, expiry_time: int) -> "CacheBatch":
+        self._ops.append(("expire", key, None, expiry_time))
+        return self
+
+    async def __aenter__(self) -> "CacheBatch":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.flush()
+        return False
+
+    def _apply_to_fallback(self, ops):
+        client = self.client
+        for op, key, value, expiry_time in ops:
+            if op == "set":
+                client._fallback_set(key, value, expiry_time)
+            elif op == "delete":
+                client.fallback.delete(key)
+            elif op == "expire":
+                found, entry = client.fallback.get(key)
+                if found:
+                    client.fallback.set(key, entry, expiry_time)
+
+    async def flush(self) -> bool:
+        client = self.client
+        ops, self._ops = self._ops, []
+        if not ops:
+            self.succeeded = True
+            return True
+
+        invalidated = []
+        for op, key, value, expiry_time in ops:
+            if op == "set":
+                l1_ttl = client._l1_ttl(key, expiry_time)
+                if l1_ttl:
+                    client.l1.set(key, value, l1_ttl)
+                    invalidated.append(key)
+            elif op == "delete" and client._l1_ttl(key):
+                client.l1.delete(key)
+                invalidated.append(key)
+
+        if not client._redis_allowed():
+            self._apply_to_fallback(ops)
+            self.succeeded = True
+            return True
+        try:
+            pipe = client.redis.pipeline(transaction=False)
+            for op, key, value, expiry_time in ops:
+                if op == "set":
+                    pipe.set(key, client.serializer.dumps(value), ex=expiry_time)
+                elif op == "delete":
+                    pipe.delete(key)
+                elif op == "expire":
+                    pipe.expire(key, expiry_time)
+            for key in invalidated:
+                pipe.publish(client.invalidation_channel, f"{client.worker_id}|{key}")
+            await pipe.execute()
+            client._on_success()
+        except Exception as e:
+            client._on_failure("pipeline", f"<{len(ops)} operations>", e)
+            self._apply_to_fallback(ops)
+        self.succeeded = True
+        return True
+
+
 # Create a single, shared instance of the CacheClient for the entire application.
 # This is the 'singleton' pattern.
-cache = CacheClient(redis_url=settings.REDIS_URL)
\ No newline at end of file
+cache = CacheClient(redis_url=settings.REDIS_URL)
+register_stats("cache", cache.get_stats, ratios={
+    "l1": (["l1_hits"], ["l1_misses"]),
+    "l2": (["l2_hits"], ["l2_misses"]),
+    "fallback": (["fallback_hits"], ["fallback_misses"]),
+})
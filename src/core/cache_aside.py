@@ -0,0 +1,242 @@
+# src/core/cache_aside.py
+"""
+Stampede-protected cache-aside decorator for async loaders.
+
+Values are stored in Redis inside a small envelope:
+
+    {"v": value, "neg": is_negative, "exp": logical expiry (epoch seconds), "d": load time (seconds)}
+
+The Redis key itself lives for ttl + stale_ttl, so an expired value is still
+available to serve when the loader fails. Protection against stampedes:
+
+- single flight: concurrent callers in one worker share one in-flight load;
+- a short Redis lock (SET NX) so only one worker reloads a key at a time,
+  while the others serve the stale value or briefly wait for the winner;
+- probabilistic early recomputation (XFetch): a caller occasionally reloads
+  a still-fresh value shortly before it expires, weighted by how long the
+  load takes, so hot keys rarely expire at all.
+
+Loaders should return None for "not found" (cached as a negative result for
+negative_ttl seconds) and raise on errors. Errors are logged and never
+propagate; the caller gets the stale value if there is one, else None.
+"""
+import asyncio
+import functools
+import logging
+import math
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.core.cache import cache
+from src.core.config import settings
+from src.core.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+LOCK_TTL_MS = 5000
+LOCK_WAIT_STEPS = 10
+LOCK_WAIT_INTERVAL = 0.05
+
+# namespace -> counters, exported through metrics
+stats: Dict[str, Dict[str, int]] = {}
+register_stats("cache_aside", lambda: stats, ratios={"hits": (["hits", "negative_hits"], ["misses"])})
+
+
+def _stats(namespace: str) -> Dict[str, int]:
+    return stats.setdefault(namespace, {
+        "hits": 0, "misses": 0, "negative_hits": 0, "early_recomputes": 0,
+        "stale_served": 0, "load_errors": 0, "loads": 0,
+    })
+
+
+def _namespace_ttl(namespace: str) -> int:
+    return settings.CACHE_TTLS.get(namespace, DEFAULT_TTL)
+
+
+def _negative_ttl(namespace: str) -> int:
+    return settings.CACHE_NEGATIVE_TTLS.get(namespace, 0)
+
+
+def _unwrap(envelope: Any) -> Any:
+    """Returns the value of a fresh, positive envelope, else None."""
+    if not isinstance(envelope, dict) or envelope.get("neg") or envelope.get("exp", 0) < time.time():
+        return None
+    return envelope.get("v")
+
+
+async def read_many(keys: List[str]) -> List[Any]:
+    """
+    Reads several cache-aside keys (possibly from different namespaces) in one MGET.
+    Returns fresh values aligned with keys; misses, expired and negative entries are None.
+    """
+    return [_unwrap(envelope) for envelope in await cache.mget(keys)]
+
+
+async def write(key: str, value: Any, ttl: int, negative: bool = False, load_time: float = 0.0, stale_ttl: int = 0) -> bool:
+    """Stores a value in cache-aside envelope format."""
+    envelope = {"v": value, "neg": negative, "exp": time.time() + ttl, "d": load_time}
+    return await cache.set(key, envelope, ttl + stale_ttl)
+
+
+async def write_many(values: Dict[str, Any], ttl: int, stale_ttl: int = 0) -> bool:
+    """Stores several values (full key -> value) in envelope format with one pipelined MSET."""
+    expires_at = time.time() + ttl
+    return await cache.mset(
+        {key: {"v": value, "neg": False, "exp": expires_at, "d": 0.0} for key, value in values.items()},
+        ttl + stale_ttl,
+    )
+
+
+def cache_aside(
+    namespace: str,
+    key: Callable[..., Any],
+    ttl: Optional[int] = None,
+    negative_ttl: Optional[int] = None,
+    stale_ttl: Optional[int] = None,
+    ttl_from_result: Optional[Callable[[Any], int]] = None,
+    beta: float = 1.0,
+):
+    """
+    Decorates an async loader with cache-aside semantics.
+
+    Args:
+        namespace: Key prefix; also selects the per-namespace TTLs in settings.
+        key: Builds the key suffix from the loader's arguments.
+        ttl: Freshness in seconds. Defaults to settings.CACHE_TTLS[namespace] (or 300).
+        negative_ttl: How long a None result is cached. Defaults to settings.CACHE_NEGATIVE_TTLS[namespace] (or 0 = off).
+        stale_ttl: How long past expiry a value may still be served when the loader fails.
+            Defaults to settings.CACHE_STALE_TTL.
+        ttl_from_result: Optional callable deriving the TTL from a loaded value (e.g. token expiry).
+        beta: XFetch aggressiveness; 0 disables early recomputation.
+
+    The wrapped function also exposes key_for(*args), invalidate(*args),
+    store(value, *args), store_many({key: value}) and uncached (the original loader).
+    """
+    def decorator(loader: Callable[..., Awaitable[Any]]):
+        inflight: Dict[str, asyncio.Future] = {}
+        counters = _stats(namespace)
+
+        def key_for(*args, **kwargs) -> str:
+            return f"{namespace}:{key(*args, **kwargs)}"
+
+        def _ttls():
+            return (
+                ttl if ttl is not None else _namespace_ttl(namespace),
+                negative_ttl if negative_ttl is not None else _negative_ttl(namespace),
+                stale_ttl if stale_ttl is not None else settings.CACHE_STALE_TTL,
+            )
+
+        async def _load_and_store(cache_key: str, envelope: Optional[dict], args, kwargs) -> Any:
+            fresh_ttl, neg_ttl, stale_window = _ttls()
+            lock_key = f"lock:{cache_key}"
+            # Released only while it still holds our token: a load that outlives LOCK_TTL_MS
+            # must not delete the lock another worker has taken since.
+            lock_token = f"{cache.worker_id}:{uuid.uuid4().hex[:8]}"
+            # None means Redis is unavailable: the lock is best-effort, so just load.
+            have_lock = await cache.set_if_absent(lock_key, lock_token, px=LOCK_TTL_MS) is not False
+
+            if not have_lock:
+                # Another worker is loading this key: serve stale, or wait briefly for its result.
+                if envelope is not None:
+                    counters["stale_served"] += 1
+                    return None if envelope.get("neg") else envelope.get("v")
+                for _ in range(LOCK_WAIT_STEPS):
+                    await asyncio.sleep(LOCK_WAIT_INTERVAL)
+                    refreshed = await cache.get(cache_key)
+                    if isinstance(refreshed, dict) and refreshed.get("exp", 0) >= time.time():
+                        return None if refreshed.get("neg") else refreshed.get("v")
+
+            try:
+                counters["loads"] += 1
+                started = time.monotonic()
+                value = await loader(*args, **kwargs)
+                load_time = time.monotonic() - started
+            except Exception as e:
+                counters["load_errors"] += 1
+                if envelope is not None and not envelope.get("neg"):
+                    counters["stale_served"] += 1
+                    logger.warning(f"Loader for {cache_key} failed, serving stale value: {e}")
+                    return envelope.get("v")
+                logger.error(f"Loader for {cache_key} failed: {e}")
+                return None
+            finally:
+                if have_lock:
+                    await cache.delete_if_equal(lock_key, lock_token)
+
+            if value is None:
+                if neg_ttl:
+                    await write(cache_key, None, neg_ttl, negative=True, load_time=load_time)
+                return None
+
+            value_ttl = ttl_from_result(value) if ttl_from_result else fresh_ttl
+            if value_ttl > 0:
+                await write(cache_key, value, value_ttl, load_time=load_time, stale_ttl=stale_window)
+            return value
+
+        @functools.wraps(loader)
+        async def wrapper(*args, **kwargs):
+            cache_key = key_for(*args, **kwargs)
+            envelope = await cache.get(cache_key)
+            if not isinstance(envelope, dict) or "exp" not in envelope:
+                envelope = None
+
+            if envelope is not None:
+                remaining = envelope["exp"] - time.time()
+                if remaining > 0:
+                    # XFetch: -d * beta * ln(U) grows with load time; recompute when it exceeds what's left.
+                    early = beta > 0 and -envelope.get("d", 0) * beta * math.log(random.random() or 1e-12) >= remaining
+                    if not early or cache_key in inflight:
+                        if envelope.get("neg"):
+                            counters["negative_hits"] += 1
+                            return None
+                        counters["hits"] += 1
+                        return envelope.get("v")
+                    counters["early_recomputes"] += 1
+                else:
+                    counters["misses"] += 1
+            else:
+                counters["misses"] += 1
+
+            # Single flight: one load per key per worker, everyone else awaits it.
+            if cache_key in inflight:
+                return await asyncio.shield(inflight[cache_key])
+            future = asyncio.get_running_loop().create_future()
+            inflight[cache_key] = future
+            try:
+                value = await _load_and_store(cache_key, envelope, args, kwargs)
+                future.set_result(value)
+                return value
+            except BaseException as e:
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure does not log a warning.
+                future.exception()
+                raise
+            finally:
+                inflight.pop(cache_key, None)
+
+        async def invalidate(*args, **kwargs) -> bool:
+            return await cache.delete(key_for(*args, **kwargs))
+
+        async def store(value: Any, *args, **kwargs) -> bool:
+            """Writes a freshly loaded value for the given loader arguments."""
+            fresh_ttl, _, stale_window = _ttls()
+            value_ttl = ttl_from_result(value) if ttl_from_result else fresh_ttl
+            return await write(key_for(*args, **kwargs), value, value_ttl, stale_ttl=stale_window)
+
+        async def store_many(values: Dict[str, Any]) -> bool:
+            """Writes several freshly loaded values, keyed by their full cache keys (see key_for)."""
+            fresh_ttl, _, stale_window = _ttls()
+            return await write_many(values, fresh_ttl, stale_window)
+
+        wrapper.key_for = key_for
+        wrapper.invalidate = invalidate
+        wrapper.store = store
+        wrapper.store_many = store_many
+        wrapper.uncached = loader
+        wrapper.namespace = namespace
+        return wrapper
+
+    return decorator
@@ -0,0 +1,163 @@
+# src/core/codecs.py
+"""
+Serialization codecs for values stored in Redis.
+
+Every encoded value starts with a 6-byte header:
+
+    magic (1) | format version (1) | codec id (1) | flags (1) | schema version (2, big-endian)
+
+The schema version is an application-level number (CACHE_SCHEMA_VERSION);
+bumping it on deploy turns every older entry into a cache miss instead of
+feeding old shapes to new code. Payloads above the compression threshold
+are zlib-compressed and flagged as such in the header.
+"""
+import json
+import logging
+import pickle
+import struct
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+MAGIC = 0xCA
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+HEADER = struct.Struct(">BBBBH")
+
+
+class CodecError(ValueError):
+    """Raised when a cached value cannot be decoded (unknown format, stale schema, ...)."""
+
+
+def _default(obj: Any) -> Any:
+    """Fallback conversion for types the binary/JSON formats do not know about."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (UUID, Decimal)):
+        return str(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    # Anything else (e.g. a Mongo ObjectId left in a document) would come back as a
+    # different type; fail the write instead
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_default, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def _pickle_dumps(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# codec name -> (id, dumps, loads). Ids are part of the stored format; never reuse one.
+CODECS: Dict[str, Tuple[int, Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "json": (3, _json_dumps, json.loads),
+    "pickle": (4, _pickle_dumps, pickle.loads),
+}
+if msgpack is not None:
+    CODECS["msgpack"] = (1, _msgpack_dumps, _msgpack_loads)
+if orjson is not None:
+    CODECS["orjson"] = (2, _orjson_dumps, orjson.loads)
+
+CODECS_BY_ID = {codec_id: (name, loads) for name, (codec_id, _, loads) in CODECS.items()}
+
+
+def default_codec_name() -> str:
+    """Picks the fastest compact codec that is installed."""
+    for name in ("msgpack", "orjson", "json"):
+        if name in CODECS:
+            return name
+    return "json"
+
+
+class Serializer:
+    """
+    Encodes values with a header-tagged codec and decodes anything written by
+    any registered codec, so the default can be changed without a cache flush.
+
+    Pickle is only decoded when allow_pickle is set, both for pickle-tagged
+    values and for legacy header-less values written before codecs existed.
+    """
+    def __init__(
+        self,
+        codec: str = "auto",
+        compression_threshold: Optional[int] = 4096,
+        compression_level: int = 1,
+        schema_version: int = 1,
+        allow_pickle: bool = False,
+    ):
+        if codec == "auto":
+            codec = default_codec_name()
+        if codec not in CODECS:
+            raise ValueError(f"Unknown or unavailable cache codec '{codec}'. Available: {sorted(CODECS)}")
+        self.codec_name = codec
+        self.codec_id, self._dumps, _ = CODECS[codec]
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.schema_version = schema_version
+        self.allow_pickle = allow_pickle
+
+    def dumps(self, value: Any) -> bytes:
+        payload = self._dumps(value)
+        flags = 0
+        if self.compression_threshold is not None and len(payload) >= self.compression_threshold:
+            compressed = zlib.compress(payload, self.compression_level)
+            if len(compressed) < len(payload):
+                payload = compressed
+                flags |= FLAG_ZLIB
+        return HEADER.pack(MAGIC, FORMAT_VERSION, self.codec_id, flags, self.schema_version) + payload
+
+    def loads(self, data: bytes) -> Any:
+        if not data or data[0] != MAGIC:
+            if self.allow_pickle:
+                return pickle.loads(data)
+            raise CodecError("Value has no codec header (legacy pickle) and pickle decoding is disabled")
+        if len(data) < HEADER.size:
+            raise CodecError("Truncated codec header")
+
+        _, format_version, codec_id, flags, schema_version = HEADER.unpack_from(data)
+        if format_version != FORMAT_VERSION:
+            raise CodecError(f"Unsupported codec format version {format_version}")
+        if schema_version != self.schema_version:
+            raise CodecError(f"Stale schema version {schema_version} (current {self.schema_version})")
+        if codec_id not in CODECS_BY_ID:
+            raise CodecError(f"Unknown codec id {codec_id}")
+        codec_name, loads = CODECS_BY_ID[codec_id]
+        if codec_name == "pickle" and not self.allow_pickle:
+            raise CodecError("Pickle-encoded value and pickle decoding is disabled")
+
+        payload = data[HEADER.size:]
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        try:
+            return loads(payload)
+        except Exception as e:
+            logging.error(f"Failed to decode cached value with codec '{codec_name}': {e}")
+            raise CodecError(str(e)) from e
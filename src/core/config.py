@@ -1,4 +1,5 @@
 # In src/core/config.py
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -12,5 +13,199 @@ class Settings(BaseSettings):
     PHONE_NUMBER_ID: str
     WHATSAPP_VERIFY_TOKEN: str
 
+    # Postgres connection pool / asyncpg statement caching
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30.0
+    POSTGRES_POOL_RECYCLE: int = 1800
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 256
+
+    # Redis timeouts and circuit breaker. While the breaker is open the cache is
+    # served from a bounded in-process fallback store.
+    REDIS_SOCKET_TIMEOUT: float = 0.5
+    REDIS_CONNECT_TIMEOUT: float = 0.5
+    CACHE_BREAKER_FAILURE_THRESHOLD: int = 5
+    CACHE_BREAKER_RESET_SECONDS: float = 5.0
+    CACHE_FALLBACK_MAX_ITEMS: int = 10000
+    CACHE_FALLBACK_DEFAULT_TTL: int = 300
+
+    # Optional in-process (L1) cache tier in front of Redis. Only namespaces
+    # listed here (the part of the key before the first ':') are kept in L1,
+    # each with its own TTL in seconds.
+    CACHE_L1_ENABLED: bool = False
+    CACHE_L1_MAX_ITEMS: int = 2048
+    CACHE_L1_NAMESPACE_TTLS: Dict[str, int] = {
+        "user_context": 30,
+        "company_config": 60,
+        "two_legged_token": 60,
+    }
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+
+    # Cache value serialization (see src/core/codecs.py). "auto" picks msgpack,
+    # then orjson, then json. Bump CACHE_SCHEMA_VERSION when cached shapes change.
+    CACHE_CODEC: str = "auto"
+    CACHE_COMPRESSION_THRESHOLD: int = 4096
+    CACHE_SCHEMA_VERSION: int = 1
+    CACHE_ALLOW_PICKLE: bool = False
+
+    # Cache-aside TTLs per namespace (see src/core/cache_aside.py). Negative TTLs
+    # control how long "not found" results are cached; 0 disables negative caching.
+    # Values may be served up to CACHE_STALE_TTL seconds past expiry when the
+    # backing store is failing.
+    CACHE_TTLS: Dict[str, int] = {
+        "user_context": 300,
+        "user_phone": 300,
+        "company_config": 300,
+        "aps_token": 300,
+        "issue_types": 3600,
+        "review_workflows": 3600,
+        "form_templates": 3600,
+        "project_users": 3600,
+    }
+    CACHE_NEGATIVE_TTLS: Dict[str, int] = {
+        "user_context": 60,
+        "user_phone": 60,
+        "company_config": 60,
+        "aps_token": 30,
+    }
+    CACHE_STALE_TTL: int = 600
+
+    # Bloom filter of registered users.phone_number values, shared via Redis.
+    # Workers reload the shared copy every RELOAD seconds; one worker rebuilds it
+    # from Postgres every REBUILD seconds, so new users can be rejected for up to
+    # REBUILD seconds after registration.
+    SENDER_FILTER_ENABLED: bool = False
+    SENDER_FILTER_FP_RATE: float = 0.001
+    SENDER_FILTER_RELOAD_SECONDS: int = 60
+    SENDER_FILTER_REBUILD_SECONDS: int = 300
+
+    # Intent parse cache, keyed on the normalised message text (and a template
+    # with project/user/type names abstracted). Shared via Redis for TTL seconds;
+    # each worker keeps up to LOCAL_MAX_ITEMS entries for LOCAL_TTL seconds.
+    INTENT_CACHE_ENABLED: bool = True
+    INTENT_CACHE_TTL: int = 86400
+    INTENT_CACHE_LOCAL_MAX_ITEMS: int = 4096
+    INTENT_CACHE_LOCAL_TTL: int = 300
+
+    # Local pre-classifier for greetings/thanks; messages longer than MAX_TOKENS
+    # or scoring below MIN_CONFIDENCE always go to the LLM. Confidence is
+    # 1 - 0.5 * (share of filler tokens), i.e. 0.5-1.0; 0.75 allows half filler.
+    FAST_INTENT_ENABLED: bool = True
+    FAST_INTENT_MIN_CONFIDENCE: float = 0.75
+    FAST_INTENT_MAX_TOKENS: int = 6
+
+    # Nearest-neighbour classifier trained on past LLM parses (see
+    # src/services/intent_classifier.py). Disabled until a model path is set.
+    INTENT_CLASSIFIER_PATH: Optional[str] = None
+    INTENT_CLASSIFIER_MIN_CONFIDENCE: float = 0.8
+    INTENT_HISTORY_MAX_ITEMS: int = 50000
+
+    # Intent LLM calls (see src/integrations/llm_governor.py). LLM_BACKEND="fake"
+    # replaces Gemini with a local stand-in for offline load tests.
+    LLM_BACKEND: str = "gemini"
+    LLM_MODEL: str = "gemini-2.0-flash-lite"
+    LLM_FALLBACK_MODEL: Optional[str] = None
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    LLM_TIMEOUT_SECONDS: float = 8.0
+    LLM_FALLBACK_TIMEOUT_SECONDS: float = 4.0
+    LLM_HEDGE_PERCENTILE: Optional[float] = 0.95  # None disables hedging
+    LLM_HEDGE_MIN_SAMPLES: int = 50
+    LLM_FAKE_LATENCY_MS: float = 400.0
+    LLM_FAKE_JITTER_MS: float = 200.0
+    LLM_FAKE_ERROR_RATE: float = 0.0
+
+    # Per-tenant (hub_id) fair scheduling of LLM parses and ACC issue fetches
+    # (see src/core/fair_scheduler.py). LLM capacity and queue timeout are
+    # LLM_MAX_CONCURRENCY / LLM_QUEUE_TIMEOUT_SECONDS; one hub may hold at most
+    # TENANT_*_CONCURRENCY slots. TENANT_WEIGHTS gives hubs a larger share.
+    TENANT_LLM_CONCURRENCY: int = 8
+    ACC_MAX_CONCURRENCY: int = 32
+    TENANT_ACC_CONCURRENCY: int = 16
+    ACC_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    TENANT_WEIGHTS: Dict[str, float] = {}
+
+    # Admission control in front of message handling (see src/services/admission.py).
+    # Load is elevated above SOFT_LIMIT messages in flight or a recent p90 above
+    # LATENCY_TARGET (greetings and repeats are shed), saturated at MAX_IN_FLIGHT
+    # or twice the target (all text messages are shed).
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: int = 200
+    ADMISSION_SOFT_LIMIT: int = 120
+    ADMISSION_LATENCY_TARGET_SECONDS: float = 6.0
+    ADMISSION_WINDOW_SECONDS: float = 10.0
+    ADMISSION_MIN_SAMPLES: int = 20
+    ADMISSION_REPEAT_SECONDS: float = 30.0
+    ADMISSION_BUSY_REPLY_INTERVAL_SECONDS: float = 60.0
+    ADMISSION_TRACKED_SENDERS: int = 50000
+
+    # ACC queries: relative dates ("today", "next_week") are resolved in this
+    # timezone for every user (user records carry none); list queries fetch at
+    # most RESULT_LIMIT rows.
+    DEFAULT_TIMEZONE: str = "Asia/Kolkata"
+    ACC_RESULT_LIMIT: int = 50
+    # Upper bound on rows scanned for "by status/type/assignee" breakdowns
+    ACC_AGGREGATE_MAX_ROWS: int = 5000
+
+    # List results with more than EXPORT_MIN_ROWS rows (or an explicit "export")
+    # are sent as a CSV/XLSX document instead of a text message
+    EXPORT_MIN_ROWS: int = 100
+    EXPORT_MAX_ROWS: int = 20000
+    EXPORT_DEFAULT_FORMAT: str = "csv"
+
+    # Prometheus metrics served at /metrics (no-op without prometheus_client)
+    METRICS_ENABLED: bool = True
+
+    # Startup warm-up and shutdown drain (see src/core/lifecycle.py). The worker
+    # reports ready at /health/ready after warm-up or WARMUP_TIMEOUT_SECONDS
+    # (after a failed warm-up only if READY_ON_FAILURE); from SIGTERM on it
+    # refuses new webhooks and gives in-flight ones and background jobs
+    # SHUTDOWN_DRAIN_SECONDS in total before closing pools.
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 30.0
+    WARMUP_REDIS_CONNECTIONS: int = 8
+    WARMUP_MAX_TENANTS: int = 500
+    WARMUP_CONCURRENCY: int = 8
+    WARMUP_READY_ON_FAILURE: bool = True
+    SHUTDOWN_DRAIN_SECONDS: float = 20.0
+
+    # Admin endpoints (/admin/...) require this token in the X-Admin-Token
+    # header; they are disabled while it is unset.
+    ADMIN_TOKEN: Optional[str] = None
+
+    # Per-request sampling profiler (see src/core/profiler.py). A webhook is
+    # profiled when sampled at SAMPLE_RATE (0-1), when its sender belongs to
+    # one of PROFILE_HUB_IDS (checked once admission control has let it in), or
+    # when it carries "X-Profile: 1" together with a valid X-Admin-Token.
+    # Profiles are kept for TTL seconds (newest MAX_STORED listed at
+    # /admin/profiles).
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_HUB_IDS: List[str] = []
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_STACK_DEPTH: int = 96
+    PROFILE_TTL_SECONDS: int = 86400
+    PROFILE_MAX_STORED: int = 200
+
+    # Daily digest of issues due today (see src/services/digest_service.py),
+    # sent at DIGEST_TIME (HH:MM, DEFAULT_TIMEZONE) to users subscribed through
+    # /admin/digest/subscriptions. Each project is fetched once (at most
+    # MAX_ROWS_PER_PROJECT issues, CONCURRENCY projects at a time) and messages
+    # go out at SEND_RATE per second as the approved template TEMPLATE_NAME
+    # (body parameters: first name, issue count, one-line summary of at most
+    # TEMPLATE_SUMMARY_CHARS characters).
+    DIGEST_ENABLED: bool = False
+    DIGEST_TIME: str = "08:00"
+    DIGEST_STATUSES: List[str] = ["open", "in_review", "pending"]
+    DIGEST_CONCURRENCY: int = 4
+    DIGEST_MAX_ROWS_PER_PROJECT: int = 5000
+    DIGEST_MAX_ISSUES_PER_PROJECT: int = 10
+    DIGEST_SEND_RATE: float = 20.0
+    DIGEST_SEND_BURST: int = 20
+    DIGEST_SEND_WORKERS: int = 8
+    DIGEST_SEND_EMPTY: bool = False
+    DIGEST_TEMPLATE_NAME: str = "daily_issue_digest"
+    DIGEST_TEMPLATE_LANGUAGE: str = "en"
+    DIGEST_TEMPLATE_SUMMARY_CHARS: int = 700
+
 # Create a single, reusable instance of the settings
-settings = Settings()
\ No newline at end of file
+settings = Settings()
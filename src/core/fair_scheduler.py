@@ -0,0 +1,169 @@
+# src/core/fair_scheduler.py
+"""
+Per-tenant fair scheduling for the expensive pipeline stages (LLM parses,
+ACC issue fetches), keyed on hub_id.
+
+Each stage has a `FairScheduler` with a global capacity and a per-tenant
+concurrency quota. A call that finds a free slot within its tenant's quota
+starts at once; otherwise it waits in its tenant's FIFO queue. When a slot
+frees up, the waiting call with the smallest start tag among tenants still
+under quota is started (start-time fair queuing): a tenant's tag grows by
+cost/weight per call, so a hub sending a burst of messages advances its own
+tags and interleaves with other hubs rather than queueing them behind the
+burst. Weights come from settings.TENANT_WEIGHTS (default 1.0).
+
+Calls that wait longer than the stage's queue timeout raise
+SchedulerTimeout. Queue depth, running calls and wait time are exported per
+stage and tenant.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from src.core.config import settings
+from src.core.metrics import SCHEDULER_QUEUED, SCHEDULER_REJECTIONS, SCHEDULER_RUNNING, SCHEDULER_WAIT, register_stats
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_TENANT = "unknown"
+
+
+class SchedulerTimeout(asyncio.TimeoutError):
+    """A call waited longer than the stage's queue timeout for a slot."""
+
+
+class _Waiter:
+    __slots__ = ("future", "start_tag", "enqueued")
+
+    def __init__(self, future: asyncio.Future, start_tag: float):
+        self.future = future
+        self.start_tag = start_tag
+        self.enqueued = time.perf_counter()
+
+
+class FairScheduler:
+    def __init__(self, stage: str, capacity: int, tenant_limit: int, queue_timeout: float,
+                 weights: Optional[Dict[str, float]] = None):
+        self.stage = stage
+        self.capacity = capacity
+        self.tenant_limit = tenant_limit
+        self.queue_timeout = queue_timeout
+        self.weights = weights or {}
+        self.running = 0
+        self.virtual_time = 0.0
+        self._running: Dict[str, int] = defaultdict(int)
+        self._queues: Dict[str, Deque[_Waiter]] = defaultdict(deque)
+        self._finish_tags: Dict[str, float] = {}
+        self.stats = {"started": 0, "queued": 0, "timeouts": 0}
+
+    def _start_tag(self, tenant: str, cost: float) -> float:
+        start = max(self.virtual_time, self._finish_tags.get(tenant, 0.0))
+        self._finish_tags[tenant] = start + cost / self.weights.get(tenant, 1.0)
+        return start
+
+    def _grant(self, tenant: str, start_tag: float):
+        self.running += 1
+        self._running[tenant] += 1
+        self.virtual_time = max(self.virtual_time, start_tag)
+        self.stats["started"] += 1
+        SCHEDULER_RUNNING.labels(self.stage, tenant).inc()
+
+    def _dispatch(self):
+        """Starts queued calls, smallest start tag first, while capacity and quotas allow."""
+        while self.running < self.capacity:
+            best_tenant, best_tag = None, None
+            for tenant, queue in self._queues.items():
+                if self._running.get(tenant, 0) < self.tenant_limit:
+                    if best_tag is None or queue[0].start_tag < best_tag:
+                        best_tenant, best_tag = tenant, queue[0].start_tag
+            if best_tenant is None:
+                return
+            queue = self._queues[best_tenant]
+            waiter = queue.popleft()
+            if not queue:
+                del self._queues[best_tenant]
+            SCHEDULER_QUEUED.labels(self.stage, best_tenant).dec()
+            if waiter.future.done():
+                continue
+            self._grant(best_tenant, waiter.start_tag)
+            SCHEDULER_WAIT.labels(self.stage, best_tenant).observe(time.perf_counter() - waiter.enqueued)
+            waiter.future.set_result(True)
+
+    async def acquire(self, tenant: str, cost: float = 1.0):
+        start_tag = self._start_tag(tenant, cost)
+        # Free capacity means every queued call is blocked by its own tenant's quota
+        if self.running < self.capacity and self._running.get(tenant, 0) < self.tenant_limit and not self._queues.get(tenant):
+            self._grant(tenant, start_tag)
+            SCHEDULER_WAIT.labels(self.stage, tenant).observe(0.0)
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), start_tag)
+        self._queues[tenant].append(waiter)
+        self.stats["queued"] += 1
+        SCHEDULER_QUEUED.labels(self.stage, tenant).inc()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except BaseException as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we gave up: hand the slot on
+                self.release(tenant)
+            else:
+                waiter.future.cancel()
+                queue = self._queues.get(tenant)
+                if queue and waiter in queue:
+                    queue.remove(waiter)
+                    SCHEDULER_QUEUED.labels(self.stage, tenant).dec()
+                    if not queue:
+                        del self._queues[tenant]
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["timeouts"] += 1
+                SCHEDULER_REJECTIONS.labels(self.stage, tenant).inc()
+                raise SchedulerTimeout(f"{self.stage} queue wait exceeded {self.queue_timeout}s for tenant {tenant}") from None
+            raise
+
+    def release(self, tenant: str):
+        self.running -= 1
+        self._running[tenant] -= 1
+        if not self._running[tenant]:
+            del self._running[tenant]
+        SCHEDULER_RUNNING.labels(self.stage, tenant).dec()
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str], cost: float = 1.0) -> AsyncIterator[None]:
+        """Runs the enclosed block in one of the stage's slots, charged to `tenant` (hub_id)."""
+        tenant = tenant or UNKNOWN_TENANT
+        await self.acquire(tenant, cost)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": self.running,
+            "waiting": sum(len(queue) for queue in self._queues.values()),
+            "capacity": self.capacity,
+            "tenants_running": len(self._running),
+        }
+
+
+llm_scheduler = FairScheduler(
+    "llm_parse",
+    capacity=settings.LLM_MAX_CONCURRENCY,
+    tenant_limit=settings.TENANT_LLM_CONCURRENCY,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    weights=settings.TENANT_WEIGHTS,
+)
+acc_scheduler = FairScheduler(
+    "acc_fetch",
+    capacity=settings.ACC_MAX_CONCURRENCY,
+    tenant_limit=settings.TENANT_ACC_CONCURRENCY,
+    queue_timeout=settings.ACC_QUEUE_TIMEOUT_SECONDS,
+    weights=settings.TENANT_WEIGHTS,
+)
+register_stats("scheduler", lambda: {"llm_parse": llm_scheduler.get_stats(), "acc_fetch": acc_scheduler.get_stats()})
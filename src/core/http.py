@@ -0,0 +1,72 @@
+# src/core/http.py
+"""
+httpx clients for outbound calls (WhatsApp Graph API, APS/ACC). Every request
+made through `http_client()` is timed into the dependency latency histogram and
+counted by status, labelled with the service and a templated endpoint
+(IDs replaced by "{id}") so label cardinality stays bounded.
+
+`use_transport()` routes every such client through another transport, which
+is how the load-test harness substitutes local stand-ins for Meta and APS.
+"""
+import re
+import time
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import httpx
+
+from src.core.metrics import HTTP_REQUESTS, observe_dependency
+
+SERVICES = {
+    "graph.facebook.com": "whatsapp",
+    "developer.api.autodesk.com": "aps",
+}
+
+_VERSION = re.compile(r"^v\d+(\.\d+)?$")
+_STARTED = "metrics_started"
+
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def _is_id(segment: str) -> bool:
+    if _VERSION.match(segment):
+        return False
+    return any(c.isdigit() for c in segment) or len(segment) > 24 or segment.startswith("b.")
+
+
+@lru_cache(maxsize=1024)
+def endpoint_template(host: str, path: str) -> Tuple[str, str]:
+    """("developer.api.autodesk.com", "/construction/issues/v1/projects/b.123/issues") -> ("aps", "/construction/issues/v1/projects/{id}/issues")"""
+    segments = ["{id}" if _is_id(segment) else segment for segment in path.split("/")]
+    return SERVICES.get(host, host), "/".join(segments)
+
+
+async def _on_request(request: httpx.Request):
+    request.extensions[_STARTED] = time.perf_counter()
+
+
+async def _on_response(response: httpx.Response):
+    request = response.request
+    started = request.extensions.get(_STARTED)
+    service, endpoint = endpoint_template(request.url.host, request.url.path)
+    if started is not None:
+        observe_dependency(service, f"{request.method} {endpoint}", time.perf_counter() - started)
+    HTTP_REQUESTS.labels(service, endpoint, str(response.status_code)).inc()
+
+
+def use_transport(transport: Optional[httpx.AsyncBaseTransport]):
+    """Sends all http_client() requests through `transport` (None restores the network)."""
+    global _transport
+    _transport = transport
+
+
+def http_client(**kwargs) -> httpx.AsyncClient:
+    """An httpx.AsyncClient (same arguments) whose requests are recorded in metrics."""
+    if _transport is not None:
+        kwargs["transport"] = _transport
+    hooks = kwargs.pop("event_hooks", {})
+    kwargs["event_hooks"] = {
+        "request": [_on_request, *hooks.get("request", [])],
+        "response": [_on_response, *hooks.get("response", [])],
+    }
+    return httpx.AsyncClient(**kwargs)
@@ -0,0 +1,165 @@
+# src/core/lifecycle.py
+"""
+Process lifecycle shared by the FastAPI lifespan, the health routes and the
+webhook router.
+
+The process starts in "starting" and becomes "ready" once warm-up has
+finished. A failed or timed-out warm-up still becomes ready (serving cold)
+unless WARMUP_READY_ON_FAILURE is off; the failed steps are listed in
+`status()` either way.
+
+On SIGTERM/SIGINT the state turns "draining" at once (see
+`install_signal_handlers`), before the server stops accepting connections:
+/health/ready answers 503 and webhooks still arriving on open connections are
+refused with 503 so Meta redelivers them to another worker. The server then
+waits for in-flight requests, and `drain()` in the lifespan spends what is
+left of SHUTDOWN_DRAIN_SECONDS (counted from the signal) on background jobs
+started with `spawn()` before the pools are closed.
+"""
+import asyncio
+import logging
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STARTING, READY, DRAINING, STOPPED = "starting", "ready", "draining", "stopped"
+
+
+class Lifecycle:
+    def __init__(self):
+        self.state = STARTING
+        self.in_flight = 0
+        self.warmup: Dict[str, Any] = {}
+        self.warmup_seconds: Optional[float] = None
+        self._background: set = set()
+        self._idle: Optional[asyncio.Event] = None
+        self._drain_started: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    @property
+    def accepting(self) -> bool:
+        return self.state in (STARTING, READY)
+
+    @contextmanager
+    def work(self) -> Iterator[None]:
+        """Counts the enclosed block as in-flight work that shutdown waits for."""
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0 and self._idle is not None:
+                self._idle.set()
+
+    def spawn(self, coro: Coroutine, name: Optional[str] = None) -> asyncio.Task:
+        """Starts a fire-and-forget job that shutdown waits for (and cancels if it overruns)."""
+        task = asyncio.get_running_loop().create_task(coro, name=name)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    @property
+    def warmup_failed(self) -> List[str]:
+        """Failed warm-up steps, or ["warmup"] when warm-up as a whole failed or timed out."""
+        if "error" in self.warmup:
+            return ["warmup"]
+        return [name for name, result in self.warmup.items() if isinstance(result, dict) and not result.get("ok", True)]
+
+    async def warm(self, warm_up: Callable[[], Awaitable[Dict[str, Any]]], timeout: float, ready_on_failure: bool = True):
+        """
+        Runs `warm_up` (returning per-step results), then reports ready. With
+        ready_on_failure=False a failed or timed-out warm-up leaves the process
+        "starting", so /health/ready keeps answering 503.
+        """
+        started = time.perf_counter()
+        try:
+            self.warmup = await asyncio.wait_for(warm_up(), timeout)
+        except asyncio.TimeoutError:
+            self.warmup = {"error": f"timed out after {timeout:.0f}s"}
+            logger.warning(f"Warm-up timed out after {timeout:.0f}s; serving cold")
+        except Exception as e:
+            self.warmup = {"error": str(e)}
+            logger.error(f"Warm-up failed; serving cold: {e}", exc_info=True)
+        self.warmup_seconds = round(time.perf_counter() - started, 3)
+        failed = self.warmup_failed
+        if failed and not ready_on_failure:
+            logger.error(f"Warm-up steps failed ({', '.join(failed)}); not reporting ready")
+            return
+        if self.state == STARTING:
+            self.state = READY
+            logger.info(f"Ready after {self.warmup_seconds}s warm-up" + (f" (failed: {', '.join(failed)})" if failed else ""))
+
+    def begin_drain(self):
+        """Stops accepting webhooks; the drain budget counts from the first call."""
+        if self._drain_started is None:
+            self._drain_started = time.monotonic()
+        if self.accepting:
+            self.state = DRAINING
+            logger.info("Shutdown requested; draining")
+
+    def install_signal_handlers(self):
+        """
+        Puts a handler in front of the server's SIGTERM/SIGINT handlers that
+        starts draining as the signal arrives, before the server closes its
+        listeners. Call from the lifespan startup, once the server has
+        installed its own handlers; the server restores its originals on exit.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous = signal.getsignal(sig)
+
+            def handler(signum, frame, previous=previous):
+                self.begin_drain()
+                if callable(previous):
+                    previous(signum, frame)
+                elif previous == signal.SIG_DFL:
+                    signal.signal(signum, signal.SIG_DFL)
+                    signal.raise_signal(signum)
+
+            signal.signal(sig, handler)
+
+    async def drain(self, timeout: float):
+        """
+        Stops accepting webhooks and waits for in-flight work and background
+        jobs until `timeout` seconds after the drain began.
+        """
+        self.begin_drain()
+        deadline = self._drain_started + timeout
+        logger.info(f"Draining: {self.in_flight} webhooks in flight, {len(self._background)} background jobs")
+
+        if self.in_flight:
+            self._idle = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._idle.wait(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                logger.warning(f"Drain timed out with {self.in_flight} webhooks still in flight")
+
+        pending = set(self._background)
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - time.monotonic()))
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"Cancelled {len(pending)} background jobs still running after the drain timeout")
+        self.state = STOPPED
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "in_flight": self.in_flight,
+            "background_jobs": len(self._background),
+            "warmup_seconds": self.warmup_seconds,
+            "warmup_failed": self.warmup_failed,
+            "warmup": self.warmup,
+        }
+
+
+lifecycle = Lifecycle()
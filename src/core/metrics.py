@@ -0,0 +1,187 @@
+# src/core/metrics.py
+"""
+Prometheus metrics for the request pipeline.
+
+- `track(stage)` / `@timed(stage)` time a pipeline stage (webhook, intent_parse,
+  token_fetch, ...) into a latency histogram, keep an in-flight gauge and count
+  failures.
+- `observe_dependency(dependency, operation, seconds)` records calls to
+  Postgres, Mongo, Redis and outbound HTTP (per service and endpoint); the
+  repositories, cache client and `src.core.http` client call it.
+- Components that already keep counters (cache tiers, cache-aside namespaces,
+  intent cache, LLM governor, ...) expose them with `register_stats`; they are
+  read only when /metrics is scraped, together with derived hit ratios.
+- Inside a profiled request (src/core/profiler.py) stages and dependency
+  calls are also recorded as spans of that request's profile.
+
+Recording a sample is a dict lookup plus a histogram bucket increment, cheap
+enough to leave on in production. Without prometheus_client every metric is a
+no-op and /metrics reports that it is unavailable.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from src.core.config import settings
+from src.core.profiler import current_profile
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # pragma: no cover - optional dependency
+    Counter = Gauge = Histogram = GaugeMetricFamily = None
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "whatsapp_bot"
+# Seconds; covers sub-millisecond cache hits up to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+
+def _metric(kind, name: str, documentation: str, labels: Sequence[str], **kwargs):
+    if kind is None or not settings.METRICS_ENABLED:
+        return _NoopMetric()
+    return kind(f"{PREFIX}_{name}", documentation, labels, **kwargs)
+
+
+STAGE_LATENCY = _metric(Histogram, "stage_seconds", "Latency of pipeline stages", ["stage"], buckets=LATENCY_BUCKETS)
+STAGE_ERRORS = _metric(Counter, "stage_errors_total", "Pipeline stages that raised", ["stage"])
+IN_FLIGHT = _metric(Gauge, "in_flight", "Pipeline stages currently running", ["stage"])
+DEPENDENCY_LATENCY = _metric(Histogram, "dependency_seconds", "Latency of calls to external dependencies",
+                             ["dependency", "operation"], buckets=LATENCY_BUCKETS)
+HTTP_REQUESTS = _metric(Counter, "http_client_requests_total", "Outbound HTTP requests by response status",
+                        ["service", "endpoint", "status"])
+MESSAGES = _metric(Counter, "messages_total", "Webhook messages by kind and outcome", ["kind", "outcome"])
+INTENT_SOURCES = _metric(Counter, "intent_source_total", "Which stage answered intent parsing", ["source"])
+ADMISSION_DECISIONS = _metric(Counter, "admission_total", "Admission decisions by message priority",
+                              ["priority", "decision"])
+FOLLOW_UPS = _metric(Counter, "follow_up_total", "Follow-up refinements by how they were answered", ["outcome"])
+# Per-tenant fair scheduler (src/core/fair_scheduler.py); "tenant" is the hub_id
+SCHEDULER_WAIT = _metric(Histogram, "scheduler_wait_seconds", "Time calls waited for a scheduler slot",
+                         ["stage", "tenant"], buckets=LATENCY_BUCKETS)
+SCHEDULER_QUEUED = _metric(Gauge, "scheduler_queue_depth", "Calls waiting for a scheduler slot", ["stage", "tenant"])
+SCHEDULER_RUNNING = _metric(Gauge, "scheduler_running", "Calls holding a scheduler slot", ["stage", "tenant"])
+SCHEDULER_REJECTIONS = _metric(Counter, "scheduler_timeouts_total", "Calls that gave up waiting for a slot",
+                               ["stage", "tenant"])
+
+
+@contextmanager
+def track(stage: str) -> Iterator[None]:
+    """Times the enclosed block as `stage` (also usable around awaits)."""
+    gauge = IN_FLIGHT.labels(stage)
+    gauge.inc()
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.labels(stage).observe(elapsed)
+        gauge.dec()
+        profile = current_profile.get()
+        if profile is not None:
+            profile.span(stage, started, elapsed, error=failed)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of `track` for async functions."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track(stage):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe_dependency(dependency: str, operation: str, seconds: float):
+    DEPENDENCY_LATENCY.labels(dependency, operation).observe(seconds)
+    profile = current_profile.get()
+    if profile is not None:
+        profile.span(f"{dependency} {operation}", time.perf_counter() - seconds, seconds, kind="dependency")
+
+
+# --- component stats ---------------------------------------------------------
+
+StatsProvider = Callable[[], Dict[str, Any]]
+# ratio name -> (hit counter keys, miss counter keys)
+RatioSpec = Dict[str, Tuple[Sequence[str], Sequence[str]]]
+
+_providers: Dict[str, Tuple[StatsProvider, RatioSpec]] = {}
+
+
+def register_stats(component: str, provider: StatsProvider, ratios: Optional[RatioSpec] = None):
+    """
+    Exposes a component's counters at scrape time. `provider` returns a flat
+    {stat: number} dict, or {scope: {stat: number}} for per-namespace counters.
+    `ratios` names hit ratios to derive, e.g. {"l1": (["l1_hits"], ["l1_misses"])}.
+    """
+    _providers[component] = (provider, ratios or {})
+
+
+def _scopes(stats: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    if stats and all(isinstance(value, dict) for value in stats.values()):
+        yield from stats.items()
+    else:
+        yield "", stats
+
+
+class ComponentStatsCollector:
+    """Prometheus collector reading registered component stats on each scrape."""
+
+    def collect(self):
+        values = GaugeMetricFamily(f"{PREFIX}_component_stat", "Counters and sizes kept by components",
+                                   labels=["component", "scope", "stat"])
+        ratios = GaugeMetricFamily(f"{PREFIX}_hit_ratio", "Hit ratio since process start",
+                                   labels=["component", "scope", "ratio"])
+        for component, (provider, ratio_spec) in list(_providers.items()):
+            try:
+                stats = provider()
+            except Exception as e:
+                logger.warning(f"Stats provider {component} failed: {e}")
+                continue
+            for scope, scoped in _scopes(stats):
+                for stat, value in scoped.items():
+                    if isinstance(value, (int, float)):
+                        values.add_metric([component, scope, stat], float(value))
+                for name, (hit_keys, miss_keys) in ratio_spec.items():
+                    hits = sum(scoped.get(key, 0) for key in hit_keys)
+                    misses = sum(scoped.get(key, 0) for key in miss_keys)
+                    if hits + misses:
+                        ratios.add_metric([component, scope, name], hits / (hits + misses))
+        yield values
+        yield ratios
+
+
+if GaugeMetricFamily is not None and settings.METRICS_ENABLED:
+    REGISTRY.register(ComponentStatsCollector())
+
+
+def render() -> Tuple[bytes, str]:
+    """Returns (exposition body, content type) for the /metrics route."""
+    if Counter is None or not settings.METRICS_ENABLED:
+        return b"# metrics unavailable (prometheus_client not installed or METRICS_ENABLED=false)\n", "text/plain"
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
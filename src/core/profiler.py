@@ -0,0 +1,264 @@
+# src/core/profiler.py
+"""
+On-demand profiling of individual webhook requests.
+
+A profiled request runs inside `profile(...)`. While any profile is open a
+background thread samples the event-loop thread's stack every
+PROFILE_INTERVAL_MS and charges each sample to the profile that owns the task
+currently running on the loop, so concurrent unprofiled requests are never
+counted. Tasks created inside a profiled request (entity lookups, hedged LLM
+attempts, ...) are adopted through a task factory, and together with the
+pipeline stages timed by `src.core.metrics.track` they are recorded as spans
+with wall-clock offsets: samples show where CPU time went, spans show where
+the request was waiting.
+
+Finished profiles are stored in the cache for PROFILE_TTL_SECONDS with
+collapsed stacks ("frame;frame;frame count" lines) that flamegraph.pl,
+speedscope or inferno read directly; the admin router serves them. Nothing is
+sampled, and no thread runs, while no profile is open.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.core.config import settings
+from src.core.lifecycle import lifecycle
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KEY = "profile:{}"
+INDEX_KEY = "profile:index"
+MAX_SPANS = 1000
+
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+_labels: Dict[Any, str] = {}
+# Frames from here up (event loop internals, server startup) are the same in every sample
+_LOOP_CALLBACK = asyncio.events.Handle._run.__code__
+_ROOT = os.getcwd() + os.sep
+
+
+def _frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(_ROOT):
+            filename = filename[len(_ROOT):]
+        elif "site-packages" in filename:
+            filename = filename.split("site-packages" + os.sep, 1)[-1]
+        label = f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+        _labels[code] = label
+    return label
+
+
+class RequestProfile:
+    """Samples and spans collected for one request."""
+
+    def __init__(self, name: str, reason: str, attributes: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.reason = reason
+        self.attributes = attributes or {}
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.spans: List[Dict[str, Any]] = []
+        self.tasks: set = set()
+
+    def add_sample(self, stack: str):
+        self.stacks[stack] += 1
+        self.samples += 1
+
+    def span(self, name: str, started: float, seconds: float, error: bool = False, kind: str = "stage"):
+        """Records a timed block; `started` is a time.perf_counter() value."""
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append({
+                "name": name,
+                "kind": kind,
+                "start_ms": round((started - self.started) * 1000, 3),
+                "duration_ms": round(seconds * 1000, 3),
+                "error": error,
+            })
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, root first, one "frame;...;frame count" line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "reason": self.reason,
+            "attributes": self.attributes,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.samples,
+            # On-CPU time seen by the sampler; the rest of duration_ms was spent awaiting
+            "sampled_cpu_ms": round(self.samples * settings.PROFILE_INTERVAL_MS, 3),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "interval_ms": settings.PROFILE_INTERVAL_MS,
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+            "collapsed": self.collapsed(),
+        }
+
+
+class SamplingProfiler:
+    """
+    Stack sampler for the event-loop thread. Runs a daemon thread only while
+    at least one task is attached; each sample is charged to the profile of
+    the task the loop is running at that moment (idle loops are skipped).
+    """
+
+    def __init__(self, interval_ms: float, max_depth: int):
+        self.interval = interval_ms / 1000
+        self.max_depth = max_depth
+        self._owners: Dict[asyncio.Task, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._previous_factory = None
+        self.samples_taken = 0
+
+    def _install(self, loop: asyncio.AbstractEventLoop):
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._previous_factory = loop.get_task_factory()
+        loop.set_task_factory(self._task_factory)
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        profile = context.get(current_profile) if context is not None else current_profile.get()
+        if profile is not None:
+            self.adopt(task, profile)
+        return task
+
+    def attach(self, task: asyncio.Task, profile: RequestProfile):
+        """Charges samples taken while `task` runs to `profile`, starting the sampler if needed."""
+        self._install(task.get_loop())
+        with self._lock:
+            self._owners[task] = profile
+            profile.tasks.add(task)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def adopt(self, task: asyncio.Task, profile: RequestProfile):
+        """Attaches a task spawned by a profiled request and times it as a span."""
+        started = time.perf_counter()
+        name = getattr(task.get_coro(), "__qualname__", task.get_name())
+
+        def done(finished: asyncio.Task):
+            elapsed = time.perf_counter() - started
+            # Library housekeeping tasks (socket writes, lock waits) finish within a sample interval
+            if elapsed >= self.interval:
+                profile.span(name, started, elapsed, kind="task",
+                             error=finished.cancelled() or finished.exception() is not None)
+            self._release(finished)
+
+        self.attach(task, profile)
+        task.add_done_callback(done)
+
+    def _release(self, task: asyncio.Task):
+        with self._lock:
+            profile = self._owners.pop(task, None)
+            if profile is not None:
+                profile.tasks.discard(task)
+
+    def detach(self, profile: RequestProfile):
+        """Stops charging samples to `profile`; the thread exits once nothing is attached."""
+        with self._lock:
+            for task in profile.tasks:
+                self._owners.pop(task, None)
+            profile.tasks.clear()
+
+    def _stack(self, frame) -> str:
+        labels = []
+        while frame is not None and frame.f_code is not _LOOP_CALLBACK and len(labels) < self.max_depth:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._owners:
+                    self._thread = None
+                    return
+            task = asyncio.current_task(self._loop)
+            profile = self._owners.get(task) if task is not None else None
+            if profile is not None:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    profile.add_sample(self._stack(frame))
+                    self.samples_taken += 1
+                del frame
+            time.sleep(self.interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"attached_tasks": len(self._owners), "samples": self.samples_taken}
+
+
+sampler = SamplingProfiler(settings.PROFILE_INTERVAL_MS, settings.PROFILE_MAX_STACK_DEPTH)
+
+
+@asynccontextmanager
+async def profile(name: str, reason: str, attributes: Optional[Dict[str, Any]] = None) -> AsyncIterator[RequestProfile]:
+    """Profiles the enclosed block (and the tasks it creates), then stores the result in the background."""
+    request_profile = RequestProfile(name, reason, attributes)
+    token = current_profile.set(request_profile)
+    sampler.attach(asyncio.current_task(), request_profile)
+    try:
+        yield request_profile
+    finally:
+        request_profile.duration = time.perf_counter() - request_profile.started
+        sampler.detach(request_profile)
+        current_profile.reset(token)
+        lifecycle.spawn(save_profile(request_profile), name=f"save-profile-{request_profile.id}")
+
+
+async def save_profile(request_profile: RequestProfile) -> bool:
+    # Imported here: the cache client is instrumented through src.core.metrics, which imports this module
+    from src.core.cache import cache
+
+    stored = await cache.set(PROFILE_KEY.format(request_profile.id), request_profile.to_dict(),
+                             expiry_time=settings.PROFILE_TTL_SECONDS)
+    if stored:
+        await cache.push_capped(INDEX_KEY, request_profile.summary(), settings.PROFILE_MAX_STORED)
+        logger.info(f"Stored profile {request_profile.id} ({request_profile.reason}, "
+                    f"{request_profile.samples} samples, {request_profile.duration * 1000:.0f} ms)")
+    else:
+        logger.warning(f"Could not store profile {request_profile.id}")
+    return stored
+
+
+async def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Summaries of the most recent profiles, newest first."""
+    from src.core.cache import cache
+    return await cache.list_range(INDEX_KEY, 0, limit - 1)
+
+
+async def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    from src.core.cache import cache
+    return await cache.get(PROFILE_KEY.format(profile_id))
@@ -1,10 +1,13 @@
 # Pydantic models for input parsing
 from typing import List, Literal, Optional, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 IssueStatus = Literal["open", "closed", "in_review", "pending", "draft","is_pending","completed","not_approved","in_dispute"]
 ReviewStatus = Literal["open", "closed", "void"]
 FormStatus = Literal["closed","in_progress","in_review"]
+GroupBy = Literal["status", "issue_type", "assignee", "due"]
+ExportFormat = Literal["csv", "xlsx"]
+IssueSort = Literal["due_date", "due_date_desc", "title", "status", "display_id"]
 Intent = Literal["get_issues", "get_reviews", "get_forms"]
 
 class IssueParams(BaseModel):
@@ -16,6 +19,10 @@ class IssueParams(BaseModel):
     due_date: Optional[str] = Field(None, description="The due date, can be a specific date 'YYYY-MM-DD' or a relative term like 'today', 'tomorrow', 'next_week' or a range")
     issue_type: Optional[List[str]] = Field(default_factory=list, description="The category or type of the issue, e.g., 'Safety', 'Quality'.")
     count_only: bool = Field(False, description="Set to true if the user only asks for the number/count of items.")
+    group_by: Optional[List[GroupBy]] = Field(default_factory=list, description="Set when the user asks for a breakdown, e.g. 'issues by status' -> ['status'], 'by type and assignee' -> ['issue_type', 'assignee'], 'how many are overdue' -> ['due'].")
+    export: Optional[ExportFormat] = Field(None, description="Set when the user asks to export/download the results as a file: 'xlsx' for Excel/spreadsheet, otherwise 'csv'.")
+    sort_by: Optional[IssueSort] = Field(None, description="Set when the user asks for an order: 'due_date' (soonest first), 'due_date_desc' (latest first), 'title', 'status' or 'display_id' (issue number).")
+    limit: Optional[int] = Field(None, ge=1, description="Set when the user asks for only the first N issues, e.g. 'top 5' -> 5.")
 
 class ReviewParams(BaseModel):
     """Parameters for querying reviews."""
@@ -40,3 +47,19 @@ class FormParams(BaseModel):
 
 ParametersUnion = Union[IssueParams, ReviewParams, FormParams]
 
+
+# Intent -> parameter model. TypeAdapters are built once at import time so
+# validating LLM/cached output does not rebuild validators per message.
+PARAMETER_MODELS = {
+    "get_issues": IssueParams,
+    "get_reviews": ReviewParams,
+    "get_forms": FormParams,
+}
+PARAMETER_ADAPTERS = {intent: TypeAdapter(model) for intent, model in PARAMETER_MODELS.items()}
+
+
+class DigestSubscription(BaseModel):
+    """A user's subscription to the daily digest of one project."""
+    phone_number: str = Field(..., description="The subscriber's WhatsApp number, as stored in users.")
+    project_id: str = Field(..., description="The ACC project ID.")
+    project_name: str = Field(..., description="Project name shown in the digest.")
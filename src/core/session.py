@@ -1,27 +1,53 @@
 # src/core/session.py
+#
+# Conversation sessions are stored as Redis hashes with one encoded value per
+# field, so a step that changes one field (e.g. the selected user) only writes
+# that field. Every read and write resets the TTL in the same MULTI/EXEC.
+#
+# Shared, heavy data is never copied into a session: the tenant config and the
+# APS tokens are looked up by reference (hub_id / autodesk_id) from their own
+# caches when a session is resumed.
 from datetime import datetime
+from typing import List, Optional
+
 from src.core.cache import cache
 
+SESSION_TTL = 1800  # 30 minutes
+
+# Kept out of sessions; resolved from the user's hub_id / autodesk_id instead.
+REFERENCED_FIELDS = ("config", "three_legged_token", "two_legged_token")
+
 def build_session_key(user_phone, autodesk_id=None):
     return f"session:{user_phone}" if not autodesk_id else f"session:{user_phone}:{autodesk_id}"
 
+def _storable(fields: dict) -> dict:
+    return {k: v for k, v in fields.items() if k not in REFERENCED_FIELDS}
+
 async def set_session(user_phone, session_data: dict, autodesk_id=None):
     session_key = build_session_key(user_phone, autodesk_id)
-    # Set full session (overwrites previous) with default expiration
-    await cache.set(session_key, {
-        **session_data,
+    # Set full session (replaces previous fields) with the sliding session expiry
+    await cache.hset_fields(session_key, {
+        **_storable(session_data),
         "timestamp": datetime.utcnow().isoformat()
-    })
+    }, SESSION_TTL, replace=True)
 
-async def get_session(user_phone, autodesk_id=None):
+async def update_session(user_phone, fields: dict, autodesk_id=None):
     session_key = build_session_key(user_phone, autodesk_id)
-    session = await cache.get(session_key)
-    if session:
-        # Optionally re-save it to reset TTL if not handled by cache layer
-        await cache.set(session_key, session)
-    return session
+    # Only the given fields are written; the rest of the session is untouched
+    await cache.hset_fields(session_key, {
+        **_storable(fields),
+        "timestamp": datetime.utcnow().isoformat()
+    }, SESSION_TTL)
+
+async def get_session(user_phone, fields: Optional[List[str]] = None, autodesk_id=None) -> Optional[dict]:
+    session_key = build_session_key(user_phone, autodesk_id)
+    # Reads (all or selected fields) and resets the TTL atomically
+    session = await cache.hget_fields(session_key, fields, SESSION_TTL)
+    return session or None
+
+async def delete_session(user_phone, autodesk_id=None):
+    await cache.delete(build_session_key(user_phone, autodesk_id))
 
 def validate_session_state(session: dict, required_keys: list):
     missing = [k for k in required_keys if not session.get(k)]
     return missing  # returns list of missing keys; empty if all present
-
@@ -1,12 +1,48 @@
-from src.handlers.common_handler import get_session, set_session
+import logging
+from fastapi.responses import JSONResponse
+from src.services import user_service, project_service
+from src.utils.buttons import create_project_buttons
+from src.utils.whatsapp import send_whatsapp_message, send_whatsapp_buttons
+from src.handlers.common_handler import get_session, update_session, hydrate_session
 from src.handlers.common_handler import process_user_request
+from src.handlers.message_handler import add_prefix
+
+logger = logging.getLogger(__name__)
+
+
+async def resolve_project(user_phone_number: str, session: dict):
+    """
+    Continues a request whose user was just clarified: the user buttons are
+    sent before the project is resolved, so it may need its own clarification.
+    """
+    project_name = session["parameters"].get("project_name")
+    matches = await project_service.search_projects_by_name(
+        project_name=project_name,
+        access_token=session["two_legged_token"],
+        account_id=session["user"]["hub_id"]
+    )
+    if not matches or matches["match_count"] == 0:
+        await send_whatsapp_message(user_phone_number, f"No project found named '{project_name}'.")
+        return JSONResponse(content={"message": "Project not found"}, status_code=200)
+
+    if matches["match_count"] > 1:
+        # The stored session already holds the selected user
+        prefixed_projects = add_prefix(matches["matches"], key="project_id", prefix="project::")
+        buttons_payload = create_project_buttons(prefixed_projects, prompt="Please select the correct project:")
+        await send_whatsapp_buttons(user_phone_number, buttons_payload)
+        return JSONResponse(content={"message": "Sent project clarification buttons"}, status_code=200)
+
+    session["selected_project"] = matches["matches"][0]
+    await update_session(user_phone_number, {"selected_project": session["selected_project"]})
+    return await process_user_request(user_phone_number, session)
+
 
 async def handle_button_reply(value: dict):
     try:
         message = value["messages"][0]
         user_phone_number = message["from"]
         interactive = message.get("interactive", {})
-        button_reply = interactive.get("list_reply", {})
+        button_reply = interactive.get("list_reply") or interactive.get("button_reply") or {}
         selected_payload = button_reply.get("id")
 
         if not selected_payload or "::" not in selected_payload:
@@ -14,8 +50,13 @@ async def handle_button_reply(value: dict):
             return JSONResponse(content={"message": "Invalid button format"}, status_code=200)
 
         prefix, actual_value = selected_payload.split("::", 1)
+        # Row ids look like "user_id:user::<id>"; the part after the last ':' is the selection type
+        prefix = prefix.rsplit(":", 1)[-1]
 
-        session = await get_session(user_phone_number)
+        stored_session = await get_session(user_phone_number)
+        # Only a pending clarification (intent and user) can be resumed
+        resumable = stored_session and stored_session.get("intent") and stored_session.get("user")
+        session = await hydrate_session(user_phone_number, stored_session) if resumable else None
         if not session:
             await send_whatsapp_message(user_phone_number, "Your session has expired. Please start again.")
             return JSONResponse(content={"message": "Session expired"}, status_code=200)
@@ -32,6 +73,7 @@ async def handle_button_reply(value: dict):
                 await send_whatsapp_message(user_phone_number, "User not found in selection.")
                 return JSONResponse(content={"message": "User match not found"}, status_code=200)
             session["selected_user"] = selected_user
+            selection = {"selected_user": selected_user}
 
         elif prefix == "project":
             matches = await project_service.search_projects_by_name(
@@ -44,13 +86,16 @@ async def handle_button_reply(value: dict):
                 await send_whatsapp_message(user_phone_number, "Project not found in selection.")
                 return JSONResponse(content={"message": "Project match not found"}, status_code=200)
             session["selected_project"] = selected_project
+            selection = {"selected_project": selected_project}
 
         else:
             await send_whatsapp_message(user_phone_number, "Unrecognized selection type.")
             return JSONResponse(content={"message": "Unrecognized prefix"}, status_code=200)
 
-        # Save updated session and resume
-        await set_session(user_phone_number, session, autodesk_id=session["user"]["autodesk_id"])
+        # Save only the new selection and resume
+        await update_session(user_phone_number, selection)
+        if "selected_project" not in session:
+            return await resolve_project(user_phone_number, session)
         return await process_user_request(user_phone_number, session)
 
     except Exception as e:
@@ -1,19 +1,33 @@
-
 # src/handlers/common_handler.py
+from fastapi.responses import JSONResponse
+from src.core.metrics import FOLLOW_UPS
 from src.integrations.autodesk_api import IssuesAPI
-from src.utils.transformations import format_response
+from src.repositories import postgres_repo
+from src.services import conversation_service, export_service, token_service
+from src.utils.transformations import format_response, should_export
 from src.utils.whatsapp import send_whatsapp_message
 
+from src.core.session import get_session, set_session, update_session
 
-from src.core.cache import cache
-
-SESSION_TTL = 1800  # 30 minutes
-
-async def get_session(phone_number: str) -> dict | None:
-    return await cache.get(f"session:{phone_number}")
 
-async def set_session(phone_number: str, session: dict, autodesk_id: str | None = None):
-    await cache.set(f"session:{phone_number}", session, ttl=SESSION_TTL)
+async def hydrate_session(user_phone_number: str, session: dict) -> dict | None:
+    """
+    Resolves the by-reference parts of a stored session (tenant config and APS
+    tokens) from their shared caches. Returns None if any of them is unavailable.
+    """
+    context = await postgres_repo.get_user_context(user_phone_number)
+    if not context or not context["config"]:
+        return None
+    config = context["config"]
+    three_legged_token, two_legged_token = await token_service.get_tokens(config, session["user"]["autodesk_id"])
+    if not three_legged_token or not two_legged_token:
+        return None
+    return {
+        **session,
+        "config": config,
+        "three_legged_token": three_legged_token,
+        "two_legged_token": two_legged_token,
+    }
 
 
 async def process_user_request(user_phone_number: str, session: dict):
@@ -25,15 +39,55 @@ async def process_user_request(user_phone_number: str, session: dict):
     selected_user = session["selected_user"]
     selected_project = session["selected_project"]
 
-    data = None
+    data, api = None, None
     if intent == "get_issues":
-        api = IssuesAPI(three_legged_token, selected_project["project_id"])
-        data = await api.get_issues({**parameters, "assignee_id": selected_user["user_id"]})
+        api = IssuesAPI(three_legged_token, selected_project["project_id"], hub_id=user["hub_id"])
+        data = await api.get_issues({**parameters, "assignee_id": selected_user["user_id"] if selected_user else None})
+
+    response = await send_result(user_phone_number, intent, data, parameters, api, selected_project)
+    if intent == "get_issues":
+        await conversation_service.remember_result(user_phone_number, parameters, selected_user, selected_project, data)
+    return response
+
 
+async def answer_follow_up(user_phone_number: str, session: dict, last: dict):
+    """
+    Answers a refinement of the user's last issue query. `session` holds the
+    merged parameters and the last query's resolved user and project; tokens
+    are only resolved when the rows have to be fetched again.
+    """
+    parameters = session["parameters"]
+    data = conversation_service.refine(last, parameters)
+    if data is not None:
+        FOLLOW_UPS.labels("local").inc()
+        response = await send_result(user_phone_number, session["intent"], data, parameters, None, session["selected_project"])
+        await conversation_service.remember_result(user_phone_number, parameters, session["selected_user"], session["selected_project"], data)
+        return response
+
+    FOLLOW_UPS.labels("refetched").inc()
+    if not session.get("three_legged_token"):
+        session = await hydrate_session(user_phone_number, session)
+        if not session:
+            await send_whatsapp_message(user_phone_number, "Auth error. Try again later.")
+            return JSONResponse(content={"message": "Token error"}, status_code=200)
+    return await process_user_request(user_phone_number, session)
+
+
+async def send_result(user_phone_number: str, intent: str, data: dict, parameters: dict, api, project: dict):
+    """
+    Replies with the fetched data: large or explicitly exported lists go out as
+    a CSV/XLSX document (falling back to text if that fails), everything else
+    as a formatted text message.
+    """
     if not data or "error" in data:
-        await send_whatsapp_message(user_phone_number, f"Error fetching data: {data.get('error', 'Unknown error')}")
+        await send_whatsapp_message(user_phone_number, f"Error fetching data: {(data or {}).get('error', 'Unknown error')}")
         return JSONResponse(content={"message": "Data fetch error"}, status_code=200)
 
+    # Results refined from cached rows come without an api to stream an export from
+    export_format = should_export(data, parameters) if intent == "get_issues" and api is not None else None
+    if export_format and await export_service.send_issues_export(user_phone_number, api, project, parameters, export_format):
+        return JSONResponse(content={"message": "Export sent"}, status_code=200)
+
     final_message = format_response(intent, data, parameters, count_only=parameters.get("count_only", False))
     await send_whatsapp_message(user_phone_number, final_message)
     return JSONResponse(content={"message": "Success"}, status_code=200)
@@ -4,27 +4,68 @@ import json
 import logging
 import re
 from fastapi.responses import JSONResponse
+from src.core.config import settings
+from src.core.metrics import MESSAGES
+from src.core.profiler import current_profile, profile
+from src.repositories import postgres_repo
+from src.services.sender_filter import registered_senders
+from src.services.admission import BUSY_MESSAGE, admission
 from src.handlers.message_handler import handle_text_message
 from src.handlers.button_handler import handle_button_reply
 
 logger = logging.getLogger(__name__)
 
+
+async def _profiled_hub(phone: str) -> bool:
+    """Whether an admitted message comes from one of PROFILE_HUB_IDS (and is not already profiled)."""
+    if not settings.PROFILE_HUB_IDS or current_profile.get() is not None:
+        return False
+    if not phone or not registered_senders.might_be_registered(phone):
+        return False
+    # The handlers look the same context up next, so this only warms its cache
+    context = await postgres_repo.get_user_context(phone)
+    return bool(context) and context["user"]["hub_id"] in settings.PROFILE_HUB_IDS
+
+
+async def _dispatch(kind: str, value: dict):
+    if kind == "button":
+        return await handle_button_reply(value)
+    return await handle_text_message(value)
+
+
 async def handle_incoming_webhook(body: dict):
     try:
         logger.info(f"Incoming webhook body:\n{json.dumps(body, indent=2)}")
         value = body.get("entry", [{}])[0].get("changes", [{}])[0].get("value", {})
 
         if not value.get("messages"):
+            MESSAGES.labels("status", "ignored").inc()
             return JSONResponse(content={"message": "No messages"}, status_code=200)
 
         message = value["messages"][0]
-        if message.get("interactive"):
-            return await handle_button_reply(value)
+        kind = "button" if message.get("interactive") else "text"
+        admitted, priority, notify = admission.check(message)
+        if not admitted:
+            # Acknowledged with 200 so Meta does not redeliver it into the overload
+            MESSAGES.labels(kind, "shed").inc()
+            logger.warning(f"Shed {priority} {kind} message from {message.get('from')}")
+            if notify:
+                from src.utils.whatsapp import send_whatsapp_message
+                await send_whatsapp_message(message["from"], BUSY_MESSAGE)
+            return JSONResponse(content={"message": "Busy"}, status_code=200)
 
-        return await handle_text_message(value)
+        with admission.admitted():
+            if await _profiled_hub(message.get("from")):
+                async with profile("webhook", "hub", {"sender": message.get("from")}):
+                    response = await _dispatch(kind, value)
+            else:
+                response = await _dispatch(kind, value)
+        MESSAGES.labels(kind, str(response.status_code)).inc()
+        return response
 
     except Exception as e:
         logger.error(f"Webhook error: {e}", exc_info=True)
+        MESSAGES.labels("unknown", "500").inc()
         fallback_phone = (
             body.get("entry", [{}])[0].get("changes", [{}])[0].get("value", {}).get("metadata", {}).get("phone_number_id", "unknown")
         )
@@ -0,0 +1,243 @@
+# src/integrations/acc_filters.py
+#
+# Compiles parsed IssueParams / ReviewParams / FormParams into exact ACC query
+# parameters, so every filter is applied server-side:
+#   - relative dates ("today", "next_week", "overdue", ...) become concrete
+#     YYYY-MM-DD ranges in DEFAULT_TIMEZONE (or the query's "timezone");
+#   - lists become comma-joined filters;
+#   - issue type, review workflow and form template names become IDs using the
+#     project's (cached) catalogs;
+#   - only the fields we display are requested, and count-only queries ask for
+#     a single row and read the total from the pagination block.
+import calendar
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from src.core.config import settings
+
+DateRange = Tuple[Optional[date], Optional[date]]
+
+# Schema value -> ACC value (identity where omitted)
+ISSUE_STATUSES = {"is_pending": "pending"}
+REVIEW_STATUSES = {"open": "OPEN", "closed": "CLOSED", "void": "VOID"}
+FORM_STATUSES = {"in_progress": "inProgress", "in_review": "inReview", "closed": "closed"}
+
+# IssueParams.sort_by -> ACC sortBy
+ISSUE_SORTS = {"due_date": "dueDate", "due_date_desc": "-dueDate", "title": "title", "status": "status", "display_id": "displayId"}
+
+# Fields used by the response formatters
+ISSUE_FIELDS = ("id", "displayId", "title", "status", "dueDate", "assignedTo", "issueTypeId")
+REVIEW_FIELDS = ("id", "sequenceId", "name", "status", "currentStepNumber", "currentStepDueDate", "workflowId")
+FORM_FIELDS = ("id", "formNum", "name", "status", "formDate", "assigneeId", "templateId")
+
+_RELATIVE_DAYS = re.compile(r"^(next|last)_(\d+)_days$")
+_RANGE = re.compile(r"^(\d{4}-\d{2}-\d{2})?\s*(?:\.\.|to)\s*(\d{4}-\d{2}-\d{2})?$")
+
+
+class UnknownFilterValueError(ValueError):
+    """A parameter value that cannot be expressed as an ACC filter (e.g. an unknown issue type)."""
+
+    def __init__(self, field: str, value: Any):
+        super().__init__(f"Unknown {field}: {value!r}")
+        self.field = field
+        self.value = value
+
+
+class CatalogUnavailableError(RuntimeError):
+    """A project catalog needed to compile a filter (e.g. issue types) could not be fetched."""
+
+    def __init__(self, field: str):
+        super().__init__(f"Could not fetch the {field} catalog")
+        self.field = field
+
+
+def today_in(timezone: Optional[str]) -> date:
+    """Current date in the given timezone (DEFAULT_TIMEZONE if None)."""
+    return datetime.now(ZoneInfo(timezone or settings.DEFAULT_TIMEZONE)).date()
+
+
+def _month_bounds(day: date) -> DateRange:
+    return day.replace(day=1), day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def resolve_date_range(value: str, today: date) -> DateRange:
+    """
+    Turns a date expression from the parser into an inclusive (start, end) range;
+    either end may be None for open ranges (e.g. "overdue" has no start).
+    """
+    term = value.strip().lower().replace(" ", "_")
+    week_start = today - timedelta(days=today.weekday())
+    if term == "today":
+        return today, today
+    if term == "tomorrow":
+        return today + timedelta(days=1), today + timedelta(days=1)
+    if term == "yesterday":
+        return today - timedelta(days=1), today - timedelta(days=1)
+    if term == "this_week":
+        return week_start, week_start + timedelta(days=6)
+    if term == "next_week":
+        return week_start + timedelta(days=7), week_start + timedelta(days=13)
+    if term == "last_week":
+        return week_start - timedelta(days=7), week_start - timedelta(days=1)
+    if term == "this_month":
+        return _month_bounds(today)
+    if term == "next_month":
+        return _month_bounds(_month_bounds(today)[1] + timedelta(days=1))
+    if term == "last_month":
+        return _month_bounds(today.replace(day=1) - timedelta(days=1))
+    if term == "overdue":
+        return None, today - timedelta(days=1)
+    if term == "upcoming":
+        return today, None
+    if match := _RELATIVE_DAYS.match(term):
+        days = int(match.group(2))
+        return (today, today + timedelta(days=days)) if match.group(1) == "next" else (today - timedelta(days=days), today)
+    if match := _RANGE.match(value.strip()):
+        start, end = (date.fromisoformat(d) if d else None for d in match.groups())
+        if start or end:
+            return start, end
+    try:
+        single = date.fromisoformat(value.strip())
+        return single, single
+    except ValueError:
+        raise UnknownFilterValueError("date", value)
+
+
+def format_date_range(date_range: DateRange) -> str:
+    start, end = date_range
+    if start and start == end:
+        return start.isoformat()
+    return f"{start.isoformat() if start else ''}..{end.isoformat() if end else ''}"
+
+
+def _join(values: Iterable[str]) -> str:
+    return ",".join(dict.fromkeys(str(v) for v in values))
+
+
+def match_names(field: str, names: List[str], catalog: List[Dict[str, Any]], title_key: str = "title") -> List[Dict[str, Any]]:
+    """
+    Maps user-supplied names onto catalog entries: exact (case-insensitive) match
+    first, then a unique prefix/substring match. Raises UnknownFilterValueError.
+    """
+    matched = []
+    for name in names:
+        wanted = name.strip().casefold()
+        titles = [(entry, str(entry.get(title_key) or "").casefold()) for entry in catalog]
+        exact = [entry for entry, title in titles if title == wanted]
+        partial = [entry for entry, title in titles if wanted and (title.startswith(wanted) or wanted in title)]
+        if exact:
+            matched.extend(exact)
+        elif len(partial) == 1:
+            matched.extend(partial)
+        else:
+            raise UnknownFilterValueError(field, name)
+    return matched
+
+
+def _paging(params: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, str]:
+    if params.get("count_only"):
+        # Only pagination.totalResults is needed
+        return {"limit": "1", "fields": "id"}
+    return {"limit": str(settings.ACC_RESULT_LIMIT), "fields": _join(fields)}
+
+
+def compile_issue_filters(params: Dict[str, Any], assignee_id: Optional[str] = None,
+                          issue_types: Optional[List[Dict[str, Any]]] = None,
+                          today: Optional[date] = None) -> Dict[str, str]:
+    """
+    Builds Issues API query parameters. `issue_types` is the project's catalog
+    (types with nested `subtypes`); names can match either level.
+    """
+    today = today or today_in(None)
+    filters: Dict[str, str] = {}
+    if assignee_id:
+        filters["filter[assignedTo]"] = assignee_id
+    if statuses := params.get("issue_status"):
+        filters["filter[status]"] = _join(ISSUE_STATUSES.get(s, s) for s in statuses)
+    if due_date := params.get("due_date"):
+        filters["filter[dueDate]"] = format_date_range(resolve_date_range(due_date, today))
+    if type_names := params.get("issue_type"):
+        subtypes = [sub for t in issue_types or [] for sub in t.get("subtypes") or []]
+        type_ids, subtype_ids = [], []
+        for name in type_names:
+            try:
+                type_ids.extend(t["id"] for t in match_names("issue_type", [name], issue_types or []))
+            except UnknownFilterValueError:
+                subtype_ids.extend(s["id"] for s in match_names("issue_type", [name], subtypes))
+        if type_ids:
+            filters["filter[issueTypeId]"] = _join(type_ids)
+        if subtype_ids:
+            filters["filter[issueSubtypeId]"] = _join(subtype_ids)
+    filters.update(_paging(params, ISSUE_FIELDS))
+    if not params.get("count_only"):
+        filters["sortBy"] = ISSUE_SORTS[params.get("sort_by") or "due_date"]
+    return filters
+
+
+def compile_review_filters(params: Dict[str, Any], workflows: Optional[List[Dict[str, Any]]] = None,
+                           today: Optional[date] = None) -> Dict[str, str]:
+    """Builds Reviews API query parameters. `workflows` is the project's approval workflow catalog."""
+    today = today or today_in(None)
+    filters: Dict[str, str] = {}
+    if statuses := params.get("review_status"):
+        filters["filter[status]"] = _join(REVIEW_STATUSES.get(s, s) for s in statuses)
+    if due_date := params.get("due_date"):
+        filters["filter[currentStepDueDate]"] = format_date_range(resolve_date_range(due_date, today))
+    if workflow_names := params.get("review_workflow"):
+        filters["filter[workflowId]"] = _join(w["id"] for w in match_names("review_workflow", workflow_names, workflows or [], "name"))
+    if step_number := params.get("step_number"):
+        filters["filter[currentStepNumber]"] = str(step_number)
+    filters.update(_paging(params, REVIEW_FIELDS))
+    return filters
+
+
+def compile_form_filters(params: Dict[str, Any], assignee_id: Optional[str] = None,
+                         templates: Optional[List[Dict[str, Any]]] = None,
+                         today: Optional[date] = None) -> Dict[str, str]:
+    """Builds Forms API query parameters. `templates` is the project's form template catalog."""
+    today = today or today_in(None)
+    filters: Dict[str, str] = {}
+    if assignee_id:
+        filters["assigneeId"] = assignee_id
+    if statuses := params.get("form_status"):
+        filters["statuses"] = _join(FORM_STATUSES.get(s, s) for s in statuses)
+    if created_on := params.get("created_on"):
+        start, end = resolve_date_range(created_on, today)
+        if start:
+            filters["formDateMin"] = start.isoformat()
+        if end:
+            filters["formDateMax"] = end.isoformat()
+    if template_names := params.get("form_template"):
+        filters["templateId"] = _join(t["id"] for t in match_names("form_template", template_names, templates or [], "name"))
+    filters.update(_paging(params, FORM_FIELDS))
+    return filters
+
+
+async def compile_filters(intent: str, params: Dict[str, Any], access_token: str, project_id: str,
+                          assignee_id: Optional[str] = None, timezone: Optional[str] = None) -> Dict[str, str]:
+    """Fetches the catalogs a query needs (cached per project) and compiles its ACC query parameters."""
+    # Imported here because autodesk_api imports this module
+    from src.integrations import autodesk_api
+
+    async def catalog(fetch, field: str) -> Optional[List[Dict[str, Any]]]:
+        if not params.get(field):
+            return None
+        # The cached fetchers return None when the catalog could not be fetched
+        entries = await fetch(access_token, project_id)
+        if entries is None:
+            raise CatalogUnavailableError(field)
+        return entries
+
+    today = today_in(timezone)
+    if intent == "get_issues":
+        issue_types = await catalog(autodesk_api.fetch_issue_types, "issue_type")
+        return compile_issue_filters(params, assignee_id, issue_types, today)
+    if intent == "get_reviews":
+        workflows = await catalog(autodesk_api.fetch_review_workflows, "review_workflow")
+        return compile_review_filters(params, workflows, today)
+    if intent == "get_forms":
+        templates = await catalog(autodesk_api.fetch_form_templates, "form_template")
+        return compile_form_filters(params, assignee_id, templates, today)
+    raise ValueError(f"Unsupported intent: {intent}")
@@ -1,16 +1,69 @@
 # autodesk_api.py
 import httpx
 import logging
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, AsyncIterator, List, Optional, Union
+
+from src.core.cache_aside import cache_aside
+from src.core.config import settings
+from src.core.fair_scheduler import SchedulerTimeout, acc_scheduler
+from src.core.http import http_client
+from src.integrations.acc_filters import CatalogUnavailableError, UnknownFilterValueError, compile_filters, today_in
+from src.utils.aggregation import ISSUE_COLUMNS, GroupedCounter
 
 logger = logging.getLogger(__name__)
 
+ACC_BASE_URL = "https://developer.api.autodesk.com/construction"
+
+
+async def _fetch_catalog(url: str, access_token: str, params: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Fetches every page of a project catalog (issue types, workflows, templates). Raises on error."""
+    headers = {"Authorization": f"Bearer {access_token}"}
+    results: List[Dict[str, Any]] = []
+    offset = 0
+    async with http_client() as client:
+        while True:
+            response = await client.get(url, headers=headers, params={**(params or {}), "limit": 200, "offset": offset})
+            response.raise_for_status()
+            body = response.json()
+            page = body.get("results") or body.get("data") or []
+            results.extend(page)
+            total = (body.get("pagination") or {}).get("totalResults", len(results))
+            if not page or len(results) >= total:
+                return results
+            offset = len(results)
+
+
+@cache_aside("issue_types", key=lambda access_token, project_id: project_id)
+async def fetch_issue_types(access_token: str, project_id: str) -> List[Dict[str, Any]]:
+    """Issue types of a project, each with its `subtypes`."""
+    return await _fetch_catalog(f"{ACC_BASE_URL}/issues/v1/projects/{project_id}/issue-types", access_token, {"include": "subtypes"})
+
+
+@cache_aside("review_workflows", key=lambda access_token, project_id: project_id)
+async def fetch_review_workflows(access_token: str, project_id: str) -> List[Dict[str, Any]]:
+    """Approval workflows of a project."""
+    return await _fetch_catalog(f"{ACC_BASE_URL}/reviews/v1/projects/{project_id}/workflows", access_token)
+
+
+@cache_aside("form_templates", key=lambda access_token, project_id: project_id)
+async def fetch_form_templates(access_token: str, project_id: str) -> List[Dict[str, Any]]:
+    """Form templates of a project."""
+    return await _fetch_catalog(f"{ACC_BASE_URL}/forms/v1/projects/{project_id}/form-templates", access_token)
+
+
+@cache_aside("project_users", key=lambda access_token, project_id: project_id)
+async def fetch_project_users(access_token: str, project_id: str) -> List[Dict[str, Any]]:
+    """Members of a project (name, autodeskId, ...), used to label assignees."""
+    return await _fetch_catalog(f"{ACC_BASE_URL}/admin/v1/projects/{project_id}/users", access_token, {"fields": "name,autodeskId"})
+
 class IssuesAPI:
     BASE_URL = "https://developer.api.autodesk.com/construction/issues/v1"
 
-    def __init__(self, three_legged_token: str, project_id: str):
+    def __init__(self, three_legged_token: str, project_id: str, hub_id: Optional[str] = None):
         self.token = three_legged_token
         self.project_id = project_id
+        # Issue requests take a slot in the per-hub fair scheduler
+        self.hub_id = hub_id
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
@@ -19,21 +72,35 @@ class IssuesAPI:
     async def get_issues(self, parameters: Dict[str, Any]) -> Union[Dict[str, Any], str]:
         """
         Fetches issues with filters: assignee, issue type, status, due date, count_only.
+        `parameters` may carry a resolved `assignee_id` and a `timezone` for
+        relative dates (DEFAULT_TIMEZONE otherwise).
         """
         try:
-            filters = self._build_filters(parameters)
+            if parameters.get("group_by"):
+                return await self.aggregate_issues(parameters)
 
-            async with httpx.AsyncClient() as client:
+            filters = await self._build_filters(parameters)
+
+            async with http_client() as client:
                 url = f"{self.BASE_URL}/projects/{self.project_id}/issues"
-                response = await client.get(url, headers=self.headers, params=filters)
+                async with acc_scheduler.slot(self.hub_id):
+                    response = await client.get(url, headers=self.headers, params=filters)
                 response.raise_for_status()
                 data = response.json()
 
+            total = data.get("pagination", {}).get("totalResults", 0)
             if parameters.get("count_only"):
-                count = data.get("pagination", {}).get("totalResults", 0)
-                return {"status": "success", "count": count}
-            return {"status": "success", "data": data.get("results", [])}
+                return {"status": "success", "count": total}
+            return {"status": "success", "data": data.get("results", []), "total": total}
 
+        except SchedulerTimeout as e:
+            logger.warning(f"Issue fetch not scheduled: {e}")
+            return {"error": "Too many requests from your account right now. Please try again in a minute."}
+        except UnknownFilterValueError as e:
+            return {"error": f"No {e.field.replace('_', ' ')} named '{e.value}' in this project."}
+        except CatalogUnavailableError as e:
+            logger.warning(f"Issue fetch not compiled: {e}")
+            return {"error": f"Couldn't load this project's {e.field.replace('_', ' ')}s right now. Please try again in a minute."}
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error while fetching issues: {e.response.text}")
             return {"error": f"API request failed: {e.response.text}"}
@@ -41,37 +108,98 @@ class IssuesAPI:
             logger.exception("Unexpected error in get_issues")
             return {"error": f"Unexpected error: {str(e)}"}
 
-    def _build_filters(self, parameters: Dict[str, Any]) -> Dict[str, str]:
+    async def iter_issues(self, filters: Dict[str, str], page_size: int = 100, max_rows: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields pages of issues matching already-compiled filters, following
+        offset pagination until totalResults (or max_rows) is reached.
+        """
+        url = f"{self.BASE_URL}/projects/{self.project_id}/issues"
+        offset = 0
+        async with http_client() as client:
+            while True:
+                # One slot per page, so long scans interleave with other hubs' requests
+                async with acc_scheduler.slot(self.hub_id):
+                    response = await client.get(url, headers=self.headers, params={**filters, "limit": str(page_size), "offset": str(offset)})
+                response.raise_for_status()
+                data = response.json()
+                page = data.get("results", [])
+                if page:
+                    yield page
+                offset += len(page)
+                total = data.get("pagination", {}).get("totalResults", offset)
+                if not page or offset >= total or (max_rows and offset >= max_rows):
+                    return
+
+    async def aggregate_issues(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Builds filter dictionary from parsed parameters.
+        Counts issues per `group_by` dimension (status, issue_type, assignee, due)
+        in a single paginated fetch that downloads only the grouped columns.
         """
-        filters = {}
+        group_by = parameters["group_by"]
+        filters = await self._build_filters({**parameters, "count_only": False})
+        filters.pop("sortBy", None)
+        filters["fields"] = ",".join(dict.fromkeys(
+            ["status", *(ISSUE_COLUMNS[dimension] for dimension in group_by)]
+        ))
+
+        counter = GroupedCounter(group_by, ISSUE_COLUMNS, today_in(parameters.get("timezone")))
+        async for page in self.iter_issues(filters, max_rows=settings.ACC_AGGREGATE_MAX_ROWS):
+            counter.add_page(page)
 
-        if assignee_id := parameters.get("assignee_id"):
-            filters["filter[assignedTo]"] = assignee_id
-        if issue_type_id := parameters.get("issue_type_id"):
-            filters["filter[issueTypeId]"] = issue_type_id
-        if status := parameters.get("issue_status"):
-            filters["filter[status]"] = status
-        if due_date := parameters.get("due_date"):
-            filters["filter[dueDate]"] = due_date
+        result = counter.result(await self.labels(group_by))
+        return {"status": "success", "aggregate": result, "truncated": result["total"] >= settings.ACC_AGGREGATE_MAX_ROWS}
 
-        return filters
+    async def iter_matching(self, parameters: Dict[str, Any], max_rows: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields every page of issues matching the parsed parameters (all display
+        fields, in the requested order), for exports. Raises on API errors.
+        """
+        filters = await self._build_filters({**parameters, "count_only": False})
+        filters.pop("limit", None)
+        async for page in self.iter_issues(filters, max_rows=max_rows):
+            yield page
+
+    async def labels(self, dimensions: List[str]) -> Dict[str, Dict[Any, str]]:
+        """
+        Display names for raw IDs per dimension: {"issue_type": {id: title},
+        "assignee": {autodeskId: name}}, from the cached project catalogs.
+        """
+        labels = {}
+        if "issue_type" in dimensions:
+            issue_types = await fetch_issue_types(self.token, self.project_id)
+            labels["issue_type"] = {t.get("id"): t.get("title") for t in issue_types or []}
+        if "assignee" in dimensions:
+            try:
+                users = await fetch_project_users(self.token, self.project_id)
+                labels["assignee"] = {u.get("autodeskId"): u.get("name") for u in users or []}
+            except Exception as e:
+                # Raw IDs are still useful
+                logger.warning(f"Could not load project users for assignee labels: {e}")
+        return labels
+
+    async def _build_filters(self, parameters: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Compiles parsed parameters into exact Issues API query parameters.
+        """
+        return await compile_filters(
+            "get_issues",
+            parameters,
+            self.token,
+            self.project_id,
+            assignee_id=parameters.get("assignee_id"),
+            timezone=parameters.get("timezone"),
+        )
 
     async def get_issue_type_id(self, issue_type_title: str) -> Optional[str]:
         """
         Returns the ID of the issue type given its title.
         """
         try:
-            url = f"{self.BASE_URL}/projects/{self.project_id}/issue-types"
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                data = response.json()
-
-            for issue_type in data.get("results", []):
-                if issue_type.get("title", "").lower() == issue_type_title.lower():
-                    return issue_type.get("id")
+            issue_types = await fetch_issue_types(self.token, self.project_id)
         except Exception as e:
             logger.error(f"Error fetching issue types: {e}")
-        return None
\ No newline at end of file
+            return None
+        for issue_type in issue_types or []:
+            if issue_type.get("title", "").lower() == issue_type_title.lower():
+                return issue_type.get("id")
+        return None
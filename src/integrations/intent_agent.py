@@ -20,14 +20,7 @@ def parse_api_query(intent: Intent, parameters: ParametersUnion) -> dict:
         "parameters": parameters.model_dump()
     }
 
-intent_parser = Agent(
-    model=Gemini(
-        id="gemini-2.0-flash-lite",
-        api_key=settings.GEMINI_API_KEY,
-    ),
-    tools=[parse_api_query],
-    enable_agentic_knowledge_filters=False,
-    instructions="""
+INSTRUCTIONS = """
     You are an expert NLU (Natural Language Understanding) engine for a project management system.
     Your sole purpose is to analyze user input and translate it into a single, structured JSON object that represents the user's intent and any extracted parameters.
     Your response MUST be ONLY the valid JSON object and nothing else. Do not add explanations, notes, or markdown fences like ```json.
@@ -50,7 +43,38 @@ intent_parser = Agent(
 
     User: "Mujhe kitne issues assigned hai"
     {"intent": "get_issues", "parameters": {"assignee_name": "current_user", "count_only": true}}
-    """,
-    debug_mode=False,
-    monitoring=False
-)
+
+    User: "breakdown of open issues in Tower A by type and assignee"
+    {"intent": "get_issues", "parameters": {"project_name": "Tower A", "issue_status": ["open"], "group_by": ["issue_type", "assignee"]}}
+
+    User: "export all issues in Tower A to excel"
+    {"intent": "get_issues", "parameters": {"project_name": "Tower A", "export": "xlsx"}}
+
+    User: "top 5 open issues in Tower A with the latest due date first"
+    {"intent": "get_issues", "parameters": {"project_name": "Tower A", "issue_status": ["open"], "sort_by": "due_date_desc", "limit": 5}}
+
+    Follow-ups may refer to the previous results without naming a person or project; leave those out:
+    User: "only the ones due this week"
+    {"intent": "get_issues", "parameters": {"due_date": "this_week"}}
+    """
+
+
+def build_intent_agent(model_id: str) -> Agent:
+    """Builds the intent-parsing agent on the given Gemini model."""
+    return Agent(
+        model=Gemini(
+            id=model_id,
+            api_key=settings.GEMINI_API_KEY,
+        ),
+        tools=[parse_api_query],
+        enable_agentic_knowledge_filters=False,
+        instructions=INSTRUCTIONS,
+        debug_mode=False,
+        monitoring=False
+    )
+
+
+intent_parser = build_intent_agent(settings.LLM_MODEL)
+# Cheaper/faster model used by the LLM governor when the primary one times out or fails
+fallback_intent_parser = build_intent_agent(settings.LLM_FALLBACK_MODEL) if settings.LLM_FALLBACK_MODEL else None
+
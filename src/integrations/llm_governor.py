@@ -0,0 +1,249 @@
+# src/integrations/llm_governor.py
+#
+# Bounds every intent-parsing LLM call:
+#   - at most LLM_MAX_CONCURRENCY calls in flight per worker; callers wait up to
+#     LLM_QUEUE_TIMEOUT_SECONDS for a slot;
+#   - each call has a hard LLM_TIMEOUT_SECONDS deadline;
+#   - if a call is still running after the LLM_HEDGE_PERCENTILE latency of recent
+#     calls, a second identical request is started (when a slot is free) and the
+#     first to finish wins;
+#   - on timeout/error the message is retried on LLM_FALLBACK_MODEL (if set) and
+#     finally parsed by the local rule-based parser, so a Gemini outage degrades
+#     answers instead of stalling workers.
+#
+# LLM_BACKEND="fake" swaps Gemini for a local backend with configurable latency
+# and error rate, so the whole pipeline can be load-tested offline.
+import asyncio
+import inspect
+import json
+import logging
+import random
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, List, Optional, Tuple
+
+from src.core.config import settings
+from src.core.metrics import register_stats
+from src.services import rule_intent
+from src.utils.incremental_json import IncrementalJSONParser
+
+logger = logging.getLogger(__name__)
+
+ValueCallback = Callable[[tuple, Any], None]
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when neither the LLM nor any fallback produced a parse."""
+
+
+class AgentBackend:
+    """Streams text from an agno Agent."""
+
+    def __init__(self, name: str, agent):
+        self.name = name
+        self.agent = agent
+
+    async def stream(self, text: str) -> AsyncIterator[str]:
+        stream = self.agent.arun(text, stream=True)
+        if inspect.isawaitable(stream):
+            stream = await stream
+        async for event in stream:
+            content = getattr(event, "content", None)
+            if isinstance(content, str) and content:
+                yield content
+
+
+class RuleBackend:
+    """Local keyword parser; answers instantly."""
+
+    name = "rules"
+
+    async def stream(self, text: str) -> AsyncIterator[str]:
+        yield json.dumps(rule_intent.parse(text))
+
+
+class FakeBackend:
+    """Offline stand-in for Gemini: rule-based output streamed in chunks with simulated latency."""
+
+    name = "fake"
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, chunk_size: int = 16):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+
+    async def stream(self, text: str) -> AsyncIterator[str]:
+        body = json.dumps(rule_intent.parse(text))
+        chunks = [body[i:i + self.chunk_size] for i in range(0, len(body), self.chunk_size)]
+        total = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        fail_at = random.randrange(len(chunks)) if random.random() < self.error_rate else None
+        for i, chunk in enumerate(chunks):
+            await asyncio.sleep(total / len(chunks))
+            if i == fail_at:
+                raise RuntimeError("Simulated LLM failure")
+            yield chunk
+
+
+class LatencyTracker:
+    """Rolling window of recent successful call latencies (seconds)."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int) -> Optional[float]:
+        if len(self.samples) < min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMGovernor:
+    def __init__(self, primary, fallbacks: List, max_concurrency: int, queue_timeout: float, timeout: float,
+                 fallback_timeout: float, hedge_percentile: Optional[float], hedge_min_samples: int):
+        self.primary = primary
+        self.fallbacks = fallbacks
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.fallback_timeout = fallback_timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.latency = LatencyTracker()
+        self.in_flight = 0
+        self.stats = {
+            "calls": 0, "succeeded": 0, "timeouts": 0, "errors": 0, "queue_rejections": 0,
+            "hedges": 0, "hedge_wins": 0, "fallbacks": 0, "fallback_failures": 0,
+        }
+
+    async def _attempt(self, backend, text: str, on_value: Optional[ValueCallback]) -> Any:
+        parser = IncrementalJSONParser(on_value=on_value)
+        async for chunk in backend.stream(text):
+            parser.feed(chunk)
+        if not parser.done:
+            raise ValueError(f"Incomplete JSON from {backend.name}")
+        return parser.result
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_percentile:
+            return None
+        return self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    async def _run_primary(self, text: str, on_value: Optional[ValueCallback]) -> Any:
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["queue_rejections"] += 1
+            raise
+        slots = 1
+        self.in_flight += 1
+        started = loop.time()
+        deadline = started + self.timeout
+        hedge_at = self._hedge_delay()
+        first = asyncio.create_task(self._attempt(self.primary, text, on_value))
+        pending = {first}
+        try:
+            while pending:
+                now = loop.time()
+                if now >= deadline:
+                    raise asyncio.TimeoutError()
+                wake_at = deadline if hedge_at is None else min(deadline, started + hedge_at)
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, wake_at - now),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is first:
+                            self.latency.record(loop.time() - started)
+                        else:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    if not pending:
+                        raise task.exception()
+                # Hedge at most once, and only if a slot is free right now (never queue behind other callers)
+                if pending and hedge_at is not None and loop.time() >= started + hedge_at:
+                    hedge_at = None
+                    if not self._semaphore.locked():
+                        await self._semaphore.acquire()
+                        slots += 1
+                        self.stats["hedges"] += 1
+                        pending.add(asyncio.create_task(self._attempt(self.primary, text, on_value)))
+            raise asyncio.TimeoutError()
+        finally:
+            for task in pending:
+                task.cancel()
+            self.in_flight -= 1
+            for _ in range(slots):
+                self._semaphore.release()
+
+    async def parse(self, text: str, on_value: Optional[ValueCallback] = None) -> Tuple[Any, bool]:
+        """
+        Returns (parsed JSON document, from_primary) for a message, streaming
+        members to `on_value` (see IncrementalJSONParser). `from_primary` is False
+        when a fallback answered. Raises LLMUnavailableError if every backend failed.
+        """
+        self.stats["calls"] += 1
+        try:
+            result = await self._run_primary(text, on_value)
+            self.stats["succeeded"] += 1
+            return result, True
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning(f"LLM call timed out or queued too long ({self.primary.name})")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"LLM call failed ({self.primary.name}): {e}")
+        return await self.parse_fallback(text, on_value), False
+
+    async def parse_fallback(self, text: str, on_value: Optional[ValueCallback] = None) -> Any:
+        """
+        Parses with the fallback backends only, in order. Raises
+        LLMUnavailableError if every one failed.
+        """
+        for backend in self.fallbacks:
+            self.stats["fallbacks"] += 1
+            try:
+                return await asyncio.wait_for(self._attempt(backend, text, on_value), self.fallback_timeout)
+            except Exception as e:
+                self.stats["fallback_failures"] += 1
+                logger.warning(f"LLM fallback {backend.name} failed: {e!r}")
+        raise LLMUnavailableError("No intent parser backend succeeded")
+
+    def get_stats(self) -> dict:
+        hedge_delay = self._hedge_delay()
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "hedge_delay_ms": round(hedge_delay * 1000, 1) if hedge_delay is not None else None,
+        }
+
+
+def _build_governor() -> LLMGovernor:
+    if settings.LLM_BACKEND == "fake":
+        primary = FakeBackend(settings.LLM_FAKE_LATENCY_MS, settings.LLM_FAKE_JITTER_MS, settings.LLM_FAKE_ERROR_RATE)
+        fallbacks = [RuleBackend()]
+    else:
+        # Imported lazily so the fake backend works without agno/Gemini credentials
+        from src.integrations.intent_agent import fallback_intent_parser, intent_parser
+
+        primary = AgentBackend(settings.LLM_MODEL, intent_parser)
+        fallbacks = [AgentBackend(settings.LLM_FALLBACK_MODEL, fallback_intent_parser)] if fallback_intent_parser else []
+        fallbacks.append(RuleBackend())
+    return LLMGovernor(
+        primary,
+        fallbacks,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        fallback_timeout=settings.LLM_FALLBACK_TIMEOUT_SECONDS,
+        hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+        hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+    )
+
+
+llm_governor = _build_governor()
+register_stats("llm_governor", llm_governor.get_stats)
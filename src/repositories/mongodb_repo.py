@@ -1,39 +1,42 @@
 # Connect and query Mongo DB
 from typing import Optional, Dict
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 import logging
-from src.core.cache import cache 
+from src.core.cache_aside import cache_aside
+from src.core.metrics import observe_dependency
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Records the latency of every Mongo command by command name."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        observe_dependency("mongo", event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        observe_dependency("mongo", f"{event.command_name}_failed", event.duration_micros / 1e6)
+
+
+COMMAND_METRICS = CommandMetrics()
 
 async def get_aps_collection(mongo_uri: str):
     """Creates a client and returns the specific collection on-demand."""
-    client = AsyncIOMotorClient(mongo_uri)
+    client = AsyncIOMotorClient(mongo_uri, event_listeners=[COMMAND_METRICS])
     db = client["test"]
     return db.get_collection("aps_tokens")
 
+@cache_aside("aps_token", key=lambda mongo_uri, autodesk_id: autodesk_id)
 async def get_aps_token(mongo_uri: str, autodesk_id: str) -> Optional[Dict]:
     """
     Retrieve the APS token document for the given Autodesk ID.
-    Caches the result for 5 minutes.
+    Cached per settings.CACHE_TTLS["aps_token"].
     """
-    # 1. Try to fetch the result from the cache first
-    cached_token = await cache.get(f"aps_token:{autodesk_id}")
-    if cached_token:
-        logging.info(f"Cache HIT for aps_token:{autodesk_id}")
-        return cached_token
-
-    # 2. If not in cache, query the database
-    logging.info(f"Cache MISS for aps_token:{autodesk_id}")
-    try:
-        aps_collection = await get_aps_collection(mongo_uri)
-        doc = await aps_collection.find_one({"autodesk_id": autodesk_id})
-        
-        # 3. Store the result in the cache before returning
-        if doc:
-            await cache.set(f"aps_token:{autodesk_id}", doc)
-        return doc
-    except Exception as e:
-        logging.error(f"Error fetching APS token for {autodesk_id}: {e}")
-        return None
+    aps_collection = await get_aps_collection(mongo_uri)
+    # Mongo's _id (ObjectId) is never used and does not survive cache encoding
+    return await aps_collection.find_one({"autodesk_id": autodesk_id}, {"_id": 0})
 
 async def upsert_aps_token(mongo_uri: str, token_doc: Dict) -> bool:
     """
@@ -55,11 +58,11 @@ async def upsert_aps_token(mongo_uri: str, token_doc: Dict) -> bool:
         )
         
         # 2. Update the cache with the new document
-        await cache.set(f"aps_token:{autodesk_id}", token_doc)
+        await get_aps_token.store(token_doc, mongo_uri, autodesk_id)
         logging.info(f"Successfully upserted and cached token for {autodesk_id}")
         return True
     except Exception as e:
         logging.error(f"Error upserting APS token for {autodesk_id}: {e}")
         # 3. Invalidate cache on error to prevent stale data
-        await cache.delete(f"aps_token:{autodesk_id}")
+        await get_aps_token.invalidate(mongo_uri, autodesk_id)
         return False
\ No newline at end of file
@@ -1,99 +1,337 @@
 # Connect and query PostgreSQL DB
+import asyncio
 import logging
-from typing import Optional, Dict
+import time
+from typing import AsyncIterator, Optional, Dict, List
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy import text
+from sqlalchemy import event, text
 from sqlalchemy.orm import sessionmaker
 from src.core.config import settings
-from src.core.cache import cache 
+from src.core.cache_aside import cache_aside, read_many
+from src.core.metrics import observe_dependency
 
 engine = create_async_engine(
     settings.POSTGRES_DSN,
     echo=False,
+    pool_size=settings.POSTGRES_POOL_SIZE,
+    max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+    pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+    pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={
+        # SQLAlchemy's asyncpg adapter keeps its own LRU of prepared statements
+        # per connection; asyncpg has a second cache underneath it.
+        "prepared_statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE,
+    },
 )
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _observe_query(conn, statement: str):
+    started = conn.info.get("query_started")
+    if started:
+        # Labelled by statement kind (select/insert/...) to keep cardinality bounded
+        observe_dependency("postgres", statement.lstrip().split(None, 1)[0].lower(), time.perf_counter() - started.pop())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _observe_query(conn, statement)
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; record it here so its
+    # start time does not linger on the pooled connection
+    if exception_context.connection is not None and exception_context.statement:
+        _observe_query(exception_context.connection, exception_context.statement)
+
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
 
+@cache_aside("user_phone", key=lambda phone_number: phone_number)
 async def get_user_by_phone(phone_number: str) -> Optional[Dict]:
     """
     Fetch a user record by phone number from the 'users' table.
-    Caches the result for 5 minutes.
+    Cached per settings.CACHE_TTLS["user_phone"] (unknown numbers are negatively cached).
     Returns a dict with keys: autodesk_id, first_name, hub_id.
     """
-    # 1. Try to fetch the result from the cache first
-    cached_user = await cache.get(f"user_phone:{phone_number}")
-    if cached_user:
-        logging.info(f"Cache HIT for user_phone:{phone_number}")
-        return cached_user
-
-    # 2. If not in cache, query the database
-    logging.info(f"Cache MISS for user_phone:{phone_number}")
     async with AsyncSessionLocal() as session:
-        try:
-            result = await session.execute(
-                text("""
-                SELECT autodesk_id, first_name, hub_id
-                FROM users
-                WHERE phone_number = :phone
-                LIMIT 1
-                """),
-                {"phone": phone_number}
-            )
-            row = result.fetchone()
-            if row:
-                user_data = {
-                    "autodesk_id": row[0],
-                    "first_name": row[1],
-                    "hub_id": row[2],
-                    "phone_number": phone_number
-                }
-                # 3. Store the result in the cache before returning
-                await cache.set(f"user_phone:{phone_number}", user_data)
-                return user_data
-            return None
-        except Exception as e:
-            logging.error(f"Error fetching user by phone {phone_number}: {e}")
-            return None
+        result = await session.execute(
+            text("""
+            SELECT autodesk_id, first_name, hub_id
+            FROM users
+            WHERE phone_number = :phone
+            LIMIT 1
+            """),
+            {"phone": phone_number}
+        )
+        row = result.fetchone()
+        if row:
+            return {
+                "autodesk_id": row[0],
+                "first_name": row[1],
+                "hub_id": row[2],
+                "phone_number": phone_number
+            }
+        return None
 
+@cache_aside("company_config", key=lambda hub_id: hub_id)
 async def get_company_config(hub_id: str) -> Optional[Dict]:
     """
     Fetch company configuration by hub_id from the 'company_configs' table.
-    Caches the result for 5 minutes.
+    Cached per settings.CACHE_TTLS["company_config"].
     Returns a dict with keys: mongodb_uri, client_id, client_secret.
     """
-    # 1. Try to fetch the result from the cache first
-    cached_config = await cache.get(f"company_config:{hub_id}")
-    if cached_config:
-        logging.info(f"Cache HIT for company_config:{hub_id}")
-        return cached_config
-
-    # 2. If not in cache, query the database
-    logging.info(f"Cache MISS for company_config:{hub_id}")
     async with AsyncSessionLocal() as session:
-        try:
+        result = await session.execute(
+            text("""
+            SELECT mongodb_uri, client_id, client_secret
+            FROM company_configs
+            WHERE hub_id = :hub_id
+            LIMIT 1
+            """),
+            {"hub_id": str(hub_id)}
+        )
+        row = result.fetchone()
+        if row:
+            return {
+                "mongodb_uri": row[0],
+                "client_id": row[1],
+                "client_secret": row[2],
+            }
+        return None
+
+
+USER_CONTEXT_SQL = text("""
+    SELECT u.autodesk_id, u.first_name, u.hub_id, u.phone_number,
+           c.mongodb_uri, c.client_id, c.client_secret
+    FROM users u
+    LEFT JOIN company_configs c ON c.hub_id = u.hub_id
+    WHERE u.phone_number = :phone
+    LIMIT 1
+""")
+
+USER_CONTEXTS_SQL = text("""
+    SELECT DISTINCT ON (u.phone_number)
+           u.autodesk_id, u.first_name, u.hub_id, u.phone_number,
+           c.mongodb_uri, c.client_id, c.client_secret
+    FROM users u
+    LEFT JOIN company_configs c ON c.hub_id = u.hub_id
+    WHERE u.phone_number = ANY(:phones)
+    ORDER BY u.phone_number
+""")
+
+
+def _row_to_context(row) -> Dict:
+    """Splits a joined users/company_configs row into user and config dicts."""
+    user_data = {
+        "autodesk_id": row[0],
+        "first_name": row[1],
+        "hub_id": row[2],
+        "phone_number": row[3],
+    }
+    config_data = None
+    if row[4] is not None or row[5] is not None:
+        config_data = {
+            "mongodb_uri": row[4],
+            "client_id": row[5],
+            "client_secret": row[6],
+        }
+    return {"user": user_data, "config": config_data}
+
+
+@cache_aside("user_context", key=lambda phone_number: phone_number)
+async def get_user_context(phone_number: str) -> Optional[Dict]:
+    """
+    Fetch a user together with its company configuration in a single query.
+    Cached per settings.CACHE_TTLS["user_context"] (unknown numbers are negatively cached).
+    Returns a dict with keys: user, config (config is None when the hub has
+    no company_configs row), or None if the phone number is not registered.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(USER_CONTEXT_SQL, {"phone": phone_number})
+        row = result.fetchone()
+        return _row_to_context(row) if row else None
+
+
+async def get_user_contexts(phone_numbers: List[str], chunk_size: int = 500) -> Dict[str, Dict]:
+    """
+    Bulk variant of get_user_context for warmup and broadcast jobs.
+    Cached contexts are read with a single MGET; the rest are loaded with one
+    query per chunk and written back with a single pipelined MSET per chunk.
+    Returns a dict mapping phone number -> context; unknown numbers are omitted.
+    """
+    contexts: Dict[str, Dict] = {}
+    unique_phones = list(dict.fromkeys(p for p in phone_numbers if p))
+    if not unique_phones:
+        return contexts
+
+    # Serve what is already cached with one MGET, only query the rest
+    cached_contexts = await read_many([get_user_context.key_for(phone) for phone in unique_phones])
+    missing_phones = []
+    for phone, cached_context in zip(unique_phones, cached_contexts):
+        if cached_context:
+            contexts[phone] = cached_context
+        else:
+            missing_phones.append(phone)
+
+    async with AsyncSessionLocal() as session:
+        for start in range(0, len(missing_phones), chunk_size):
+            chunk = missing_phones[start:start + chunk_size]
+            try:
+                result = await session.execute(USER_CONTEXTS_SQL, {"phones": chunk})
+                loaded = {row[3]: _row_to_context(row) for row in result.fetchall()}
+            except Exception as e:
+                logging.error(f"Error bulk fetching user contexts ({len(chunk)} phones): {e}")
+                # The failed statement aborts the transaction; later chunks need a fresh one
+                await session.rollback()
+                continue
+            contexts.update(loaded)
+            await get_user_context.store_many({
+                get_user_context.key_for(phone): context for phone, context in loaded.items()
+            })
+
+    logging.info(f"Preloaded {len(contexts)}/{len(unique_phones)} user contexts.")
+    return contexts
+
+
+async def list_company_configs(limit: int = 1000) -> Dict[str, Dict]:
+    """
+    Company configurations of hubs that have registered users, largest hubs
+    first (used to warm caches at startup). Returns hub_id -> config dict.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("""
+            SELECT c.hub_id, c.mongodb_uri, c.client_id, c.client_secret
+            FROM company_configs c
+            JOIN users u ON u.hub_id = c.hub_id
+            GROUP BY c.hub_id, c.mongodb_uri, c.client_id, c.client_secret
+            ORDER BY count(*) DESC
+            LIMIT :limit
+            """),
+            {"limit": limit}
+        )
+        return {
+            row[0]: {"mongodb_uri": row[1], "client_id": row[2], "client_secret": row[3]}
+            for row in result.fetchall()
+        }
+
+
+async def open_connections(count: int) -> int:
+    """Checks out `count` pooled connections at once so they are open before traffic arrives."""
+    async def checkout():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    results = await asyncio.gather(*(checkout() for _ in range(count)), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        raise failures[0]
+    return count
+
+
+async def close():
+    """Closes every pooled connection."""
+    await engine.dispose()
+
+
+DIGEST_SUBSCRIPTIONS_DDL = text("""
+    CREATE TABLE IF NOT EXISTS digest_subscriptions (
+        phone_number TEXT NOT NULL,
+        project_id TEXT NOT NULL,
+        project_name TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (phone_number, project_id)
+    )
+""")
+
+
+_digest_table_ready = False
+
+
+async def ensure_digest_subscriptions_table():
+    """Creates the digest_subscriptions table if it does not exist yet (once per process)."""
+    global _digest_table_ready
+    if _digest_table_ready:
+        return
+    async with engine.begin() as connection:
+        await connection.execute(DIGEST_SUBSCRIPTIONS_DDL)
+    _digest_table_ready = True
+
+
+async def subscribe_digest(phone_number: str, project_id: str, project_name: str) -> bool:
+    """Subscribes a user to the daily digest of a project. Returns False if already subscribed."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("""
+            INSERT INTO digest_subscriptions (phone_number, project_id, project_name)
+            VALUES (:phone, :project_id, :project_name)
+            ON CONFLICT (phone_number, project_id) DO NOTHING
+            """),
+            {"phone": phone_number, "project_id": project_id, "project_name": project_name}
+        )
+        await session.commit()
+        return result.rowcount > 0
+
+
+async def unsubscribe_digest(phone_number: str, project_id: Optional[str] = None) -> int:
+    """Removes one project subscription, or all of a user's when project_id is None. Returns the rows removed."""
+    async with AsyncSessionLocal() as session:
+        if project_id is None:
+            result = await session.execute(
+                text("DELETE FROM digest_subscriptions WHERE phone_number = :phone"), {"phone": phone_number}
+            )
+        else:
             result = await session.execute(
-                text("""
-                SELECT mongodb_uri, client_id, client_secret
-                FROM company_configs
-                WHERE hub_id = :hub_id
-                LIMIT 1
-                """),
-                {"hub_id": str(hub_id)}
+                text("DELETE FROM digest_subscriptions WHERE phone_number = :phone AND project_id = :project_id"),
+                {"phone": phone_number, "project_id": project_id}
             )
-            row = result.fetchone()
-            if row:
-                config_data = {
-                    "mongodb_uri": row[0],
-                    "client_id": row[1],
-                    "client_secret": row[2],
-                }
-                # 3. Store the result in the cache before returning
-                await cache.set(f"company_config:{hub_id}", config_data)
-                return config_data
-            return None
-        except Exception as e:
-            logging.error(f"Error fetching company config for hub_id {hub_id}: {e}")
-            return None
\ No newline at end of file
+        await session.commit()
+        return result.rowcount
+
+
+async def iter_digest_subscriptions(batch_size: int = 1000) -> AsyncIterator[Dict]:
+    """
+    Streams digest subscriptions of registered users with a company config,
+    ordered by project, each as {"project_id", "project_name", "user", "config"}.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            text("""
+            SELECT s.project_id, s.project_name,
+                   u.autodesk_id, u.first_name, u.hub_id, u.phone_number,
+                   c.mongodb_uri, c.client_id, c.client_secret
+            FROM digest_subscriptions s
+            JOIN users u ON u.phone_number = s.phone_number
+            JOIN company_configs c ON c.hub_id = u.hub_id
+            ORDER BY s.project_id, u.phone_number
+            """).execution_options(yield_per=batch_size)
+        )
+        async for row in result:
+            yield {"project_id": row[0], "project_name": row[1], **_row_to_context(row[2:])}
+
+
+async def count_registered_phone_numbers() -> int:
+    """Returns the number of users with a phone number (used to size the sender filter)."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("SELECT count(*) FROM users WHERE phone_number IS NOT NULL"))
+        return result.scalar() or 0
+
+
+async def iter_registered_phone_numbers(batch_size: int = 5000) -> AsyncIterator[str]:
+    """Streams every registered users.phone_number with a server-side cursor."""
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            text("SELECT phone_number FROM users WHERE phone_number IS NOT NULL").execution_options(yield_per=batch_size)
+        )
+        async for row in result:
+            yield row[0]
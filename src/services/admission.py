@@ -0,0 +1,164 @@
+# src/services/admission.py
+"""
+Admission control for incoming WhatsApp messages.
+
+Every message is classified before any lookup is made:
+
+- "high": button replies, which finish a conversation that already paid for
+  its parse;
+- "normal": text queries;
+- "low": greetings/thanks recognised by the local fast-intent classifier;
+- "repeat": the same text from the same sender within
+  ADMISSION_REPEAT_SECONDS (a Meta redelivery, or a user re-sending while
+  waiting).
+
+The load level comes from the number of messages being processed and the
+p90 latency of recently finished ones. When elevated (in flight above
+ADMISSION_SOFT_LIMIT or p90 above ADMISSION_LATENCY_TARGET_SECONDS), repeats
+and low-priority messages are shed. When saturated (in flight at
+ADMISSION_MAX_IN_FLIGHT or p90 above twice the target), normal messages are
+shed too; button replies are only shed at the hard in-flight cap. A shed
+message is acknowledged to Meta with 200, so it is not redelivered. The
+sender gets a short "busy" reply at most once per
+ADMISSION_BUSY_REPLY_INTERVAL_SECONDS; repeats are dropped silently.
+"""
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+from src.core.config import settings
+from src.core.metrics import ADMISSION_DECISIONS, register_stats
+from src.services.fast_intent import classify
+from src.services.intent_cache import normalize
+
+logger = logging.getLogger(__name__)
+
+HIGH, NORMAL, LOW, REPEAT = "high", "normal", "low", "repeat"
+NORMAL_LOAD, ELEVATED, SATURATED = 0, 1, 2
+
+BUSY_MESSAGE = "We're handling a lot of requests right now. Please try again in a minute."
+
+
+class AdmissionController:
+    def __init__(self):
+        self.in_flight = 0
+        # (finished_at, seconds) of recently completed messages
+        self._latencies: Deque[Tuple[float, float]] = deque()
+        self._p90: Optional[float] = None
+        self._p90_at = 0.0
+        # sender -> (fingerprint, seen_at), least recently seen first
+        self._recent: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._busy_replied: "OrderedDict[str, float]" = OrderedDict()
+        self.stats = {"admitted": 0, "shed": 0, "busy_replies": 0}
+
+    # --- load signal ---------------------------------------------------------
+
+    def _recent_p90(self, now: float) -> Optional[float]:
+        """p90 latency over the last ADMISSION_WINDOW_SECONDS, recomputed at most every 0.5 s."""
+        if now - self._p90_at < 0.5:
+            return self._p90
+        horizon = now - settings.ADMISSION_WINDOW_SECONDS
+        while self._latencies and self._latencies[0][0] < horizon:
+            self._latencies.popleft()
+        ordered = sorted(seconds for _, seconds in self._latencies)
+        self._p90 = ordered[int(0.9 * (len(ordered) - 1))] if len(ordered) >= settings.ADMISSION_MIN_SAMPLES else None
+        self._p90_at = now
+        return self._p90
+
+    def load_level(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        p90 = self._recent_p90(now)
+        target = settings.ADMISSION_LATENCY_TARGET_SECONDS
+        if self.in_flight >= settings.ADMISSION_MAX_IN_FLIGHT or (p90 is not None and p90 > 2 * target):
+            return SATURATED
+        if self.in_flight >= settings.ADMISSION_SOFT_LIMIT or (p90 is not None and p90 > target):
+            return ELEVATED
+        return NORMAL_LOAD
+
+    # --- classification ------------------------------------------------------
+
+    def _is_repeat(self, sender: str, fingerprint: str, now: float) -> bool:
+        previous = self._recent.get(sender)
+        self._recent[sender] = (fingerprint, now)
+        self._recent.move_to_end(sender)
+        while len(self._recent) > settings.ADMISSION_TRACKED_SENDERS:
+            self._recent.popitem(last=False)
+        return previous is not None and previous[0] == fingerprint and now - previous[1] < settings.ADMISSION_REPEAT_SECONDS
+
+    def priority(self, message: dict, now: float) -> str:
+        sender = message.get("from", "")
+        if message.get("interactive"):
+            # Recorded so a text re-sent after a button reply is not mistaken for a repeat
+            self._is_repeat(sender, f"id:{message.get('id')}", now)
+            return HIGH
+        text = (message.get("text") or {}).get("body", "")
+        if self._is_repeat(sender, f"text:{normalize(text)}", now):
+            return REPEAT
+        intent, confidence = classify(text)
+        if intent is not None and confidence >= settings.FAST_INTENT_MIN_CONFIDENCE:
+            return LOW
+        return NORMAL
+
+    # --- decisions -----------------------------------------------------------
+
+    def check(self, message: dict) -> Tuple[bool, str, bool]:
+        """
+        Returns (admitted, priority, send_busy_reply). Admitted messages must be
+        processed inside `admitted()` so they count towards the load.
+        """
+        if not settings.ADMISSION_ENABLED:
+            return True, NORMAL, False
+        now = time.monotonic()
+        priority = self.priority(message, now)
+        level = self.load_level(now)
+        if priority == HIGH:
+            shed = self.in_flight >= settings.ADMISSION_MAX_IN_FLIGHT
+        elif priority == NORMAL:
+            shed = level >= SATURATED
+        else:
+            shed = level >= ELEVATED
+
+        ADMISSION_DECISIONS.labels(priority, "shed" if shed else "admitted").inc()
+        if not shed:
+            self.stats["admitted"] += 1
+            return True, priority, False
+        self.stats["shed"] += 1
+        return False, priority, priority != REPEAT and self._may_reply(message.get("from", ""), now)
+
+    def _may_reply(self, sender: str, now: float) -> bool:
+        last = self._busy_replied.get(sender)
+        if last is not None and now - last < settings.ADMISSION_BUSY_REPLY_INTERVAL_SECONDS:
+            return False
+        self._busy_replied[sender] = now
+        self._busy_replied.move_to_end(sender)
+        while len(self._busy_replied) > settings.ADMISSION_TRACKED_SENDERS:
+            self._busy_replied.popitem(last=False)
+        self.stats["busy_replies"] += 1
+        return True
+
+    @contextmanager
+    def admitted(self) -> Iterator[None]:
+        """Counts an admitted message as in flight and records its latency."""
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            finished = time.monotonic()
+            self._latencies.append((finished, finished - started))
+
+    def get_stats(self) -> Dict[str, float]:
+        p90 = self._recent_p90(time.monotonic())
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "load_level": self.load_level(),
+            "recent_p90_seconds": p90 if p90 is not None else 0.0,
+        }
+
+
+admission = AdmissionController()
+register_stats("admission", admission.get_stats)
@@ -0,0 +1,211 @@
+# src/services/conversation_service.py
+"""
+Follow-up refinements of the last issue list in a conversation.
+
+After every issue query the conversation keeps the query's parameters, the
+resolved user and project and, when the fetch returned every matching row
+(total <= ACC_RESULT_LIMIT), the rows themselves. A follow-up such as "only
+the overdue ones", "sort by due date" or "top 5" inherits whatever it does not
+mention from that query. When its filters select a subset of the previous
+ones (same people, project and issue types; statuses and due range at most as
+wide) it is answered from the cached rows with no API call; otherwise it is
+fetched again with the previous query's resolved user and project, so only
+the fetch is repeated.
+
+`parse_refinement` recognises common follow-ups with keyword rules so they
+skip intent parsing too; anything else goes through the normal pipeline.
+"""
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from src.core.cache import cache
+from src.core.config import settings
+from src.core.session import SESSION_TTL
+from src.integrations.acc_filters import ISSUE_STATUSES, DateRange, resolve_date_range, today_in
+from src.services.intent_cache import normalize
+from src.services.rule_intent import COUNT_WORDS, DATE_PHRASES, STATUS_WORDS
+
+# Kept apart from the session hash, which button replies resume, and with the same lifetime
+LAST_RESULT_KEY = "last_result:{}"
+
+# Parameters a follow-up inherits unless it sets them; the rest (count_only,
+# group_by, export, limit) only describe the reply they came with
+INHERITED_FIELDS = ("assignee_name", "project_name", "issue_status", "due_date", "issue_type", "sort_by")
+# Filters that only carry over while the follow-up stays with the same person and project
+SCOPED_FIELDS = ("issue_status", "due_date", "issue_type")
+
+SORT_PHRASES = {
+    "by due date": "due_date", "soonest first": "due_date", "earliest first": "due_date",
+    "latest first": "due_date_desc", "latest due date first": "due_date_desc", "furthest first": "due_date_desc",
+    "by title": "title", "by name": "title", "alphabetically": "title",
+    "sort by status": "status", "by issue number": "display_id", "by number": "display_id",
+}
+# Drop the status and due date filters of the previous query
+CLEAR_PHRASES = ("all", "all of them", "everything", "any status", "clear filters", "sab")
+# "done" is far more often an acknowledgement than a status filter
+REFINEMENT_STATUSES = {phrase: status for phrase, status in STATUS_WORDS["get_issues"].items() if phrase != "done"}
+# Words that may pad a follow-up without changing it
+FILLER = {
+    "only", "just", "sirf", "the", "ones", "one", "those", "these", "them", "that", "which", "are", "is",
+    "show", "me", "give", "list", "please", "pls", "plz", "now", "and", "then", "issues", "issue", "of",
+    "sort", "sorted", "order", "ordered", "by", "with", "status", "due", "what", "about", "instead",
+    "too", "also", "wale", "wala", "waale", "ke", "ki", "filter", "to", "a",
+}
+_LIMIT = re.compile(r"\b(?:top|first)\s+(\d+)\b")
+
+
+def _take(text: str, phrase: str) -> Optional[str]:
+    """`text` with `phrase` removed, or None if it does not contain it."""
+    pattern = rf"\b{re.escape(phrase)}\b"
+    return re.sub(pattern, " ", text) if re.search(pattern, text) else None
+
+
+def parse_refinement(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the parameters a follow-up message changes (e.g. {"due_date":
+    "overdue"}), or None when the message is not made up only of refinement
+    phrases and filler words. Cleared filters are returned as explicit
+    empty values.
+    """
+    remainder = normalize(text)
+    changes: Dict[str, Any] = {}
+    if match := _LIMIT.search(remainder):
+        changes["limit"] = max(1, int(match.group(1)))
+        remainder = remainder[:match.start()] + " " + remainder[match.end():]
+    for phrase in sorted(SORT_PHRASES, key=len, reverse=True):
+        if (stripped := _take(remainder, phrase)) is not None:
+            changes["sort_by"], remainder = SORT_PHRASES[phrase], stripped
+            break
+    for phrase in sorted(CLEAR_PHRASES, key=len, reverse=True):
+        if (stripped := _take(remainder, phrase)) is not None:
+            changes.update({"issue_status": [], "due_date": None})
+            remainder = stripped
+    statuses = []
+    for phrase in sorted(REFINEMENT_STATUSES, key=len, reverse=True):
+        if (stripped := _take(remainder, phrase)) is not None:
+            statuses.append(REFINEMENT_STATUSES[phrase])
+            remainder = stripped
+    if statuses:
+        changes["issue_status"] = sorted(set(statuses))
+    for phrase in sorted(DATE_PHRASES, key=len, reverse=True):
+        if (stripped := _take(remainder, phrase)) is not None:
+            changes["due_date"], remainder = DATE_PHRASES[phrase], stripped
+            break
+    for phrase in COUNT_WORDS:
+        if (stripped := _take(remainder, phrase)) is not None:
+            changes["count_only"], remainder = True, stripped
+
+    if not changes or any(word not in FILLER for word in remainder.split()):
+        return None
+    return changes
+
+
+def follow_up_parameters(previous: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The previous query's inherited parameters with the follow-up's changes
+    applied. Naming another person or project starts from fresh filters.
+    """
+    inherited = {field: previous.get(field) for field in INHERITED_FIELDS}
+    if any(changes.get(field) and changes[field] != previous.get(field) for field in ("assignee_name", "project_name")):
+        inherited.update({field: None for field in SCOPED_FIELDS})
+    return {**inherited, **changes}
+
+
+def _date_range(value: Optional[str], today: date) -> Optional[DateRange]:
+    try:
+        return resolve_date_range(value, today) if value else (None, None)
+    except ValueError:
+        return None
+
+
+def is_narrower(previous: Dict[str, Any], current: Dict[str, Any], today: date) -> bool:
+    """
+    True when every issue matching `current` also matches `previous` (for the
+    same assignee and project): the same issue types, statuses within the
+    previous ones and a due range inside the previous one.
+    """
+    if sorted(current.get("issue_type") or []) != sorted(previous.get("issue_type") or []):
+        return False
+    previous_statuses, statuses = set(previous.get("issue_status") or []), set(current.get("issue_status") or [])
+    if previous_statuses and not (statuses and statuses <= previous_statuses):
+        return False
+    previous_range, current_range = _date_range(previous.get("due_date"), today), _date_range(current.get("due_date"), today)
+    if previous_range is None or current_range is None:
+        return False
+    (previous_start, previous_end), (start, end) = previous_range, current_range
+    if previous_start and (start is None or start < previous_start):
+        return False
+    if previous_end and (end is None or end > previous_end):
+        return False
+    return True
+
+
+def _due(issue: Dict[str, Any]) -> Optional[date]:
+    try:
+        return date.fromisoformat(issue["dueDate"][:10]) if issue.get("dueDate") else None
+    except ValueError:
+        return None
+
+
+def sort_issues(issues: List[Dict[str, Any]], sort_by: Optional[str]) -> List[Dict[str, Any]]:
+    """Orders rows like the API's sortBy; rows without a value go last."""
+    sort_by = sort_by or "due_date"
+    field = {"due_date": "dueDate", "due_date_desc": "dueDate", "title": "title", "status": "status", "display_id": "displayId"}[sort_by]
+    present = [issue for issue in issues if issue.get(field) not in (None, "")]
+    missing = [issue for issue in issues if issue.get(field) in (None, "")]
+
+    def key(issue):
+        value = issue[field]
+        return value.casefold() if isinstance(value, str) else value
+
+    return sorted(present, key=key, reverse=sort_by == "due_date_desc") + missing
+
+
+def refine(last: Dict[str, Any], parameters: Dict[str, Any], today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Answers `parameters` from the last result's cached rows, in the same shape
+    as IssuesAPI.get_issues. Returns None when that needs a fetch: no complete
+    rows (or rows from another day), a breakdown or export, or wider filters.
+    """
+    today = today or today_in(None)
+    if last.get("rows") is None or last.get("day") != today.isoformat():
+        return None
+    if parameters.get("group_by") or parameters.get("export") or not is_narrower(last["parameters"], parameters, today):
+        return None
+
+    issues = last["rows"]
+    if statuses := parameters.get("issue_status"):
+        wanted = {ISSUE_STATUSES.get(status, status) for status in statuses}
+        issues = [issue for issue in issues if issue.get("status") in wanted]
+    if parameters.get("due_date"):
+        start, end = resolve_date_range(parameters["due_date"], today)
+        issues = [
+            issue for issue in issues
+            if (due := _due(issue)) is not None and (start is None or due >= start) and (end is None or due <= end)
+        ]
+    if parameters.get("count_only"):
+        return {"status": "success", "count": len(issues)}
+    return {"status": "success", "data": sort_issues(issues, parameters.get("sort_by")), "total": len(issues)}
+
+
+async def remember_result(user_phone: str, parameters: Dict[str, Any], selected_user: Dict[str, Any],
+                          selected_project: Dict[str, Any], data: Dict[str, Any]):
+    """Keeps an issue query and its result for follow-ups."""
+    if not data or "error" in data:
+        return
+    rows = data.get("data")
+    complete = rows is not None and "aggregate" not in data and data.get("total", len(rows)) <= len(rows)
+    await cache.set(LAST_RESULT_KEY.format(user_phone), {
+        "parameters": {field: parameters.get(field) for field in INHERITED_FIELDS},
+        "selected_user": selected_user,
+        "selected_project": selected_project,
+        # Counts, breakdowns and truncated lists can only be refined by fetching again
+        "rows": rows[:settings.ACC_RESULT_LIMIT] if complete else None,
+        "day": today_in(None).isoformat(),
+    }, expiry_time=SESSION_TTL)
+
+
+async def recall_result(user_phone: str) -> Optional[Dict[str, Any]]:
+    """The last issue query and result kept for this user, if it has not expired."""
+    return await cache.get(LAST_RESULT_KEY.format(user_phone))
@@ -0,0 +1,173 @@
+# src/services/digest_service.py
+"""
+Daily digest of issues due today, sent to users subscribed to projects
+(digest_subscriptions table).
+
+Cost scales with projects, not users: subscriptions are grouped by project,
+each project's open issues due today are streamed once (using one
+subscriber's token), and every page is partitioned in memory by assignee,
+keeping only the subscribers' issues. Each user then gets one message covering
+all of their projects, sent through a rate-limited OutboundQueue.
+
+The digest is business-initiated, usually outside the 24-hour customer-service
+window, so it goes out as the approved template DIGEST_TEMPLATE_NAME with body
+parameters {{1}} first name, {{2}} number of issues, {{3}} one-line summary
+(e.g. "Good morning {{1}}! You have {{2}} issue(s) due today: {{3}}").
+
+`run_scheduler()` (started by the app lifespan when DIGEST_ENABLED) wakes at
+DIGEST_TIME in DEFAULT_TIMEZONE every day; a per-day Redis lock makes exactly
+one worker in the fleet send that day's digest.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, time as day_time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from src.core.cache import cache
+from src.core.config import settings
+from src.core.lifecycle import lifecycle
+from src.integrations.autodesk_api import IssuesAPI
+from src.repositories import postgres_repo
+from src.services import token_service
+from src.services.outbound_queue import OutboundQueue
+from src.utils.whatsapp import send_whatsapp_template
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "lock:digest:{}"
+# Subscribers whose tokens are tried, in turn, to fetch a project's issues
+MAX_TOKEN_ATTEMPTS = 3
+# Template body parameters may not contain newlines and are limited in length
+SUMMARY_SEPARATOR = " · "
+
+
+async def _project_token(subscribers: List[Dict[str, Any]]) -> Optional[str]:
+    for subscription in subscribers[:MAX_TOKEN_ATTEMPTS]:
+        three_legged_token = await token_service.get_three_legged_token(
+            subscription["config"]["mongodb_uri"],
+            subscription["user"]["autodesk_id"],
+            subscription["config"]["client_id"],
+            subscription["config"]["client_secret"],
+        )
+        if three_legged_token:
+            return three_legged_token
+    return None
+
+
+async def fetch_due_by_assignee(project_id: str, subscribers: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Streams the project's issues due today once and returns them partitioned
+    by assignee, for the subscribers' Autodesk IDs only.
+    """
+    three_legged_token = await _project_token(subscribers)
+    if not three_legged_token:
+        raise PermissionError(f"No subscriber of project {project_id} has a valid APS token")
+
+    buckets: Dict[str, List[Dict[str, Any]]] = {s["user"]["autodesk_id"]: [] for s in subscribers}
+    api = IssuesAPI(three_legged_token, project_id, hub_id=subscribers[0]["user"]["hub_id"])
+    parameters = {"due_date": "today", "issue_status": list(settings.DIGEST_STATUSES), "timezone": settings.DEFAULT_TIMEZONE}
+    async for page in api.iter_matching(parameters, max_rows=settings.DIGEST_MAX_ROWS_PER_PROJECT):
+        for issue in page:
+            bucket = buckets.get(issue.get("assignedTo"))
+            if bucket is not None:
+                bucket.append(issue)
+    return buckets
+
+
+def digest_parameters(first_name: str, sections: List[Tuple[Dict[str, str], List[Dict[str, Any]]]]) -> List[str]:
+    """
+    Template body parameters for one user: first name, issue count and a
+    single-line summary such as "Tower A (2): #12 Crack, #15 Leak · Metro (1): #4 Seepage".
+    """
+    total = sum(len(issues) for _, issues in sections)
+    parts = []
+    for project, issues in sections:
+        if not issues:
+            continue
+        shown = ", ".join(f"#{issue.get('displayId')} {issue.get('title') or 'No title'}"
+                          for issue in issues[:settings.DIGEST_MAX_ISSUES_PER_PROJECT])
+        more = len(issues) - settings.DIGEST_MAX_ISSUES_PER_PROJECT
+        parts.append(f"{project['project_name']} ({len(issues)}): {shown}" + (f" and {more} more" if more > 0 else ""))
+    summary = " ".join(SUMMARY_SEPARATOR.join(parts).split()) or "nothing to follow up"
+    if len(summary) > settings.DIGEST_TEMPLATE_SUMMARY_CHARS:
+        summary = summary[:settings.DIGEST_TEMPLATE_SUMMARY_CHARS - 1].rstrip() + "…"
+    return [first_name or "there", str(total), summary]
+
+
+async def _send_digest(phone_number: str, parameters: List[str]) -> bool:
+    return await send_whatsapp_template(phone_number, settings.DIGEST_TEMPLATE_NAME,
+                                        settings.DIGEST_TEMPLATE_LANGUAGE, parameters)
+
+
+async def run_digest() -> Dict[str, int]:
+    """Fetches every subscribed project once and sends each subscriber their digest. Returns counters."""
+    projects: Dict[str, Dict[str, Any]] = {}
+    async for subscription in postgres_repo.iter_digest_subscriptions():
+        project = projects.setdefault(subscription["project_id"], {"name": subscription["project_name"], "subscribers": []})
+        project["subscribers"].append(subscription)
+
+    stats = {"projects": len(projects), "project_failures": 0, "users": 0, "messages": 0}
+    # phone -> (user, [(project, issues)])
+    digests: Dict[str, Tuple[Dict[str, Any], List[Tuple[Dict[str, str], List[Dict[str, Any]]]]]] = {}
+    semaphore = asyncio.Semaphore(settings.DIGEST_CONCURRENCY)
+
+    async def collect(project_id: str, project: Dict[str, Any]):
+        async with semaphore:
+            try:
+                buckets = await fetch_due_by_assignee(project_id, project["subscribers"])
+            except Exception as e:
+                stats["project_failures"] += 1
+                logger.error(f"Digest fetch failed for project {project_id}: {e}")
+                return
+        for subscription in project["subscribers"]:
+            user = subscription["user"]
+            entry = digests.setdefault(user["phone_number"], (user, []))
+            entry[1].append(({"project_id": project_id, "project_name": project["name"]}, buckets[user["autodesk_id"]]))
+
+    await asyncio.gather(*(collect(project_id, project) for project_id, project in projects.items()))
+
+    stats["users"] = len(digests)
+    async with OutboundQueue(rate=settings.DIGEST_SEND_RATE, burst=settings.DIGEST_SEND_BURST,
+                             workers=settings.DIGEST_SEND_WORKERS, send=_send_digest) as outbound:
+        for phone_number, (user, sections) in digests.items():
+            if settings.DIGEST_SEND_EMPTY or any(issues for _, issues in sections):
+                await outbound.put(phone_number, digest_parameters(user["first_name"], sections))
+    stats.update({"messages": outbound.stats["queued"], "sent": outbound.stats["sent"], "failed": outbound.stats["failed"]})
+    logger.info(f"Daily digest finished: {stats}")
+    return stats
+
+
+async def run_once_per_day(day: date) -> Optional[Dict[str, int]]:
+    """Runs the digest for `day` unless another worker already took it (or Redis cannot tell)."""
+    lock_key = LOCK_KEY.format(day.isoformat())
+    if not await cache.set_if_absent(lock_key, cache.worker_id, expiry_time=36 * 3600):
+        logger.info(f"Digest for {day} is handled by another worker")
+        return None
+    # Spawned through the lifecycle so a shutdown waits for the sends in progress
+    return await asyncio.shield(lifecycle.spawn(run_digest(), name=f"digest-{day}"))
+
+
+def next_run_at(now: datetime, at: str) -> datetime:
+    """The next occurrence of the HH:MM time `at` after `now` (in now's timezone)."""
+    hour, minute = (int(part) for part in at.split(":"))
+    run_at = datetime.combine(now.date(), day_time(hour, minute), now.tzinfo)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+
+async def run_scheduler():
+    """Sends the digest every day at DIGEST_TIME; runs until cancelled."""
+    try:
+        await postgres_repo.ensure_digest_subscriptions_table()
+    except Exception as e:
+        logger.error(f"Could not create digest_subscriptions table: {e}")
+    zone = ZoneInfo(settings.DEFAULT_TIMEZONE)
+    while True:
+        now = datetime.now(zone)
+        run_at = next_run_at(now, settings.DIGEST_TIME)
+        logger.info(f"Next daily digest at {run_at.isoformat()}")
+        await asyncio.sleep((run_at - now).total_seconds())
+        try:
+            await run_once_per_day(run_at.date())
+        except Exception as e:
+            logger.error(f"Daily digest failed: {e}", exc_info=True)
@@ -0,0 +1,74 @@
+# src/services/entity_resolution.py
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from src.services import project_service, token_service, user_service
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_FIELDS = ("assignee_name", "project_name")
+
+
+class EntityResolver:
+    """
+    Starts token, user and project lookups for one message as soon as the
+    values they depend on are known, so they overlap with intent parsing.
+
+    Pass `on_field` to intent_service.parse_intent; afterwards `tokens()`,
+    `users(name)` and `projects(name)` return the already-running lookups (or
+    start them if the final value differs). Call `cancel()` when the message is
+    answered without them.
+    """
+
+    def __init__(self, config: Dict, user: Dict):
+        self.config = config
+        self.user = user
+        self._tokens: Optional[asyncio.Task] = None
+        self._lookups: Dict[Tuple[str, Any], asyncio.Task] = {}
+
+    def on_field(self, name: str, value: Any):
+        if name in RESOLVED_FIELDS and isinstance(value, str) and value:
+            self._lookup(name, value)
+
+    def _token_task(self) -> asyncio.Task:
+        if self._tokens is None:
+            self._tokens = asyncio.create_task(token_service.get_tokens(self.config, self.user["autodesk_id"]))
+        return self._tokens
+
+    def _lookup(self, field: str, value: Any) -> asyncio.Task:
+        key = (field, value)
+        if key not in self._lookups:
+            logger.debug(f"Resolving {field}={value!r}")
+            self._lookups[key] = asyncio.create_task(self._search(field, value))
+        return self._lookups[key]
+
+    async def _search(self, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        _, two_legged_token = await self._token_task()
+        if not two_legged_token:
+            return None
+        if field == "assignee_name":
+            return await user_service.search_users_by_name(
+                name=value, access_token=two_legged_token, hub_id=self.user["hub_id"]
+            )
+        return await project_service.search_projects_by_name(
+            project_name=value, access_token=two_legged_token, account_id=self.user["hub_id"]
+        )
+
+    async def tokens(self) -> Tuple[Optional[str], Optional[str]]:
+        return await self._token_task()
+
+    async def users(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        return await self._lookup("assignee_name", name)
+
+    async def projects(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        return await self._lookup("project_name", name)
+
+    def cancel(self):
+        """Cancels lookups that were started but are no longer needed."""
+        tasks = [t for t in (self._tokens, *self._lookups.values()) if t is not None]
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # mark retrieved so a failed lookup is not logged as unhandled
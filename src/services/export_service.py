@@ -0,0 +1,53 @@
+# src/services/export_service.py
+import logging
+import re
+from typing import Any, Dict
+
+from src.core.config import settings
+from src.integrations.acc_filters import today_in
+from src.integrations.autodesk_api import IssuesAPI
+from src.utils.export import ISSUE_HEADERS, MIME_TYPES, issue_row, write_export
+from src.utils.transformations import build_filter_description, generate_issue_url
+from src.utils.whatsapp import send_whatsapp_document, upload_whatsapp_media
+
+logger = logging.getLogger(__name__)
+
+
+def export_filename(noun: str, project: Dict[str, Any], parameters: Dict[str, Any], extension: str) -> str:
+    """e.g. "issues-tower-a-2025-01-31.csv"."""
+    slug = re.sub(r"[^a-z0-9]+", "-", (project.get("project_name") or "").lower()).strip("-")
+    day = today_in(parameters.get("timezone")).isoformat()
+    return "-".join(part for part in (noun, slug, day) if part) + f".{extension}"
+
+
+async def send_issues_export(phone_number: str, api: IssuesAPI, project: Dict[str, Any],
+                             parameters: Dict[str, Any], fmt: str) -> bool:
+    """
+    Streams every issue matching `parameters` into a CSV/XLSX file page by page,
+    uploads it to WhatsApp and sends it as a document. Returns False if any step
+    failed, so the caller can fall back to a text reply.
+    """
+    async def rows():
+        async for page in api.iter_matching(parameters, max_rows=settings.EXPORT_MAX_ROWS):
+            yield [issue_row(issue, labels, generate_issue_url(issue.get("displayId"), api.project_id)) for issue in page]
+
+    try:
+        labels = await api.labels(["issue_type", "assignee"])
+        file, extension, count = await write_export(fmt, ISSUE_HEADERS, rows(), max_rows=settings.EXPORT_MAX_ROWS)
+    except Exception as e:
+        logger.error(f"Issue export failed: {e}", exc_info=True)
+        return False
+
+    filename = export_filename("issues", project, parameters, extension)
+    caption = f"{count} issue{'s' if count != 1 else ''} {build_filter_description(parameters)}".strip()
+    if count >= settings.EXPORT_MAX_ROWS:
+        caption += f" (first {settings.EXPORT_MAX_ROWS})"
+    try:
+        with file:
+            media_id = await upload_whatsapp_media(file, filename, MIME_TYPES[extension])
+        sent = bool(media_id) and await send_whatsapp_document(phone_number, media_id, filename, caption)
+    except Exception as e:
+        logger.error(f"Sending issue export {filename} failed: {e}", exc_info=True)
+        return False
+    logger.info(f"Exported {count} issues as {filename} for {phone_number}: {'sent' if sent else 'send failed'}")
+    return sent
@@ -0,0 +1,126 @@
+# src/services/fast_intent.py
+#
+# Deterministic pre-classifier for trivial messages ("hi", "thanks", "ok",
+# "namaste ji", "shukriya bhai") so they are answered without an LLM call.
+#
+# Phrases are compiled into a word-level trie and matched longest-first over
+# the normalised message. A message is handled locally only when every token is
+# covered by phrases of a single category (or by filler words such as "bot" or
+# "ji") and the resulting confidence (0.5-1.0, lower the more filler) clears
+# FAST_INTENT_MIN_CONFIDENCE. Any domain word (issue, review, form, kitne, ...)
+# escalates straight to the LLM.
+import logging
+from typing import Dict, Optional, Tuple
+
+from src.core.config import settings
+from src.core.metrics import register_stats
+from src.services.intent_cache import normalize
+
+logger = logging.getLogger(__name__)
+
+PHRASES = {
+    "greet": [
+        "hi", "hii", "hiii", "hello", "helo", "hey", "heya", "hey there", "hi there", "hello there",
+        "good morning", "good afternoon", "good evening", "gm", "morning", "yo", "howdy",
+        "namaste", "namaskar", "pranam", "hola", "salaam", "salam", "assalamualaikum", "ram ram",
+        "kaise ho", "kaise hain", "kya haal hai", "kya hal hai", "how are you", "whats up", "sup",
+        "start", "menu", "help",
+    ],
+    "thanks": [
+        "thanks", "thank you", "thankyou", "thanku", "thx", "ty", "tysm", "thanks a lot", "many thanks",
+        "dhanyavad", "dhanyawad", "dhanyavaad", "shukriya", "shukria", "bahut shukriya",
+        "ok", "okay", "okk", "k", "cool", "great", "nice", "perfect", "got it", "noted", "done",
+        "theek hai", "thik hai", "accha", "acha", "achha", "sahi hai", "badhiya", "bye", "goodbye",
+    ],
+}
+
+# Tokens that carry no intent of their own but often pad trivial messages.
+FILLER = {
+    "bot", "there", "sir", "madam", "maam", "ji", "bhai", "dear", "team", "all", "so", "much",
+    "very", "again", "and", "please", "pls", "plz", "buddy", "friend", "bro", "everyone", "the",
+}
+
+# Any of these means the message may be a real query; never answer it locally.
+DOMAIN_WORDS = {
+    "issue", "issues", "review", "reviews", "form", "forms", "project", "projects", "rfi", "rfis",
+    "workflow", "assigned", "assign", "due", "open", "closed", "pending", "overdue", "count",
+    "show", "list", "get", "find", "kitne", "kitna", "dikhao", "batao", "mera",
+    "mere", "mujhe", "wir", "status", "today", "tomorrow", "week",
+}
+
+_TERMINAL = "$"
+
+
+def _build_trie() -> dict:
+    trie: dict = {}
+    for category, phrases in PHRASES.items():
+        for phrase in phrases:
+            node = trie
+            for token in normalize(phrase).split():
+                node = node.setdefault(token, {})
+            node[_TERMINAL] = category
+    return trie
+
+
+_TRIE = _build_trie()
+
+# "llm_calls_saved" counts messages answered locally; "escalated" those passed on to the LLM.
+stats: Dict[str, int] = {"llm_calls_saved": 0, "escalated": 0, **{f"handled_{c}": 0 for c in (*PHRASES, "unsure")}}
+register_stats("fast_intent", lambda: stats, ratios={"handled": (["llm_calls_saved"], ["escalated"])})
+
+
+def classify(text: str) -> Tuple[Optional[str], float]:
+    """
+    Returns (intent, confidence) for a trivial message, or (None, 0.0) when it must go to the LLM.
+    Intents are "greet", "thanks", or "unsure" for messages with no words at all (emoji, punctuation).
+    """
+    tokens = normalize(text).split()
+    if not tokens:
+        return ("unsure", 1.0) if text.strip() else (None, 0.0)
+    if len(tokens) > settings.FAST_INTENT_MAX_TOKENS:
+        return None, 0.0
+
+    categories = set()
+    filler = 0
+    i = 0
+    while i < len(tokens):
+        if tokens[i] in DOMAIN_WORDS:
+            return None, 0.0
+        # Longest phrase starting at i
+        node, end, category = _TRIE, None, None
+        for j in range(i, len(tokens)):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            if _TERMINAL in node:
+                end, category = j + 1, node[_TERMINAL]
+        if end is not None:
+            categories.add(category)
+            i = end
+        elif tokens[i] in FILLER:
+            filler += 1
+            i += 1
+        else:
+            return None, 0.0
+
+    if len(categories) != 1:
+        return None, 0.0
+    # Filler-heavy messages ("hi bot there team") are less certain than pure phrases:
+    # confidence falls from 1.0 to 0.5 with the share of filler tokens, so the
+    # default threshold of 0.75 accepts at most half filler ("namaste ji")
+    confidence = 1.0 - 0.5 * filler / len(tokens)
+    return categories.pop(), confidence
+
+
+def fast_parse(text: str) -> Optional[dict]:
+    """Returns an intent result for trivial messages, or None to escalate to the LLM."""
+    if not settings.FAST_INTENT_ENABLED:
+        return None
+    intent, confidence = classify(text)
+    if intent is None or confidence < settings.FAST_INTENT_MIN_CONFIDENCE:
+        stats["escalated"] += 1
+        return None
+    stats["llm_calls_saved"] += 1
+    stats[f"handled_{intent}"] += 1
+    logger.debug(f"Fast intent {intent} ({confidence:.2f}) for {text!r}")
+    return {"intent": intent, "parameters": {}}
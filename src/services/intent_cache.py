@@ -0,0 +1,240 @@
+# src/services/intent_cache.py
+#
+# Caches intent parses keyed on a normalised form of the message so repeated
+# questions skip the LLM.
+#
+# Two keys are tried for every message:
+#   - exact: the normalised text itself ("my open issues");
+#   - template: the normalised text with user-specific names (project,
+#     assignee, issue type, workflow, form template) replaced by slot
+#     placeholders, so "open issues in Tower A" and "open issues in Tower B"
+#     share one entry once both project names have been seen in the hub.
+#
+# Known slot values are learned per hub from earlier parses. Entries are
+# validated against the parameter schemas on the way out, so a schema change
+# just turns old entries into misses.
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src.core.cache import LocalCache, cache
+from src.core.config import settings
+from src.core.metrics import register_stats
+from src.core.schemas import PARAMETER_ADAPTERS
+
+logger = logging.getLogger(__name__)
+
+SLOT_FIELDS = ("project_name", "assignee_name", "issue_type", "review_workflow", "form_template")
+NON_SLOT_VALUES = {"current_user"}
+CACHEABLE_INTENTS = set(PARAMETER_ADAPTERS) | {"greet", "unsure"}
+MAX_KNOWN_VALUES_PER_SLOT = 500
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0, "invalid": 0}
+register_stats("intent_cache", lambda: stats, ratios={"hits": (["local_hits", "redis_hits"], ["misses", "invalid"])})
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def normalize(text: str) -> str:
+    """Case-folds, strips punctuation and collapses whitespace."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", _fold(text))).strip()
+
+
+def _placeholder(field: str, index: int) -> str:
+    # Only word characters, so it survives normalize() untouched.
+    return f"__{field}_{index}__"
+
+
+def _value_pattern(folded_value: str) -> re.Pattern:
+    # Whole words only ("ali" must not match inside "alice" or a placeholder); values
+    # may start or end with punctuation, so lookarounds rather than \b
+    return re.compile(rf"(?<!\w){re.escape(folded_value)}(?!\w)")
+
+
+def _slot_values(parameters: dict, field: str) -> List[str]:
+    value = parameters.get(field)
+    values = value if isinstance(value, list) else [value]
+    return [v for v in values if isinstance(v, str) and v.strip() and v not in NON_SLOT_VALUES]
+
+
+def _key(kind: str, normalized: str) -> str:
+    return f"intent:{kind}:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}"
+
+
+def build_template(text: str, parameters: dict) -> Optional[Tuple[str, dict]]:
+    """
+    Abstracts slot values out of a parsed message.
+    Returns (normalised template text, parameters with placeholders), or None if
+    there is nothing to abstract or a value does not appear as whole words in the text.
+    """
+    folded = _fold(text)
+    templated = dict(parameters)
+    replaced = False
+    for field in SLOT_FIELDS:
+        values = _slot_values(parameters, field)
+        if not values:
+            continue
+        placeholders = []
+        for index, value in enumerate(values):
+            pattern = _value_pattern(_fold(value))
+            if not pattern.search(folded):
+                return None
+            folded = pattern.sub(f" {_placeholder(field, index)} ", folded)
+            placeholders.append(_placeholder(field, index))
+            replaced = True
+        templated[field] = placeholders if isinstance(parameters[field], list) else placeholders[0]
+    if not replaced:
+        return None
+    return normalize(folded), templated
+
+
+def apply_known_values(text: str, known: Dict[str, List[str]]) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Replaces known slot values found in the text (as whole words) with placeholders, longest first.
+    Returns (normalised template text, placeholder -> original value), or None if no value matched.
+    """
+    folded = _fold(text)
+    fills: Dict[str, str] = {}
+    for field in SLOT_FIELDS:
+        index = 0
+        for value in sorted(known.get(field, []), key=len, reverse=True):
+            folded_value = _fold(value)
+            pattern = _value_pattern(folded_value) if folded_value else None
+            if pattern and pattern.search(folded):
+                placeholder = _placeholder(field, index)
+                folded = pattern.sub(f" {placeholder} ", folded)
+                fills[placeholder] = value
+                index += 1
+    if not fills:
+        return None
+    return normalize(folded), fills
+
+
+def fill_template(parameters: dict, fills: Dict[str, str]) -> Optional[dict]:
+    """Substitutes placeholders with the matched values; None if a placeholder has no value."""
+    filled = dict(parameters)
+    for field in SLOT_FIELDS:
+        value = parameters.get(field)
+        if isinstance(value, list):
+            if any(v.startswith("__") and v not in fills for v in value):
+                return None
+            filled[field] = [fills.get(v, v) for v in value]
+        elif isinstance(value, str) and value.startswith("__"):
+            if value not in fills:
+                return None
+            filled[field] = fills[value]
+    return filled
+
+
+def is_valid(result: dict) -> bool:
+    """Checks a parse against the parameter schema for its intent."""
+    intent = result.get("intent") if isinstance(result, dict) else None
+    if intent not in CACHEABLE_INTENTS:
+        return False
+    adapter = PARAMETER_ADAPTERS.get(intent)
+    if adapter is None:
+        return True
+    try:
+        adapter.validate_python({**(result.get("parameters") or {}), "intent": intent})
+        return True
+    except ValidationError:
+        return False
+
+
+class IntentCache:
+    """Redis-backed intent cache with a small in-process tier in front of it."""
+
+    def __init__(self):
+        self.local = LocalCache(settings.INTENT_CACHE_LOCAL_MAX_ITEMS)
+
+    async def known_values(self, hub_id: str) -> Dict[str, List[str]]:
+        """Slot values (project names, assignees, ...) seen in earlier parses for the hub."""
+        found, known = self.local.get(f"intent_slots:{hub_id}")
+        if found:
+            return known
+        known = await cache.get(f"intent_slots:{hub_id}") or {}
+        self.local.set(f"intent_slots:{hub_id}", known, settings.INTENT_CACHE_LOCAL_TTL)
+        return known
+
+    async def lookup(self, text: str, hub_id: str) -> Optional[dict]:
+        if not settings.INTENT_CACHE_ENABLED:
+            return None
+        exact_key = _key("x", normalize(text))
+        template = apply_known_values(text, await self.known_values(hub_id))
+        template_key = _key("t", template[0]) if template else None
+
+        candidates = []
+        for key in filter(None, (exact_key, template_key)):
+            found, entry = self.local.get(key)
+            if found:
+                stats["local_hits"] += 1
+                candidates.append((key, entry, False))
+        if not candidates:
+            keys = [k for k in (exact_key, template_key) if k]
+            for key, entry in zip(keys, await cache.mget(keys)):
+                if entry:
+                    candidates.append((key, entry, True))
+
+        for key, entry, from_redis in candidates:
+            result = entry
+            if key == template_key:
+                parameters = fill_template(entry.get("parameters") or {}, template[1])
+                if parameters is None:
+                    continue
+                result = {"intent": entry.get("intent"), "parameters": parameters}
+            if not is_valid(result):
+                stats["invalid"] += 1
+                continue
+            if from_redis:
+                stats["redis_hits"] += 1
+                self.local.set(key, entry, settings.INTENT_CACHE_LOCAL_TTL)
+            return result
+
+        stats["misses"] += 1
+        return None
+
+    async def store(self, text: str, hub_id: str, result: dict):
+        if not settings.INTENT_CACHE_ENABLED or not is_valid(result):
+            return
+        entry = {"intent": result["intent"], "parameters": result.get("parameters") or {}}
+        exact_key = _key("x", normalize(text))
+        self.local.set(exact_key, entry, settings.INTENT_CACHE_LOCAL_TTL)
+
+        async with cache.batch() as batch:
+            batch.set(exact_key, entry, settings.INTENT_CACHE_TTL)
+            template = build_template(text, entry["parameters"])
+            if template:
+                template_text, template_parameters = template
+                batch.set(_key("t", template_text), {"intent": entry["intent"], "parameters": template_parameters}, settings.INTENT_CACHE_TTL)
+                known = await self._learn_values(hub_id, entry["parameters"])
+                if known is not None:
+                    batch.set(f"intent_slots:{hub_id}", known, settings.INTENT_CACHE_TTL)
+        stats["stores"] += 1
+
+    async def _learn_values(self, hub_id: str, parameters: dict) -> Optional[Dict[str, List[str]]]:
+        """Adds newly seen slot values for the hub; returns the updated map or None if unchanged."""
+        known = {field: list(values) for field, values in (await self.known_values(hub_id)).items()}
+        changed = False
+        for field in SLOT_FIELDS:
+            current = known.setdefault(field, [])
+            for value in _slot_values(parameters, field):
+                if value not in current:
+                    current.append(value)
+                    del current[:-MAX_KNOWN_VALUES_PER_SLOT]
+                    changed = True
+        if not changed:
+            return None
+        self.local.set(f"intent_slots:{hub_id}", known, settings.INTENT_CACHE_LOCAL_TTL)
+        return known
+
+
+intent_cache = IntentCache()
@@ -0,0 +1,311 @@
+# src/services/intent_classifier.py
+#
+# Nearest-neighbour intent classifier trained on past LLM parses.
+#
+# Every valid Gemini parse is appended to a capped Redis list (HISTORY_KEY).
+# Training turns each one into a slot template ("open issues in
+# __project_name_0__" -> get_issues / {"project_name": "__project_name_0__",
+# "issue_status": ["open"]}) and embeds the template as a sublinear TF-IDF
+# vector over character 3-5-grams and words. Vectors are stored column-wise
+# (CSC arrays) so a query only touches the rows sharing one of its features.
+#
+# At runtime, a message is templated with the hub's known slot values, scored
+# against all examples with cosine similarity, and the top-k neighbours vote
+# on a label. Only predictions above INTENT_CLASSIFIER_MIN_CONFIDENCE whose
+# placeholders exactly match the slots found in the message are used.
+#
+# Commands (run from the repository root):
+#     python -m src.services.intent_classifier export --out intent_history.jsonl
+#     python -m src.services.intent_classifier train [--data intent_history.jsonl] --out models/intent_nn.npz
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.cache import cache
+from src.core.config import settings
+from src.core.metrics import register_stats
+from src.services.intent_cache import (
+    apply_known_values,
+    build_template,
+    fill_template,
+    intent_cache,
+    is_valid,
+    normalize,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTORY_KEY = "intent_history"
+NGRAM_RANGE = (3, 5)
+
+stats = {"predictions": 0, "accepted": 0, "low_confidence": 0, "slot_mismatch": 0}
+register_stats("intent_classifier", lambda: stats, ratios={"accepted": (["accepted"], ["low_confidence", "slot_mismatch"])})
+
+
+def features(template_text: str) -> Counter:
+    """Character n-grams (word-boundary padded) and whole words of a normalised template."""
+    padded = f" {template_text} "
+    grams = Counter(
+        padded[i:i + n]
+        for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1)
+        for i in range(len(padded) - n + 1)
+    )
+    grams.update(f"w:{word}" for word in template_text.split())
+    return grams
+
+
+def to_example(record: dict) -> Optional[Tuple[str, dict]]:
+    """Turns a history record into (template text, label) or None if it is unusable."""
+    result = {"intent": record.get("intent"), "parameters": record.get("parameters") or {}}
+    if not record.get("text") or not is_valid(result):
+        return None
+    template = build_template(record["text"], result["parameters"])
+    if template:
+        return template[0], {"intent": result["intent"], "parameters": template[1]}
+    return normalize(record["text"]), result
+
+
+def _label_key(label: dict) -> str:
+    return json.dumps(label, sort_keys=True)
+
+
+def placeholders(parameters: dict) -> set:
+    values = []
+    for value in parameters.values():
+        values.extend(value if isinstance(value, list) else [value])
+    return {v for v in values if isinstance(v, str) and v.startswith("__") and v.endswith("__")}
+
+
+class NearestNeighbourIntentModel:
+    """TF-IDF cosine k-NN over slot templates. Build with train() or load()."""
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray, indptr: np.ndarray,
+                 indices: np.ndarray, data: np.ndarray, row_labels: np.ndarray, labels: List[dict]):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.row_labels = row_labels
+        self.labels = labels
+
+    @property
+    def num_examples(self) -> int:
+        return len(self.row_labels)
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, dict]]) -> "NearestNeighbourIntentModel":
+        # Identical templates with identical labels add nothing to a nearest-neighbour vote
+        unique: Dict[Tuple[str, str], dict] = {}
+        for template_text, label in examples:
+            unique.setdefault((template_text, _label_key(label)), label)
+        if not unique:
+            raise ValueError("No usable training examples")
+
+        label_ids: Dict[str, int] = {}
+        labels: List[dict] = []
+        rows: List[Counter] = []
+        row_labels: List[int] = []
+        for (template_text, key), label in unique.items():
+            if key not in label_ids:
+                label_ids[key] = len(labels)
+                labels.append(label)
+            rows.append(features(template_text))
+            row_labels.append(label_ids[key])
+
+        document_frequency = Counter(feature for row in rows for feature in row)
+        vocabulary = {feature: i for i, feature in enumerate(sorted(document_frequency))}
+        idf = np.empty(len(vocabulary), dtype=np.float32)
+        for feature, i in vocabulary.items():
+            idf[i] = math.log((1 + len(rows)) / (1 + document_frequency[feature])) + 1.0
+
+        # Build COO triplets, L2-normalise each row, then sort into CSC order by feature
+        row_index, column_index, weights = [], [], []
+        for r, row in enumerate(rows):
+            columns = np.fromiter((vocabulary[f] for f in row), dtype=np.int32, count=len(row))
+            values = (1.0 + np.log(np.fromiter(row.values(), dtype=np.float32, count=len(row)))) * idf[columns]
+            values /= np.linalg.norm(values)
+            row_index.append(np.full(len(row), r, dtype=np.int32))
+            column_index.append(columns)
+            weights.append(values.astype(np.float32))
+        row_index = np.concatenate(row_index)
+        column_index = np.concatenate(column_index)
+        weights = np.concatenate(weights)
+        order = np.argsort(column_index, kind="stable")
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(column_index, minlength=len(vocabulary)), out=indptr[1:])
+        return cls(vocabulary, idf, indptr, row_index[order], weights[order],
+                   np.asarray(row_labels, dtype=np.int32), labels)
+
+    def _vectorize(self, template_text: str) -> Tuple[np.ndarray, np.ndarray]:
+        grams = features(template_text)
+        counts = {self.vocabulary[f]: c for f, c in grams.items() if f in self.vocabulary}
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))) * self.idf[columns]
+        # Unseen features still count towards the norm (at the rarest idf), so a
+        # message that is mostly new text cannot look like a close match.
+        unseen = np.fromiter((c for f, c in grams.items() if f not in self.vocabulary), dtype=np.float32)
+        unseen_weights = (1.0 + np.log(unseen)) * self.idf.max()
+        norm = math.sqrt(float(values @ values) + float(unseen_weights @ unseen_weights))
+        return columns, values / norm
+
+    def similarities(self, template_text: str) -> np.ndarray:
+        """Cosine similarity of the template against every training example."""
+        columns, values = self._vectorize(template_text)
+        if not len(columns):
+            return np.zeros(self.num_examples, dtype=np.float32)
+        starts, ends = self.indptr[columns], self.indptr[columns + 1]
+        lengths = ends - starts
+        # Gather the posting lists of all query features in one vectorised step
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        contributions = self.data[offsets] * np.repeat(values, lengths)
+        return np.bincount(self.indices[offsets], weights=contributions, minlength=self.num_examples)
+
+    def predict(self, template_text: str, k: int = 5) -> Tuple[Optional[dict], float]:
+        """
+        Returns (label, confidence). Confidence is the best similarity among the
+        winning label's neighbours scaled by its share of the top-k similarity mass.
+        """
+        scores = self.similarities(template_text)
+        k = min(k, self.num_examples)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[scores[top] > 0]
+        if not len(top):
+            return None, 0.0
+        votes = np.bincount(self.row_labels[top], weights=scores[top])
+        winner = int(np.argmax(votes))
+        best = float(scores[top][self.row_labels[top] == winner].max())
+        return self.labels[winner], best * float(votes[winner] / votes.sum())
+
+    def save(self, path: str):
+        features_sorted = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(
+            path,
+            features=np.array(features_sorted),
+            idf=self.idf,
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data,
+            row_labels=self.row_labels,
+            labels=np.array(json.dumps(self.labels)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "NearestNeighbourIntentModel":
+        with np.load(path, allow_pickle=False) as archive:
+            vocabulary = {str(f): i for i, f in enumerate(archive["features"])}
+            return cls(vocabulary, archive["idf"], archive["indptr"], archive["indices"], archive["data"],
+                       archive["row_labels"], json.loads(str(archive["labels"])))
+
+
+class IntentClassifier:
+    """Runtime wrapper: lazy model loading, slot templating and the confidence gate."""
+
+    def __init__(self):
+        self.model: Optional[NearestNeighbourIntentModel] = None
+        self._load_attempted = False
+
+    def _ensure_model(self) -> Optional[NearestNeighbourIntentModel]:
+        if not self._load_attempted and settings.INTENT_CLASSIFIER_PATH:
+            self._load_attempted = True
+            try:
+                self.model = NearestNeighbourIntentModel.load(settings.INTENT_CLASSIFIER_PATH)
+                logger.info(f"Loaded intent classifier with {self.model.num_examples} examples")
+            except Exception as e:
+                logger.warning(f"Intent classifier unavailable: {e}")
+        return self.model
+
+    def preload(self) -> bool:
+        """Loads the model now instead of on the first message; False when none is configured or loadable."""
+        return self._ensure_model() is not None
+
+    async def predict(self, text: str, hub_id: str) -> Optional[dict]:
+        """Returns a confident {"intent", "parameters"} prediction or None."""
+        model = self._ensure_model()
+        if model is None:
+            return None
+        stats["predictions"] += 1
+        template = apply_known_values(text, await intent_cache.known_values(hub_id))
+        template_text, fills = template if template else (normalize(text), {})
+
+        label, confidence = model.predict(template_text)
+        if label is None or confidence < settings.INTENT_CLASSIFIER_MIN_CONFIDENCE:
+            stats["low_confidence"] += 1
+            return None
+        # Every slot found in the message must be used, and every placeholder filled
+        parameters = fill_template(label["parameters"], fills)
+        if parameters is None or placeholders(label["parameters"]) != set(fills):
+            stats["slot_mismatch"] += 1
+            return None
+        result = {"intent": label["intent"], "parameters": parameters}
+        if not is_valid(result):
+            stats["slot_mismatch"] += 1
+            return None
+        stats["accepted"] += 1
+        return result
+
+
+intent_classifier = IntentClassifier()
+
+
+async def record_parse(text: str, hub_id: str, result: dict):
+    """Appends an LLM parse to the training history."""
+    await cache.push_capped(HISTORY_KEY, {
+        "text": text,
+        "hub_id": hub_id,
+        "intent": result.get("intent"),
+        "parameters": result.get("parameters") or {},
+        "timestamp": datetime.utcnow().isoformat(),
+    }, settings.INTENT_HISTORY_MAX_ITEMS)
+
+
+def read_jsonl(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def _export(args):
+    records = await cache.list_range(HISTORY_KEY)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for record in reversed(records):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"Exported {len(records)} parses to {args.out}")
+
+
+async def _train(args):
+    records = read_jsonl(args.data) if args.data else list(reversed(await cache.list_range(HISTORY_KEY)))
+    examples = [e for e in map(to_example, records) if e]
+    started = time.perf_counter()
+    model = NearestNeighbourIntentModel.train(examples)
+    model.save(args.out)
+    print(
+        f"Trained on {len(examples)}/{len(records)} parses -> {model.num_examples} unique examples, "
+        f"{len(model.labels)} labels, {len(model.vocabulary)} features in {time.perf_counter() - started:.2f}s; "
+        f"saved to {args.out}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the intent parse history or train the nearest-neighbour classifier.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="dump the Redis parse history to JSONL")
+    export.add_argument("--out", required=True)
+    train = commands.add_parser("train", help="train a model from JSONL or the Redis history")
+    train.add_argument("--data", help="JSONL of {text, intent, parameters}; defaults to the Redis history")
+    train.add_argument("--out", required=True)
+    args = parser.parse_args()
+    asyncio.run(_export(args) if args.command == "export" else _train(args))
+
+
+if __name__ == "__main__":
+    main()
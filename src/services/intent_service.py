@@ -0,0 +1,120 @@
+# src/services/intent_service.py
+import logging
+from typing import Any, Callable, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src.core.fair_scheduler import SchedulerTimeout, llm_scheduler
+from src.core.metrics import INTENT_SOURCES, timed
+from src.core.schemas import PARAMETER_ADAPTERS
+from src.integrations.llm_governor import llm_governor
+from src.services.fast_intent import fast_parse
+from src.services.intent_cache import intent_cache
+from src.services.intent_classifier import intent_classifier, record_parse
+
+logger = logging.getLogger(__name__)
+
+FieldCallback = Callable[[str, Any], None]
+
+NON_QUERY_INTENTS = {"greet", "thanks", "unsure"}
+
+
+def validate_result(result: Any) -> Optional[dict]:
+    """
+    Validates a parse against the parameter schema for its intent using the
+    prebuilt TypeAdapters. Returns the normalised {"intent", "parameters"} (with
+    schema defaults filled in) or None if the parse is unusable.
+    """
+    if not isinstance(result, dict):
+        return None
+    intent = result.get("intent")
+    if intent in NON_QUERY_INTENTS:
+        return {"intent": intent, "parameters": {}}
+    adapter = PARAMETER_ADAPTERS.get(intent)
+    if adapter is None:
+        return None
+    try:
+        model = adapter.validate_python({**(result.get("parameters") or {}), "intent": intent})
+    except ValidationError as e:
+        logger.warning(f"Intent parse failed validation: {e}")
+        return None
+    return {"intent": intent, "parameters": model.model_dump(exclude={"intent"})}
+
+
+def _emit_fields(result: dict, on_field: Optional[FieldCallback]):
+    if on_field:
+        for name, value in result["parameters"].items():
+            on_field(name, value)
+
+
+async def _stream_llm(text: str, hub_id: str, on_field: Optional[FieldCallback]) -> Tuple[Any, bool]:
+    """
+    Parses the message through the LLM governor in one of the hub's fair
+    scheduler slots, reporting each parameter to `on_field` as soon as its
+    value has streamed in. Returns (document, from_primary); a hub that has
+    waited too long for a slot gets the fallback parsers instead.
+    """
+    def on_value(path, value):
+        if on_field and len(path) == 2 and path[0] == "parameters":
+            try:
+                on_field(path[1], value)
+            except Exception as e:
+                logger.warning(f"Early field handler failed for {path[1]}: {e}")
+
+    try:
+        async with llm_scheduler.slot(hub_id):
+            return await llm_governor.parse(text, on_value)
+    except SchedulerTimeout as e:
+        logger.warning(f"LLM parse not scheduled, using fallbacks: {e}")
+        return await llm_governor.parse_fallback(text, on_value), False
+
+
+@timed("intent_parse")
+async def parse_intent(text: str, hub_id: str, on_field: Optional[FieldCallback] = None) -> Optional[dict]:
+    """
+    Turns a user message into {"intent": ..., "parameters": {...}}.
+    Stages, cheapest first: the local greeting/thanks classifier, the intent
+    cache, the nearest-neighbour classifier trained on past parses, and finally
+    the LLM, whose valid results are cached and recorded for training.
+
+    `on_field(name, value)` is called for each parameter as soon as it is known
+    (while the LLM is still streaming), so callers can start resolving entities
+    before the parse finishes. Returns None if the reply cannot be parsed.
+    """
+    local = fast_parse(text)
+    if local:
+        INTENT_SOURCES.labels("fast_intent").inc()
+        return local
+
+    cached = validate_result(await intent_cache.lookup(text, hub_id))
+    if cached:
+        INTENT_SOURCES.labels("intent_cache").inc()
+        _emit_fields(cached, on_field)
+        return cached
+
+    predicted = validate_result(await intent_classifier.predict(text, hub_id))
+    if predicted:
+        INTENT_SOURCES.labels("classifier").inc()
+        _emit_fields(predicted, on_field)
+        # Not cached: a nearest-neighbour guess would otherwise be served as a parse
+        # for INTENT_CACHE_TTL, and predicting again is cheap
+        return predicted
+
+    try:
+        document, from_primary = await _stream_llm(text, hub_id, on_field)
+    except Exception as e:
+        INTENT_SOURCES.labels("failed").inc()
+        logger.warning(f"Intent parsing failed: {e}")
+        return None
+    result = validate_result(document)
+    INTENT_SOURCES.labels(("llm" if from_primary else "llm_fallback") if result else "invalid").inc()
+    if not result or not from_primary:
+        # Degraded (fallback) parses are used once but never cached or trained on
+        return result
+
+    try:
+        await intent_cache.store(text, hub_id, result)
+        await record_parse(text, hub_id, result)
+    except Exception as e:
+        logger.warning(f"Intent cache store failed: {e}")
+    return result
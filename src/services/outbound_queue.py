@@ -0,0 +1,91 @@
+# src/services/outbound_queue.py
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.utils.whatsapp import send_whatsapp_message
+
+logger = logging.getLogger(__name__)
+
+# send(phone_number, message) -> delivered; message is whatever the producer queued
+SendFunction = Callable[[str, Any], Awaitable[bool]]
+
+
+class OutboundQueue:
+    """
+    Bounded queue of outgoing WhatsApp messages for bulk jobs (text by
+    default; pass `send` for templates or other message types). A token
+    bucket keeps sends at `rate` per second (bursts of up to `burst`), `workers`
+    sends run concurrently, and a failed send is retried up to `retries` times
+    after `retry_delay` seconds. `put` waits while the queue is full, so
+    producers cannot run ahead of the send rate by more than `max_pending`.
+
+        async with OutboundQueue(rate=20) as outbound:
+            await outbound.put(phone, text)
+        # leaving the block waits until everything queued was sent
+    """
+
+    def __init__(self, rate: float, burst: int = 1, workers: int = 4, max_pending: int = 1000,
+                 retries: int = 1, retry_delay: float = 2.0, send: Optional[SendFunction] = None):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.send = send or send_whatsapp_message
+        self._queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue(max_pending)
+        self._worker_count = workers
+        self._workers = []
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._bucket_lock = asyncio.Lock()
+        self.stats: Dict[str, int] = {"queued": 0, "sent": 0, "failed": 0, "retried": 0}
+
+    async def __aenter__(self) -> "OutboundQueue":
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self._worker_count)]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def put(self, phone_number: str, message: Any):
+        await self._queue.put((phone_number, message))
+        self.stats["queued"] += 1
+
+    async def _take_token(self):
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+                self._refilled = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def _deliver(self, phone_number: str, message: Any) -> bool:
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retried"] += 1
+                await asyncio.sleep(self.retry_delay * attempt)
+            await self._take_token()
+            try:
+                if await self.send(phone_number, message):
+                    return True
+            except Exception as e:
+                logger.warning(f"Outbound send to {phone_number} failed: {e}")
+        return False
+
+    async def _work(self):
+        while True:
+            phone_number, message = await self._queue.get()
+            try:
+                delivered = await self._deliver(phone_number, message)
+                self.stats["sent" if delivered else "failed"] += 1
+            finally:
+                self._queue.task_done()
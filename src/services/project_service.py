@@ -2,6 +2,7 @@ import httpx
 import logging
 from typing import List, Dict, Any
 from rapidfuzz import process, fuzz
+from src.core.http import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,7 @@ async def search_projects_by_name(project_name: str, access_token: str, account_
         return {"matches": [], "match_count": 0}
 
     logger.info(f"🔍 Attempting direct search for project '{project_name}' in account '{account_id}'...")
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_client(timeout=30.0) as client:
         direct_results = await _fetch_all_pages(
             client=client,
             account_id=account_id,
@@ -54,27 +55,7 @@ async def search_projects_by_name(project_name: str, access_token: str, account_
             return {"matches": [], "match_count": 0}
 
         logger.info(f"Applying fuzzy matching on {len(all_projects)} projects...")
-
-        name_to_project = {
-            proj["name"]: proj
-            for proj in all_projects if "name" in proj
-        }
-
-        matched_names = process.extract(
-            project_name,
-            name_to_project.keys(),
-            scorer=fuzz.WRatio,
-            score_cutoff=80,
-            limit=10
-        )
-
-        fuzzy_matches = [
-            {
-                "project_id": name_to_project[name]["id"],
-                "project_name": name
-            }
-            for name, _, _ in matched_names
-        ]
+        fuzzy_matches = fuzzy_match_projects(project_name, all_projects)
 
         logger.info(f"✅ Found {len(fuzzy_matches)} fuzzy-matched project(s).")
         return {
@@ -82,6 +63,32 @@ async def search_projects_by_name(project_name: str, access_token: str, account_
             "match_count": len(fuzzy_matches)
         }
 
+def fuzzy_match_projects(project_name: str, projects: List[Dict[str, Any]], limit: int = 10, score_cutoff: int = 80) -> List[Dict[str, Any]]:
+    """
+    Ranks ACC projects (dicts with 'id' and 'name') by fuzzy similarity to
+    `project_name` and returns up to `limit` matches as {project_id, project_name}.
+    """
+    name_to_project = {
+        proj["name"]: proj
+        for proj in projects if "name" in proj
+    }
+
+    matched_names = process.extract(
+        project_name,
+        name_to_project.keys(),
+        scorer=fuzz.WRatio,
+        score_cutoff=score_cutoff,
+        limit=limit
+    )
+
+    return [
+        {
+            "project_id": name_to_project[name]["id"],
+            "project_name": name
+        }
+        for name, _, _ in matched_names
+    ]
+
 async def _fetch_all_pages(client: httpx.AsyncClient, account_id: str, access_token: str, name_filter: str = None) -> List[Dict[str, Any]]:
     base_url = f"https://developer.api.autodesk.com/construction/admin/v1/accounts/{account_id}/projects"
     headers = {"Authorization": f"Bearer {access_token}"}
@@ -0,0 +1,116 @@
+# src/services/rule_intent.py
+#
+# Keyword/regex intent parser. It is much less capable than the LLM and is only
+# used when the LLM is unavailable (see src/integrations/llm_governor.py) or as
+# the offline fake backend for load tests. It returns the same
+# {"intent", "parameters"} shape, falling back to "unsure".
+import re
+from typing import Dict, List
+
+from src.services.intent_cache import normalize
+
+# Checked in order: "forms in review" is a forms query, "reviews" alone is not
+INTENT_WORDS = {
+    "get_issues": ("issue", "issues", "mudde"),
+    "get_forms": ("form", "forms", "wir"),
+    "get_reviews": ("review", "reviews"),
+}
+
+STATUS_WORDS = {
+    "get_issues": {
+        "open": "open", "closed": "closed", "close": "closed", "draft": "draft", "pending": "pending",
+        "completed": "completed", "done": "completed", "in review": "in_review",
+    },
+    "get_reviews": {"open": "open", "pending": "open", "closed": "closed", "void": "void"},
+    "get_forms": {"in review": "in_review", "in progress": "in_progress", "closed": "closed", "open": "in_progress"},
+}
+STATUS_FIELDS = {"get_issues": "issue_status", "get_reviews": "review_status", "get_forms": "form_status"}
+DATE_FIELDS = {"get_issues": "due_date", "get_reviews": "due_date", "get_forms": "created_on"}
+
+DATE_PHRASES = {
+    "today": "today", "aaj": "today", "tomorrow": "tomorrow", "kal": "tomorrow",
+    "this week": "this_week", "next week": "next_week", "overdue": "overdue", "yesterday": "yesterday",
+}
+
+GROUP_WORDS = {
+    "by status": "status", "status wise": "status", "by type": "issue_type", "type wise": "issue_type",
+    "by assignee": "assignee", "by person": "assignee", "person wise": "assignee", "breakdown": "status",
+}
+EXPORT_WORDS = {
+    "excel": "xlsx", "xlsx": "xlsx", "spreadsheet": "xlsx", "sheet": "xlsx",
+    "csv": "csv", "export": "csv", "download": "csv",
+}
+COUNT_WORDS = ("how many", "count", "number of", "kitne", "kitna", "total")
+SELF_WORDS = ("my", "me", "mine", "mujhe", "mere", "mera", "i have")
+
+# "... in Tower A", "... for project Tower A", "... project Tower A"
+_PROJECT = re.compile(r"\b(?:in|for|of|on)\s+(?:the\s+)?(?:project\s+)?(.+?)(?:\s+(?:project|due|for|assigned|created|that|which)\b|$)")
+# "... assigned to Priya", "... for Priya in Tower A" ("for X" alone is ambiguous with a project)
+_ASSIGNEE = re.compile(r"\b(?:assigned to\s+([a-z][a-z ]*?)(?=\s+(?:in|on|due|for|project)\b|$)|for\s+([a-z][a-z ]*?)(?=\s+(?:in|on|project)\b))")
+
+
+def _contains(text: str, phrase: str) -> bool:
+    return re.search(rf"\b{re.escape(phrase)}\b", text) is not None
+
+
+def _match_known(text: str, values: List[str]) -> str:
+    for value in sorted(values, key=len, reverse=True):
+        if _contains(text, normalize(value)):
+            return value
+    return None
+
+
+def parse(text: str, known: Dict[str, List[str]] = None) -> dict:
+    """
+    Parses a message with keyword rules. `known` maps slot fields (e.g.
+    "project_name") to names seen before in the hub, which are preferred over the
+    regex guesses.
+    """
+    known = known or {}
+    normalized = normalize(text)
+    intent = next((i for i, words in INTENT_WORDS.items() if any(_contains(normalized, w) for w in words)), None)
+    if intent is None:
+        return {"intent": "unsure", "parameters": {}}
+
+    parameters: dict = {}
+    statuses = [status for phrase, status in STATUS_WORDS[intent].items() if _contains(normalized, phrase)]
+    if statuses:
+        parameters[STATUS_FIELDS[intent]] = sorted(set(statuses))
+    for phrase, value in DATE_PHRASES.items():
+        if _contains(normalized, phrase):
+            parameters[DATE_FIELDS[intent]] = value
+            break
+    if intent == "get_issues":
+        group_by = [dimension for phrase, dimension in GROUP_WORDS.items() if _contains(normalized, phrase)]
+        if group_by:
+            parameters["group_by"] = list(dict.fromkeys(group_by))
+        exports = [fmt for phrase, fmt in EXPORT_WORDS.items() if _contains(normalized, phrase)]
+        if exports:
+            parameters["export"] = "xlsx" if "xlsx" in exports else "csv"
+    if any(_contains(normalized, w) for w in COUNT_WORDS) and "group_by" not in parameters:
+        parameters["count_only"] = True
+
+    # Status/date/grouping/export phrases such as "in review" must not be mistaken for "in <project>"
+    remainder = normalized
+    for phrase in (*STATUS_WORDS[intent], *DATE_PHRASES, *GROUP_WORDS, *EXPORT_WORDS):
+        remainder = re.sub(rf"\b{re.escape(phrase)}\b", " ", remainder)
+
+    assignee = _match_known(normalized, known.get("assignee_name", []))
+    if not assignee and any(_contains(normalized, w) for w in SELF_WORDS):
+        assignee = "current_user"
+    if not assignee:
+        match = _ASSIGNEE.search(remainder)
+        if match:
+            assignee = (match.group(1) or match.group(2)).strip()
+            remainder = remainder[:match.start()] + " " + remainder[match.end():]
+    if assignee:
+        parameters["assignee_name"] = assignee
+
+    project = _match_known(normalized, known.get("project_name", []))
+    if not project:
+        match = _PROJECT.search(remainder)
+        project = re.sub(r"(\s+(and|with|or|to|as|in))+$", "", match.group(1).strip()) if match else None
+    if project:
+        parameters["project_name"] = project
+
+    return {"intent": intent, "parameters": parameters}
@@ -0,0 +1,112 @@
+# src/services/sender_filter.py
+import asyncio
+import logging
+import struct
+import time
+import uuid
+from typing import Optional
+
+from src.core.bloom import BloomFilter
+from src.core.cache import cache
+from src.core.config import settings
+from src.core.metrics import register_stats
+from src.repositories import postgres_repo
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "bloom:registered_phones"
+LOCK_KEY = "lock:bloom:registered_phones"
+_BUILT_AT = struct.Struct(">d")
+
+
+class RegisteredSenderFilter:
+    """
+    Rejects unregistered WhatsApp senders without touching Redis or Postgres.
+
+    Each worker keeps a Bloom filter of registered phone numbers in memory and
+    checks it synchronously. The filter itself is built by one worker at a time
+    (guarded by a Redis lock) and shared through Redis; other workers just
+    reload the serialized copy. Until a filter is available every sender is
+    let through, so an outage can only make the filter permissive.
+    """
+    def __init__(self):
+        self.bloom: Optional[BloomFilter] = None
+        self.built_at = 0.0
+        self.loaded_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.stats = {"passed": 0, "rejected": 0, "unavailable": 0, "rebuilds": 0}
+
+    def might_be_registered(self, phone_number: str) -> bool:
+        """False only if the number is definitely not registered."""
+        if not settings.SENDER_FILTER_ENABLED:
+            return True
+        self._schedule_refresh_if_due()
+        if self.bloom is None:
+            self.stats["unavailable"] += 1
+            return True
+        if phone_number in self.bloom:
+            self.stats["passed"] += 1
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def _schedule_refresh_if_due(self):
+        if time.monotonic() - self.loaded_at < settings.SENDER_FILTER_RELOAD_SECONDS:
+            return
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        try:
+            self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+        except RuntimeError:
+            pass
+
+    async def refresh(self):
+        """Loads the shared filter from Redis, rebuilding it first if it is missing or too old."""
+        self.loaded_at = time.monotonic()
+        try:
+            blob = await cache.get_raw(REDIS_KEY)
+            built_at = _BUILT_AT.unpack_from(blob)[0] if blob else 0.0
+            if time.time() - built_at >= settings.SENDER_FILTER_REBUILD_SECONDS:
+                rebuilt = await self.rebuild()
+                if rebuilt:
+                    blob = rebuilt
+            if blob:
+                self.bloom = BloomFilter.from_bytes(blob[_BUILT_AT.size:])
+                self.built_at = _BUILT_AT.unpack_from(blob)[0]
+        except Exception as e:
+            logger.error(f"Failed to refresh registered sender filter: {e}")
+
+    async def rebuild(self) -> Optional[bytes]:
+        """
+        Rebuilds the filter from users.phone_number if no other worker is doing so.
+        Returns the serialized filter that was stored, or None if skipped/failed.
+        """
+        # Released only while it still holds our token, so a rebuild that outlives
+        # the lock's expiry does not delete the lock another worker has taken since
+        lock_token = f"{cache.worker_id}:{uuid.uuid4().hex[:8]}"
+        if await cache.set_if_absent(LOCK_KEY, lock_token, expiry_time=120) is False:
+            return None
+        try:
+            started = time.monotonic()
+            count = await postgres_repo.count_registered_phone_numbers()
+            # Headroom so users registered before the next rebuild do not push up the FP rate.
+            bloom = BloomFilter.for_capacity(max(int(count * 1.2), 1000), settings.SENDER_FILTER_FP_RATE)
+            async for phone_number in postgres_repo.iter_registered_phone_numbers():
+                bloom.add(phone_number)
+            blob = _BUILT_AT.pack(time.time()) + bloom.to_bytes()
+            await cache.set_raw(REDIS_KEY, blob, expiry_time=settings.SENDER_FILTER_REBUILD_SECONDS * 3)
+            self.stats["rebuilds"] += 1
+            logger.info(
+                f"Rebuilt registered sender filter: {count} numbers, {len(blob)} bytes "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+            return blob
+        except Exception as e:
+            logger.error(f"Failed to rebuild registered sender filter: {e}")
+            return None
+        finally:
+            await cache.delete_if_equal(LOCK_KEY, lock_token)
+
+
+registered_senders = RegisteredSenderFilter()
+register_stats("sender_filter", lambda: registered_senders.stats)
@@ -1,10 +1,12 @@
+import asyncio
 import base64
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 
-import httpx
-from src.core.cache import cache
+from src.core.cache_aside import cache_aside, read_many
+from src.core.http import http_client
+from src.core.metrics import timed
 from src.repositories import mongodb_repo
 
 TOKEN_URL = "https://developer.api.autodesk.com/authentication/v2/token"
@@ -16,6 +18,13 @@ async def get_three_legged_token(mongo_uri: str, autodesk_id: str, client_id: st
     """
     logging.info("[3-LEG] Starting...")
     token_doc = await mongodb_repo.get_aps_token(mongo_uri, autodesk_id)
+    return await _three_legged_from_doc(mongo_uri, token_doc, autodesk_id, client_id, client_secret)
+
+
+async def _three_legged_from_doc(mongo_uri: str, token_doc: Optional[Dict], autodesk_id: str, client_id: str, client_secret: str) -> Optional[str]:
+    """
+    Returns the access token from an APS token document, refreshing it if it is about to expire.
+    """
     logging.info(f"[3-LEG] Token document found: {'Yes' if token_doc else 'No'}")
 
     if not token_doc or token_doc.get("status") != "active":
@@ -55,7 +64,7 @@ async def _refresh_three_legged(mongo_uri: str, token_doc: Dict, client_id: str,
     headers = { "Authorization": f"Basic {encoded}", "Content-Type": "application/x-www-form-urlencoded" }
     data = { "grant_type": "refresh_token", "refresh_token": refresh_token, "scope": "data:read account:read" }
 
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         try:
             resp = await client.post(REFRESH_URL, headers=headers, data=data)
             resp.raise_for_status()
@@ -83,36 +92,60 @@ async def get_two_legged_token(client_id: str, client_secret: str, scope: str =
     """
     Retrieves a cached 2-legged token, or generates a new one if expired.
     """
-    cache_key = f"two_legged_token:{client_id}"
-    
-    logging.info("[2-LEG] Checking cache for 2-legged token...")
-    cached_token = await cache.get(cache_key)
-    if cached_token:
-        logging.info("[2-LEG] Cache HIT.")
-        return cached_token.decode('utf-8') if isinstance(cached_token, bytes) else cached_token
+    token = await _fetch_two_legged_token(client_id, client_secret, scope)
+    return token["access_token"] if token else None
+
 
+# Never serve an expired token: stale_ttl=0, and the TTL follows the token's own expiry.
+@cache_aside(
+    "two_legged_token",
+    key=lambda client_id, client_secret, scope="data:read account:read": client_id,
+    stale_ttl=0,
+    ttl_from_result=lambda token: token["expires_in"] - 60,
+)
+async def _fetch_two_legged_token(client_id: str, client_secret: str, scope: str = "data:read account:read") -> Optional[Dict]:
+    """
+    Requests a new 2-legged token. Returns {"access_token", "expires_in"}.
+    """
     logging.info("[2-LEG] Cache MISS. Generating new token.")
     auth_str = f"{client_id}:{client_secret}"
     encoded_auth = base64.b64encode(auth_str.encode()).decode()
     headers = {"Authorization": f"Basic {encoded_auth}", "Content-Type": "application/x-www-form-urlencoded"}
     data = {"grant_type": "client_credentials", "scope": scope}
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.post(TOKEN_URL, headers=headers, data=data)
-            resp.raise_for_status()
-            body = resp.json()
-            access_token = body["access_token"]
-            expires_in = body["expires_in"]
-            
-            # **THE FIX**: Pass expiration as a positional argument, not a keyword.
-            logging.info("[2-LEG] Storing new token in cache.")
-            await cache.set(cache_key, access_token, expires_in - 60)
-            
-            return access_token
-        except Exception as e:
-            logging.error(f"[2-LEG] Failed to obtain token: {e}")
-            return None
-        
 
-    
\ No newline at end of file
+    async with http_client() as client:
+        resp = await client.post(TOKEN_URL, headers=headers, data=data)
+        resp.raise_for_status()
+        body = resp.json()
+        return {"access_token": body["access_token"], "expires_in": body["expires_in"]}
+
+
+@timed("token_fetch")
+async def get_tokens(config: Dict, autodesk_id: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns (three_legged_token, two_legged_token) for a user.
+    Both cached token entries are read with a single MGET; only misses fall
+    back to Mongo / the APS token endpoint, and those run concurrently.
+    """
+    client_id = config["client_id"]
+    client_secret = config["client_secret"]
+    token_doc, cached_two_legged = await read_many([
+        mongodb_repo.get_aps_token.key_for(config["mongodb_uri"], autodesk_id),
+        _fetch_two_legged_token.key_for(client_id, client_secret),
+    ])
+
+    if token_doc:
+        logging.info(f"Cache HIT for aps_token:{autodesk_id}")
+        three_legged_call = _three_legged_from_doc(config["mongodb_uri"], token_doc, autodesk_id, client_id, client_secret)
+    else:
+        three_legged_call = get_three_legged_token(config["mongodb_uri"], autodesk_id, client_id, client_secret)
+
+    if cached_two_legged:
+        logging.info("[2-LEG] Cache HIT.")
+        return await three_legged_call, cached_two_legged["access_token"]
+
+    three_legged_token, two_legged_token = await asyncio.gather(
+        three_legged_call,
+        get_two_legged_token(client_id, client_secret),
+    )
+    return three_legged_token, two_legged_token
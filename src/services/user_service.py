@@ -1,6 +1,7 @@
 import httpx
 import logging
 from typing import Dict, Any
+from src.core.http import http_client
 
 logger = logging.getLogger(__name__)
 AUTODESK_API_BASE_URL = "https://developer.api.autodesk.com"
@@ -29,7 +30,7 @@ async def search_users_by_name(name: str, access_token: str, hub_id: str) -> Dic
     }
     params = {"name": name}
 
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         try:
             logger.info(f"🔍 Searching for users with name '{name}' in hub '{hub_id}'...")
             response = await client.get(url, headers=headers, params=params)
@@ -0,0 +1,100 @@
+# src/services/warmup.py
+"""
+Startup warm-up, run by the FastAPI lifespan before the worker reports ready:
+open the Redis and Postgres pools, load the intent classifier and sender
+filter, then prefetch company configs and 2-legged tokens for the busiest
+hubs so first messages skip those lookups. Steps fail independently; a failed
+step only means that work happens on the first request instead.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.core.cache import cache
+from src.core.config import settings
+from src.repositories import postgres_repo
+from src.services import token_service
+from src.services.intent_classifier import intent_classifier
+from src.services.sender_filter import registered_senders
+
+logger = logging.getLogger(__name__)
+
+
+async def _step(results: Dict[str, Any], name: str, work: Awaitable, summary: Optional[Callable[[Any], Any]] = None) -> Any:
+    """Awaits one step, recording its outcome (or `summary(outcome)`) and duration in `results`."""
+    started = time.perf_counter()
+    try:
+        outcome = await work
+        detail = summary(outcome) if summary else outcome
+        results[name] = {"ok": True, "detail": detail, "seconds": round(time.perf_counter() - started, 3)}
+        return outcome
+    except Exception as e:
+        results[name] = {"ok": False, "detail": str(e), "seconds": round(time.perf_counter() - started, 3)}
+        logger.warning(f"Warm-up step {name} failed: {e}")
+        return None
+
+
+async def _open_redis(count: int) -> int:
+    # Concurrent pings each take their own pooled connection
+    replies = await asyncio.gather(*(cache.ping() for _ in range(count)))
+    if not all(replies):
+        raise ConnectionError(f"{replies.count(False)}/{count} Redis pings failed")
+    await cache.start_invalidation_listener()
+    return count
+
+
+async def _load_classifier() -> bool:
+    return intent_classifier.preload()
+
+
+async def _load_sender_filter() -> bool:
+    if not settings.SENDER_FILTER_ENABLED:
+        return False
+    await registered_senders.refresh()
+    return registered_senders.bloom is not None
+
+
+async def _prefetch_tenants(configs: Dict[str, Dict]) -> Dict[str, int]:
+    await postgres_repo.get_company_config.store_many({
+        postgres_repo.get_company_config.key_for(hub_id): config for hub_id, config in configs.items()
+    })
+
+    credentials = {config["client_id"]: config["client_secret"] for config in configs.values() if config["client_id"]}
+    semaphore = asyncio.Semaphore(settings.WARMUP_CONCURRENCY)
+
+    async def fetch(client_id: str, client_secret: str) -> bool:
+        async with semaphore:
+            try:
+                return bool(await token_service.get_two_legged_token(client_id, client_secret))
+            except Exception as e:
+                logger.warning(f"Warm-up token fetch failed for client {client_id}: {e}")
+                return False
+
+    fetched = await asyncio.gather(*(fetch(cid, secret) for cid, secret in credentials.items()))
+    return {"hubs": len(configs), "tokens": sum(fetched), "token_failures": len(fetched) - sum(fetched)}
+
+
+async def warm_up() -> Dict[str, Any]:
+    """Runs every warm-up step and returns {step: {"ok", "detail", "seconds"}}."""
+    results: Dict[str, Any] = {}
+    await asyncio.gather(
+        _step(results, "redis", _open_redis(settings.WARMUP_REDIS_CONNECTIONS)),
+        _step(results, "postgres", postgres_repo.open_connections(settings.POSTGRES_POOL_SIZE)),
+        _step(results, "intent_classifier", _load_classifier()),
+        _step(results, "sender_filter", _load_sender_filter()),
+        _step(results, "digest_table", postgres_repo.ensure_digest_subscriptions_table()),
+    )
+    # Only the count is reported: configs hold client secrets and results are served at /health/ready
+    configs = await _step(results, "company_configs", postgres_repo.list_company_configs(settings.WARMUP_MAX_TENANTS), len)
+    if configs:
+        await _step(results, "tenants", _prefetch_tenants(configs))
+    failed = [name for name, result in results.items() if not result["ok"]]
+    logger.info(f"Warm-up finished ({len(results)} steps, failed: {', '.join(failed) or 'none'})")
+    return results
+
+
+async def shutdown():
+    """Closes the pools opened by warm_up (and by traffic)."""
+    await cache.close()
+    await postgres_repo.close()
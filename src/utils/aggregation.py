@@ -0,0 +1,93 @@
+# src/utils/aggregation.py
+
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CLOSED_STATUSES = {"closed", "completed", "void", "not_approved"}
+
+# Due-date buckets in display order; only items that are not closed are bucketed
+DUE_BUCKETS = (
+    "overdue >30d",
+    "overdue 8-30d",
+    "overdue 1-7d",
+    "due today",
+    "due in 7d",
+    "due later",
+    "no due date",
+)
+
+# group_by dimension -> field of the ACC row it counts
+ISSUE_COLUMNS = {"status": "status", "issue_type": "issueTypeId", "assignee": "assignedTo", "due": "dueDate"}
+
+
+def due_bucket(due: Optional[str], today: date) -> str:
+    if not due:
+        return "no due date"
+    try:
+        days = (date.fromisoformat(due[:10]) - today).days
+    except ValueError:
+        return "no due date"
+    if days < -30:
+        return "overdue >30d"
+    if days < -7:
+        return "overdue 8-30d"
+    if days < 0:
+        return "overdue 1-7d"
+    if days == 0:
+        return "due today"
+    if days <= 7:
+        return "due in 7d"
+    return "due later"
+
+
+class GroupedCounter:
+    """
+    Accumulates group-by counts over pages of rows without keeping the rows.
+    Each page is reduced column by column (one Counter.update per dimension), so
+    memory stays proportional to the number of distinct values, not rows.
+    """
+
+    def __init__(self, group_by: Iterable[str], columns: Dict[str, str], today: date):
+        self.group_by = list(dict.fromkeys(group_by))
+        self.columns = columns
+        self.today = today
+        self.total = 0
+        self.counts: Dict[str, Counter] = {dimension: Counter() for dimension in self.group_by}
+
+    def add_page(self, rows: List[Dict[str, Any]]):
+        self.total += len(rows)
+        for dimension, counter in self.counts.items():
+            column = [row.get(self.columns[dimension]) for row in rows]
+            if dimension == "due":
+                statuses = [row.get("status") for row in rows]
+                counter.update(
+                    due_bucket(due, self.today)
+                    for due, status in zip(column, statuses)
+                    if status not in CLOSED_STATUSES
+                )
+            else:
+                counter.update(column)
+
+    def result(self, labels: Optional[Dict[str, Dict[Any, str]]] = None) -> Dict[str, Any]:
+        """
+        Returns {"total": n, "groups": {dimension: [(label, count), ...]}}. `labels`
+        maps raw values (e.g. issue type IDs) to display names per dimension.
+        Groups are sorted by count, except due buckets which keep their order.
+        """
+        labels = labels or {}
+        groups: Dict[str, List[Tuple[str, int]]] = {}
+        for dimension, counter in self.counts.items():
+            if dimension == "due":
+                groups[dimension] = [(bucket, counter[bucket]) for bucket in DUE_BUCKETS if counter[bucket]]
+                continue
+            names = labels.get(dimension, {})
+            merged: Counter = Counter()
+            for value, count in counter.items():
+                if value is None:
+                    name = "unassigned" if dimension == "assignee" else "none"
+                else:
+                    name = names.get(value, str(value))
+                merged[name] += count
+            groups[dimension] = merged.most_common()
+        return {"total": self.total, "groups": groups}
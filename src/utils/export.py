@@ -0,0 +1,109 @@
+# src/utils/export.py
+#
+# Streaming CSV/XLSX writers for large result sets. Rows are written page by
+# page into a spooled temporary file (in memory while small, on disk after
+# SPOOL_MAX_BYTES), so memory stays constant however many rows are exported.
+# XLSX uses openpyxl's write-only mode; without openpyxl exports fall back to CSV.
+import csv
+import io
+import logging
+import tempfile
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # pragma: no cover - optional dependency
+    Workbook = None
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAX_BYTES = 1024 * 1024
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+ISSUE_HEADERS = ("Issue", "Title", "Status", "Type", "Assignee", "Due date", "Link")
+
+
+def issue_row(issue: Dict[str, Any], labels: Dict[str, Dict[Any, str]], url: str) -> List[Any]:
+    """One export row for an ACC issue; type and assignee IDs are replaced by their labels."""
+    issue_type = issue.get("issueTypeId")
+    assignee = issue.get("assignedTo")
+    return [
+        issue.get("displayId"),
+        issue.get("title") or "",
+        issue.get("status") or "",
+        labels.get("issue_type", {}).get(issue_type, issue_type or ""),
+        labels.get("assignee", {}).get(assignee, assignee or ""),
+        (issue.get("dueDate") or "")[:10],
+        url,
+    ]
+
+
+class CSVWriter:
+    extension = "csv"
+
+    def __init__(self, file):
+        # utf-8-sig so Excel detects the encoding of non-ASCII names
+        self._text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._text)
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()
+
+
+class XLSXWriter:
+    extension = "xlsx"
+
+    def __init__(self, file, title: str = "Export"):
+        self._file = file
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(title=title[:31])
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]):
+        for row in rows:
+            self._sheet.append(list(row))
+
+    def close(self):
+        self._workbook.save(self._file)
+
+
+def create_writer(fmt: str, file):
+    if fmt == "xlsx":
+        if Workbook is not None:
+            return XLSXWriter(file)
+        logger.warning("openpyxl is not installed; exporting as CSV instead")
+    return CSVWriter(file)
+
+
+async def write_export(fmt: str, headers: Sequence[str], pages: AsyncIterator[List[List[Any]]],
+                       max_rows: Optional[int] = None) -> Tuple[Any, str, int]:
+    """
+    Writes `headers` and then each page of rows from `pages` as they arrive.
+    Returns (file rewound to the start, extension actually used, row count);
+    the caller closes the file. Stops after `max_rows` rows.
+    """
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        writer = create_writer(fmt, file)
+        writer.write_rows([headers])
+        rows = 0
+        async for page in pages:
+            if max_rows is not None:
+                page = page[:max_rows - rows]
+            writer.write_rows(page)
+            rows += len(page)
+            if max_rows is not None and rows >= max_rows:
+                break
+        writer.close()
+    except BaseException:
+        file.close()
+        raise
+    file.seek(0)
+    return file, writer.extension, rows
@@ -0,0 +1,115 @@
+# src/utils/incremental_json.py
+
+import json
+from typing import Any, Callable, List, Optional, Tuple
+
+Path = Tuple[Any, ...]
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = ",]}" + _WHITESPACE
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for a single JSON document arriving in chunks (e.g. streamed LLM output).
+
+    Text before the first '{' or '[' (such as a ```json fence) and anything after the
+    document closes are ignored. `on_value(path, value)` is called as soon as each
+    object member is complete, e.g. (("parameters", "project_name"), "Tower A"),
+    including nested containers when they close.
+
+    Usage:
+        parser = IncrementalJSONParser(on_value=callback)
+        for chunk in chunks:
+            parser.feed(chunk)
+        if parser.done:
+            document = parser.result
+    """
+
+    def __init__(self, on_value: Optional[Callable[[Path, Any], None]] = None):
+        self.on_value = on_value
+        self.result: Any = None
+        self.done = False
+        self._started = False
+        # Open containers: [container, path, pending key, expecting a key]
+        self._stack: List[list] = []
+        self._string: Optional[List[str]] = None
+        self._escaped = False
+        self._scalar: Optional[List[str]] = None
+
+    def feed(self, chunk: str):
+        for char in chunk:
+            if self.done:
+                return
+            self._feed_char(char)
+
+    def _feed_char(self, char: str):
+        if self._string is not None:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                raw, self._string = "".join(self._string), None
+                self._complete(json.loads(f'"{raw}"'))
+                return
+            self._string.append(char)
+            return
+
+        if self._scalar is not None:
+            if char not in _SCALAR_END:
+                self._scalar.append(char)
+                return
+            raw, self._scalar = "".join(self._scalar), None
+            self._complete(json.loads(raw))
+            # The terminating character still needs handling below
+
+        if not self._started:
+            if char not in "{[":
+                return
+            self._started = True
+
+        if char in _WHITESPACE or char in ",:":
+            return
+        if char == "{":
+            self._push({})
+        elif char == "[":
+            self._push([])
+        elif char in "}]":
+            if not self._stack:
+                raise ValueError(f"Unexpected '{char}'")
+            container = self._stack.pop()[0]
+            self._complete(container)
+        elif char == '"':
+            self._string = []
+        else:
+            self._scalar = [char]
+
+    def _child_path(self) -> Path:
+        if not self._stack:
+            return ()
+        container, path, key, _ = self._stack[-1]
+        return path + ((key,) if isinstance(container, dict) else (len(container),))
+
+    def _push(self, container):
+        self._stack.append([container, self._child_path(), None, isinstance(container, dict)])
+
+    def _complete(self, value: Any):
+        if not self._stack:
+            self.result = value
+            self.done = True
+            return
+        frame = self._stack[-1]
+        container, path, key, expecting_key = frame
+        if isinstance(container, list):
+            container.append(value)
+            return
+        if expecting_key:
+            if not isinstance(value, str):
+                raise ValueError(f"Object key must be a string, got {value!r}")
+            frame[2], frame[3] = value, False
+            return
+        container[key] = value
+        frame[2], frame[3] = None, True
+        if self.on_value:
+            self.on_value(path + (key,), value)
@@ -2,6 +2,8 @@
 
 from typing import List, Dict, Any, Optional
 
+from src.core.config import settings
+
 def build_filter_description(filters: Dict[str, Any]) -> str:
     """
     Build a human-readable description of applied filters for the message.
@@ -32,6 +34,14 @@ def build_filter_description(filters: Dict[str, Any]) -> str:
 
     return " ".join(parts) if parts else ""
 
+SORT_DESCRIPTIONS = {
+    "due_date": "sorted by due date",
+    "due_date_desc": "latest due date first",
+    "title": "sorted by title",
+    "status": "sorted by status",
+    "display_id": "sorted by issue number",
+}
+
 def generate_issue_url(issue_id: str, project_id: Optional[str] = None) -> str:
     """
     Generate a URL link to the issue in Autodesk or your platform.
@@ -53,8 +63,9 @@ def format_issues_response(
     Format issues response message based on count_only flag.
     """
     filter_desc = build_filter_description(filters)
-    issues = data["data"]
-    count = len(issues)
+    issues = data.get("data", [])
+    # Counts come from the API's totalResults; lists are capped at ACC_RESULT_LIMIT rows
+    count = data.get("count", data.get("total", len(issues)))
 
     if count_only:
         return f"You have *{count}* issue{'s' if count != 1 else ''} {filter_desc}."
@@ -62,6 +73,9 @@ def format_issues_response(
     if count == 0:
         return f"No issues found {filter_desc}."
 
+    # "top 5" only trims what is shown; the fetched rows stay whole for follow-up refinements
+    if filters.get("limit"):
+        issues = issues[:filters["limit"]]
     lines = [f"There are *{count}* issue{'s' if count != 1 else ''} {filter_desc}:"]
     for idx, issue in enumerate(issues, start=1):
         issue_id = issue.get("displayId")
@@ -70,9 +84,47 @@ def format_issues_response(
 
         url = generate_issue_url(issue_id, project_id)
         lines.append(f"{idx}. Issue *#{issue_id}* - *{title}* - Due: {due_date} - {url}")
+    if count > len(issues):
+        lines.append(f"Showing the first {len(issues)} ({SORT_DESCRIPTIONS[filters.get('sort_by') or 'due_date']}).")
 
     return "\n".join(lines)
 
+GROUP_TITLES = {"status": "By status", "issue_type": "By type", "assignee": "By assignee", "due": "Open by due date"}
+MAX_GROUP_ROWS = 8
+
+def format_aggregate_response(data: Dict[str, Any], filters: Dict[str, Any], noun: str = "issue") -> str:
+    """
+    Format a group-by breakdown as one compact message, e.g.
+    "*42* issues in project *Tower A*
+     By status: open 20 · closed 15 · draft 7"
+    """
+    aggregate = data["aggregate"]
+    total = aggregate["total"]
+    filter_desc = build_filter_description(filters)
+    lines = [f"*{total}{'+' if data.get('truncated') else ''}* {noun}{'s' if total != 1 else ''} {filter_desc}".rstrip() + ":"]
+    for dimension, rows in aggregate["groups"].items():
+        if not rows:
+            continue
+        shown = [f"{label} {count}" for label, count in rows[:MAX_GROUP_ROWS]]
+        if len(rows) > MAX_GROUP_ROWS:
+            shown.append(f"others {sum(count for _, count in rows[MAX_GROUP_ROWS:])}")
+        lines.append(f"*{GROUP_TITLES.get(dimension, dimension)}:* " + " · ".join(shown))
+    return "\n".join(lines)
+
+def should_export(data: Dict[str, Any], filters: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the export format ("csv"/"xlsx") when a list result should be sent
+    as a document instead of text: the user asked for an export, or there are
+    more than EXPORT_MIN_ROWS rows. None for counts, breakdowns and empty results.
+    """
+    if filters.get("count_only") or "aggregate" in data or not data.get("data"):
+        return None
+    if filters.get("export"):
+        return filters["export"]
+    if data.get("total", 0) > settings.EXPORT_MIN_ROWS:
+        return settings.EXPORT_DEFAULT_FORMAT
+    return None
+
 def format_response(
     intent: str,
     data: List[Dict[str, Any]],
@@ -82,6 +134,8 @@ def format_response(
     """
     Dispatch formatting based on intent.
     """
+    if "aggregate" in data:
+        return format_aggregate_response(data, filters, noun={"get_issues": "issue", "get_reviews": "review", "get_forms": "form"}.get(intent, "item"))
     if intent == "get_issues":
         return format_issues_response(data, filters, count_only, project_id=filters.get("project_id"))
     elif intent == "get_reviews":
@@ -1,13 +1,15 @@
 # utils/whatsapp.py
 
-import httpx
 import logging
+from typing import BinaryIO, List, Optional
 from src.core.config import settings
+from src.core.http import http_client
 
 logger = logging.getLogger(__name__)
 
 
-async def send_whatsapp_message(phone_number: str, message: str):
+async def send_whatsapp_message(phone_number: str, message: str) -> bool:
+    """Sends a text message; returns whether the Graph API accepted it."""
     url = f"https://graph.facebook.com/v17.0/{settings.PHONE_NUMBER_ID}/messages"
     headers = {
         "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
@@ -19,9 +21,37 @@ async def send_whatsapp_message(phone_number: str, message: str):
         "type": "text",
         "text": {"body": message}
     }
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         response = await client.post(url, headers=headers, json=payload)
         logger.info(f"Sent message response: {response.status_code} {response.text}")
+        return response.is_success
+
+
+async def send_whatsapp_template(phone_number: str, template_name: str, language: str, parameters: List[str]) -> bool:
+    """
+    Sends an approved template message with the given body parameters. Unlike
+    free-form text, templates may be sent outside the 24-hour customer-service
+    window. Returns whether the Graph API accepted it.
+    """
+    url = f"https://graph.facebook.com/v17.0/{settings.PHONE_NUMBER_ID}/messages"
+    headers = {
+        "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "messaging_product": "whatsapp",
+        "to": phone_number,
+        "type": "template",
+        "template": {
+            "name": template_name,
+            "language": {"code": language},
+            "components": [{"type": "body", "parameters": [{"type": "text", "text": p} for p in parameters]}],
+        }
+    }
+    async with http_client() as client:
+        response = await client.post(url, headers=headers, json=payload)
+        logger.info(f"Sent template {template_name} response: {response.status_code} {response.text}")
+        return response.is_success
 
 
 async def send_whatsapp_buttons(phone_number: str, interactive_payload: dict):
@@ -35,8 +65,44 @@ async def send_whatsapp_buttons(phone_number: str, interactive_payload: dict):
         "to": phone_number,
         **interactive_payload
     }
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         response = await client.post(url, headers=headers, json=payload)
         logger.info(f"Sent list message response: {response.status_code} {response.text}")
         if response.status_code != 200:
-            logger.error(f"Failed to send list message: {response.status_code} {response.text}")
\ No newline at end of file
+            logger.error(f"Failed to send list message: {response.status_code} {response.text}")
+
+async def upload_whatsapp_media(file: BinaryIO, filename: str, mime_type: str) -> Optional[str]:
+    """
+    Uploads a file to the WhatsApp media endpoint, streaming it from `file`.
+    Returns the media ID, or None if the upload failed.
+    """
+    url = f"https://graph.facebook.com/v17.0/{settings.PHONE_NUMBER_ID}/media"
+    headers = {"Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}"}
+    data = {"messaging_product": "whatsapp", "type": mime_type}
+    async with http_client(timeout=60.0) as client:
+        response = await client.post(url, headers=headers, data=data, files={"file": (filename, file, mime_type)})
+        if response.status_code != 200:
+            logger.error(f"Failed to upload media: {response.status_code} {response.text}")
+            return None
+        return response.json().get("id")
+
+
+async def send_whatsapp_document(phone_number: str, media_id: str, filename: str, caption: Optional[str] = None) -> bool:
+    url = f"https://graph.facebook.com/v17.0/{settings.PHONE_NUMBER_ID}/messages"
+    headers = {
+        "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
+        "Content-Type": "application/json"
+    }
+    document = {"id": media_id, "filename": filename}
+    if caption:
+        document["caption"] = caption
+    payload = {
+        "messaging_product": "whatsapp",
+        "to": phone_number,
+        "type": "document",
+        "document": document
+    }
+    async with http_client() as client:
+        response = await client.post(url, headers=headers, json=payload)
+        logger.info(f"Sent document response: {response.status_code} {response.text}")
+        return response.status_code == 200